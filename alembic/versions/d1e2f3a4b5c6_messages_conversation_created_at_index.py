@@ -0,0 +1,35 @@
+"""messages (conversation_id, created_at) index
+
+Revision ID: d1e2f3a4b5c6
+Revises: c6a7d8e9f0a1
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "d1e2f3a4b5c6"
+down_revision: str | None = "c6a7d8e9f0a1"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # History reads filter by conversation and take the newest N rows; the composite
+    # index serves both and makes the single-column conversation_id index redundant.
+    op.create_index(
+        "ix_messages_conversation_id_created_at",
+        "messages",
+        ["conversation_id", "created_at"],
+        unique=False,
+    )
+    op.drop_index("ix_messages_conversation_id", table_name="messages")
+
+
+def downgrade() -> None:
+    op.create_index("ix_messages_conversation_id", "messages", ["conversation_id"], unique=False)
+    op.drop_index("ix_messages_conversation_id_created_at", table_name="messages")
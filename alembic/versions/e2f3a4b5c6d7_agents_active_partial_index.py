@@ -0,0 +1,37 @@
+"""agents partial index on active rows
+
+Revision ID: e2f3a4b5c6d7
+Revises: d1e2f3a4b5c6
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "e2f3a4b5c6d7"
+down_revision: str | None = "d1e2f3a4b5c6"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # The poll query reads only active agents in id order; the partial index holds
+    # just those rows, so inactive agents never get scanned. It is not covering: the
+    # query still reads agents.config from the heap and joins tenants.
+    op.create_index(
+        "ix_agents_active_true",
+        "agents",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_agents_active_true", table_name="agents")
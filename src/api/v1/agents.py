@@ -382,7 +382,7 @@ async def agent_chat(
 
     # 5. Build pipeline context.
     from src.core.brain import Brain
-    from src.core.crud import save_message
+    from src.core.crud import save_message, set_conversation_state
     from src.core.pipeline import IncomingMessage, MessagePipeline, PipelineContext
 
     incoming = IncomingMessage(
@@ -425,7 +425,7 @@ async def agent_chat(
         conv_result = await db.execute(select(Conversation).where(Conversation.id == conv_uuid))
         conv = conv_result.scalar_one_or_none()
         if conv:
-            conv.state = state
+            set_conversation_state(conv, state)
             await db.flush()
 
     # Build response.
@@ -13,6 +13,8 @@ from pathlib import Path
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
 
+from src.core.secrets import clear_secret_cache
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1", tags=["secrets"])
@@ -75,6 +77,7 @@ async def set_secret(slug: str, name: str, payload: SecretSetRequest) -> dict:
 
     path = dir_path / name
     path.write_text(payload.value, encoding="utf-8")
+    clear_secret_cache()
     return {"ok": True}
 
 
@@ -89,5 +92,6 @@ async def delete_secret(slug: str, name: str) -> dict:
         path.unlink()
     else:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Secret not found")
+    clear_secret_cache()
     return {"ok": True}
 
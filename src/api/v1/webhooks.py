@@ -4,8 +4,6 @@ Webhook endpoints for channel adapters that use push-based delivery.
 
 from __future__ import annotations
 
-import hashlib
-import json
 import logging
 from uuid import UUID
 
@@ -13,6 +11,7 @@ from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.channels.telegram import TelegramAdapter
+from src.core.runtime_config import config_version as build_config_version
 from src.core.secrets import resolve_secret
 from src.db import get_db
 
@@ -81,13 +80,7 @@ async def telegram_webhook(
                 logger.warning("Invalid agent.dialogue_policy in DB for %s; fallback to YAML", agent.id)
 
         # 2.2 Build config fingerprint for debugging/traceability.
-        cfg_payload = {
-            "agent": agent_config.model_dump(),
-            "dialogue_policy": dialogue_policy.model_dump(),
-        }
-        config_version = hashlib.sha256(
-            json.dumps(cfg_payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
-        ).hexdigest()[:12]
+        config_version = build_config_version(agent_config, dialogue_policy)
 
         # 3. Resolve secrets.
         api_key = resolve_secret(tenant.slug, "openai_key")
@@ -98,6 +91,7 @@ async def telegram_webhook(
             get_conversation_history,
             get_or_create_conversation,
             save_message,
+            set_conversation_state,
         )
         from src.core.pipeline import MessagePipeline, PipelineContext
 
@@ -112,7 +106,11 @@ async def telegram_webhook(
             channel_conversation_id=incoming.channel_conversation_id,
         )
 
-        history = [] if is_new else await get_conversation_history(db, conv.id)
+        history = (
+            []
+            if is_new
+            else await get_conversation_history(db, conv.id, limit=agent_config.llm.max_history)
+        )
         incoming.metadata["conversation_state"] = conv.state or {}
         incoming.metadata["conversation_id"] = str(conv.id)
 
@@ -159,7 +157,7 @@ async def telegram_webhook(
                     ctx.outgoing.text,
                     metadata=ctx.outgoing.metadata,
                 )
-                conv.state = json.loads(json.dumps(incoming.metadata.get("conversation_state", {}), ensure_ascii=False))
+                set_conversation_state(conv, incoming.metadata.get("conversation_state", {}))
                 if incoming.sender_name and not conv.lead_name:
                     conv.lead_name = incoming.sender_name
 
@@ -230,13 +228,7 @@ async def umnico_webhook(
                 logger.warning("Invalid agent.dialogue_policy in DB for %s; fallback to YAML", agent.id)
 
         # 2.2 Config fingerprint.
-        cfg_payload = {
-            "agent": agent_config.model_dump(),
-            "dialogue_policy": dialogue_policy.model_dump(),
-        }
-        config_version = hashlib.sha256(
-            json.dumps(cfg_payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
-        ).hexdigest()[:12]
+        config_version = build_config_version(agent_config, dialogue_policy)
 
         # 3. Resolve secrets.
         api_key = resolve_secret(tenant.slug, "openai_key")
@@ -247,6 +239,7 @@ async def umnico_webhook(
             get_conversation_history,
             get_or_create_conversation,
             save_message,
+            set_conversation_state,
         )
         from src.core.pipeline import MessagePipeline, PipelineContext
 
@@ -261,7 +254,11 @@ async def umnico_webhook(
             channel_conversation_id=incoming.channel_conversation_id,
         )
 
-        history = [] if is_new else await get_conversation_history(db, conv.id)
+        history = (
+            []
+            if is_new
+            else await get_conversation_history(db, conv.id, limit=agent_config.llm.max_history)
+        )
         incoming.metadata["conversation_state"] = conv.state or {}
         incoming.metadata["conversation_id"] = str(conv.id)
 
@@ -301,7 +298,7 @@ async def umnico_webhook(
                     ctx.outgoing.text,
                     metadata=ctx.outgoing.metadata,
                 )
-                conv.state = json.loads(json.dumps(incoming.metadata.get("conversation_state", {}), ensure_ascii=False))
+                set_conversation_state(conv, incoming.metadata.get("conversation_state", {}))
                 if incoming.sender_name and not conv.lead_name:
                     conv.lead_name = incoming.sender_name
 
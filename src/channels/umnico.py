@@ -17,6 +17,7 @@ from typing import Any
 
 from src.channels.base import ChannelAdapter, register_channel
 from src.core.pipeline import IncomingMessage
+from src.integrations.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -127,17 +128,15 @@ class UmnicoAdapter(ChannelAdapter):
 
         channel_conversation_id is the Umnico leadId.
         """
-        import httpx
-
         lead_id = channel_conversation_id
 
         try:
             # First, get the available sources for this lead to find the right channel.
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                sources_resp = await client.get(
-                    f"{UMNICO_API_BASE}/messaging/{lead_id}/sources",
-                    headers=self._headers(),
-                )
+            client = get_http_client()
+            sources_resp = await client.get(
+                f"{UMNICO_API_BASE}/messaging/{lead_id}/sources",
+                headers=self._headers(),
+            )
 
             if not sources_resp.is_success:
                 logger.error(
@@ -174,12 +173,11 @@ class UmnicoAdapter(ChannelAdapter):
             if source.get("saId") is not None:
                 payload["saId"] = source.get("saId")
 
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                send_resp = await client.post(
-                    f"{UMNICO_API_BASE}/messaging/{lead_id}/send",
-                    headers=self._headers(),
-                    json=payload,
-                )
+            send_resp = await client.post(
+                f"{UMNICO_API_BASE}/messaging/{lead_id}/send",
+                headers=self._headers(),
+                json=payload,
+            )
 
             if send_resp.is_success:
                 logger.info(
@@ -203,11 +201,10 @@ class UmnicoAdapter(ChannelAdapter):
         if self.user_id:
             return int(self.user_id)
 
-        import httpx
-
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                resp = await client.get(f"{UMNICO_API_BASE}/managers", headers=self._headers())
+            resp = await get_http_client().get(
+                f"{UMNICO_API_BASE}/managers", headers=self._headers(), timeout=10.0
+            )
             if not resp.is_success:
                 logger.error("Umnico managers error: %s %s", resp.status_code, resp.text)
                 return None
@@ -229,15 +226,13 @@ class UmnicoAdapter(ChannelAdapter):
 
     async def get_lead_info(self, channel_conversation_id: str) -> dict:
         """Fetch lead/customer info from Umnico."""
-        import httpx
-
         lead_id = channel_conversation_id
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                resp = await client.get(
-                    f"{UMNICO_API_BASE}/leads/{lead_id}",
-                    headers=self._headers(),
-                )
+            resp = await get_http_client().get(
+                f"{UMNICO_API_BASE}/leads/{lead_id}",
+                headers=self._headers(),
+                timeout=10.0,
+            )
             if not resp.is_success:
                 return {}
 
@@ -264,50 +259,51 @@ class UmnicoAdapter(ChannelAdapter):
             logger.warning("Umnico adapter: api_token or webhook_url not configured, skipping setup")
             return
 
-        import httpx
-
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                # Get existing webhooks.
-                resp = await client.get(
-                    f"{UMNICO_API_BASE}/webhooks",
-                    headers=self._headers(),
-                )
-                existing = resp.json() if resp.is_success else []
+            client = get_http_client()
+            # Get existing webhooks.
+            resp = await client.get(
+                f"{UMNICO_API_BASE}/webhooks",
+                headers=self._headers(),
+                timeout=10.0,
+            )
+            existing = resp.json() if resp.is_success else []
 
-                # Check if our webhook already registered.
-                our_hook = next(
-                    (h for h in existing if h.get("url") == self.webhook_url),
-                    None,
-                )
+            # Check if our webhook already registered.
+            our_hook = next(
+                (h for h in existing if h.get("url") == self.webhook_url),
+                None,
+            )
 
-                if our_hook:
-                    hook_id = our_hook["id"]
-                    if our_hook.get("status") != 1:
-                        # Re-enable it.
-                        await client.put(
-                            f"{UMNICO_API_BASE}/webhooks/{hook_id}",
-                            headers=self._headers(),
-                            json={"status": 1},
-                        )
-                        logger.info("Umnico webhook re-enabled: id=%s", hook_id)
-                    else:
-                        logger.info("Umnico webhook already registered: id=%s url=%s", hook_id, self.webhook_url)
-                else:
-                    # Register new webhook.
-                    create_resp = await client.post(
-                        f"{UMNICO_API_BASE}/webhooks",
+            if our_hook:
+                hook_id = our_hook["id"]
+                if our_hook.get("status") != 1:
+                    # Re-enable it.
+                    await client.put(
+                        f"{UMNICO_API_BASE}/webhooks/{hook_id}",
                         headers=self._headers(),
-                        json={
-                            "url": self.webhook_url,
-                            "name": self.webhook_name,
-                        },
+                        json={"status": 1},
+                        timeout=10.0,
                     )
-                    if create_resp.is_success:
-                        hook = create_resp.json()
-                        logger.info("Umnico webhook created: id=%s url=%s", hook.get("id"), self.webhook_url)
-                    else:
-                        logger.error("Failed to create Umnico webhook: %s %s", create_resp.status_code, create_resp.text)
+                    logger.info("Umnico webhook re-enabled: id=%s", hook_id)
+                else:
+                    logger.info("Umnico webhook already registered: id=%s url=%s", hook_id, self.webhook_url)
+            else:
+                # Register new webhook.
+                create_resp = await client.post(
+                    f"{UMNICO_API_BASE}/webhooks",
+                    headers=self._headers(),
+                    json={
+                        "url": self.webhook_url,
+                        "name": self.webhook_name,
+                    },
+                    timeout=10.0,
+                )
+                if create_resp.is_success:
+                    hook = create_resp.json()
+                    logger.info("Umnico webhook created: id=%s url=%s", hook.get("id"), self.webhook_url)
+                else:
+                    logger.error("Failed to create Umnico webhook: %s %s", create_resp.status_code, create_resp.text)
 
         except Exception as e:
             logger.error("Umnico webhook setup failed: %s", e)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from functools import lru_cache
+from functools import cached_property, lru_cache
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -13,8 +13,16 @@ class Settings(BaseSettings):
     secret_key: str = "change-me-in-production"
     allowed_origins: str = "*"  # В проде: "https://yourdomain.com"
     debug: bool = True
+    db_echo: bool | None = None  # Log every SQL statement; unset follows `debug`
     log_level: str = "INFO"
 
+    @cached_property
+    def allowed_origins_list(self) -> tuple[str, ...]:
+        """CORS origins parsed from the comma-separated `allowed_origins`."""
+        if self.allowed_origins == "*":
+            return ("*",)
+        return tuple(o.strip() for o in self.allowed_origins.split(",") if o.strip())
+
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from dataclasses import dataclass
 
 import litellm
@@ -37,7 +38,7 @@ class Brain:
     async def think(
         self,
         system_prompt: str,
-        messages: list[dict],
+        messages: Sequence[dict],
         temperature: float | None = None,
     ) -> BrainResponse:
         """
@@ -48,7 +49,7 @@ class Brain:
             messages: Chat history without the system message.
             temperature: Overrides the default temperature for this call.
         """
-        full_messages = [{"role": "system", "content": system_prompt}] + messages
+        full_messages = [{"role": "system", "content": system_prompt}, *messages]
 
         response = await litellm.acompletion(
             model=self.model,
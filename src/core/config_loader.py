@@ -61,6 +61,47 @@ def load_tenant_config(tenant_dir: str | Path) -> TenantFullConfig:
     )
 
 
+# Parsed tenant configs keyed by directory, with the file signature they were built from.
+_config_cache: dict[str, tuple[tuple, TenantFullConfig]] = {}
+
+
+def load_tenant_config_cached(tenant_dir: str | Path) -> TenantFullConfig:
+    """
+    Same as load_tenant_config(), but reuses the parsed result while none of the
+    tenant's YAML/knowledge files changed (checked with one stat per file).
+
+    The returned config is shared between callers and must not be mutated.
+    """
+    tenant_path = Path(tenant_dir)
+    signature = _tenant_files_signature(tenant_path)
+    key = str(tenant_path)
+    cached = _config_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    config = load_tenant_config(tenant_path)
+    _config_cache[key] = (signature, config)
+    return config
+
+
+def _tenant_files_signature(tenant_path: Path) -> tuple:
+    """(name, mtime_ns, size) of every file load_tenant_config() reads."""
+    files = [tenant_path / name for name in ("agent.yaml", "dialogue_policy.yaml", "actions.yaml")]
+    kb_path = tenant_path / "knowledge"
+    if kb_path.is_dir():
+        files.extend(sorted(kb_path.glob("*.md")))
+
+    signature = []
+    for path in files:
+        try:
+            st = path.stat()
+        except OSError:
+            signature.append((path.name, None, None))
+            continue
+        signature.append((path.name, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
 def list_tenants(tenants_dir: str | Path = "tenants") -> list[str]:
     """Return the list of tenant slugs (directories that contain agent.yaml), excluding _template."""
     base = Path(tenants_dir)
@@ -10,10 +10,13 @@ Usage:
 
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass, field
 
 from src.core.schemas import AgentStyle, IntentContract
 
+_SENTENCE_END_RE = re.compile(r"[.!?]+")
+
 
 @dataclass
 class ValidationResult:
@@ -58,23 +61,24 @@ class ContractValidator:
         # 3. Check contract constraints
         if contract:
             # must_include_any: at least one of the words must be present
-            if contract.must_include_any:
-                found = any(word in text for word in contract.must_include_any)
-                if not found:
-                    violations.append(f"must_include: none of {contract.must_include_any} found")
-
-            # forbidden: none of the words should be present
-            for word in contract.forbidden:
-                if word.lower() in text.lower():
-                    violations.append(f"forbidden: '{word}' found")
+            # (contract patterns are precompiled when the config is loaded)
+            must_re = contract.must_include_re
+            if must_re is not None and not must_re.search(text):
+                violations.append(f"must_include: none of {contract.must_include_any} found")
+
+            # forbidden: none of the words should be present; one scan rules out the
+            # clean case, the per-word pass only runs to name the offenders.
+            forbidden_re = contract.forbidden_re
+            if forbidden_re is not None and forbidden_re.search(text):
+                lower = text.lower()
+                for word in contract.forbidden:
+                    if word.lower() in lower:
+                        violations.append(f"forbidden: '{word}' found")
 
         return ValidationResult(ok=len(violations) == 0, violations=violations)
 
     @staticmethod
     def _count_sentences(text: str) -> int:
         """Count sentences by splitting on sentence-ending punctuation."""
-        import re
-
-        parts = re.split(r"[.!?]+", text)
-        return len([p for p in parts if p.strip()])
+        return sum(1 for p in _SENTENCE_END_RE.split(text) if p.strip())
 
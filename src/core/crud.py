@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from uuid import UUID
+import copy
+from collections.abc import Iterable
+from uuid import UUID, uuid4
 
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.attributes import flag_modified
 
@@ -62,24 +65,111 @@ async def get_or_create_conversation(
         agent_id=agent_id,
         channel_type=channel_type,
         channel_conversation_id=channel_conversation_id,
-        state={},
     )
     db.add(conv)
     await db.flush()
     return conv, True
 
 
+async def get_or_create_conversations(
+    db: AsyncSession,
+    agent_id: UUID,
+    keys: Iterable[tuple[str, str]],
+) -> dict[tuple[str, str], Conversation]:
+    """
+    Batch version of get_or_create_conversation() for (channel_type, channel_conversation_id) keys.
+
+    One SELECT for the existing rows and one INSERT ... ON CONFLICT DO NOTHING for the rest.
+    """
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+
+    result = await db.execute(
+        select(Conversation).where(
+            Conversation.agent_id == agent_id,
+            tuple_(Conversation.channel_type, Conversation.channel_conversation_id).in_(keys),
+        )
+    )
+    convs = {(c.channel_type, c.channel_conversation_id): c for c in result.scalars()}
+
+    missing = [key for key in keys if key not in convs]
+    if missing:
+        stmt = (
+            pg_insert(Conversation)
+            .values(
+                [
+                    {
+                        "id": uuid4(),
+                        "agent_id": agent_id,
+                        "channel_type": channel_type,
+                        "channel_conversation_id": channel_conversation_id,
+                        "is_active": True,
+                    }
+                    for channel_type, channel_conversation_id in missing
+                ]
+            )
+            .on_conflict_do_nothing(constraint="uq_conversations_agent_channel_conv_id")
+            .returning(Conversation)
+        )
+        for conv in await db.scalars(stmt):
+            convs[(conv.channel_type, conv.channel_conversation_id)] = conv
+
+        # Rows another worker inserted in the meantime are skipped by ON CONFLICT; read them.
+        raced = [key for key in missing if key not in convs]
+        if raced:
+            result = await db.execute(
+                select(Conversation).where(
+                    Conversation.agent_id == agent_id,
+                    tuple_(
+                        Conversation.channel_type, Conversation.channel_conversation_id
+                    ).in_(raced),
+                )
+            )
+            convs.update({(c.channel_type, c.channel_conversation_id): c for c in result.scalars()})
+
+    return convs
+
+
+async def get_answered_channel_message_ids(
+    db: AsyncSession,
+    conversation_ids: Iterable[UUID],
+    channel_message_ids: Iterable[str],
+) -> set[tuple[UUID, str]]:
+    """
+    Return (conversation_id, channel_message_id) pairs that already have a stored user message.
+
+    Poll-based channels keep returning messages that were answered long ago; the
+    user row written with the reply is the durable record of that.
+    """
+    conversation_ids = list(dict.fromkeys(conversation_ids))
+    channel_message_ids = list(dict.fromkeys(channel_message_ids))
+    if not conversation_ids or not channel_message_ids:
+        return set()
+
+    channel_message_id = Message.metadata_["channel_message_id"].astext
+    result = await db.execute(
+        select(Message.conversation_id, channel_message_id).where(
+            Message.conversation_id.in_(conversation_ids),
+            Message.role == "user",
+            channel_message_id.in_(channel_message_ids),
+        )
+    )
+    return {(conversation_id, message_id) for conversation_id, message_id in result.all()}
+
+
 async def get_conversation_history(db: AsyncSession, conversation_id: UUID, limit: int = 20) -> list[dict]:
     """Return conversation history in the format: [{"role": "...", "content": "..."}, ...]."""
+    # Newest-first LIMIT served by ix_messages_conversation_id_created_at; only the
+    # two columns the prompt needs are fetched, skipping ORM hydration.
     result = await db.execute(
-        select(Message)
+        select(Message.role, Message.content)
         .where(Message.conversation_id == conversation_id)
         .order_by(Message.created_at.desc())
         .limit(limit)
     )
-    messages = result.scalars().all()
-    messages.reverse()
-    return [{"role": m.role, "content": m.content} for m in messages]
+    rows = result.all()
+    return [{"role": role, "content": content} for role, content in reversed(rows)]
 
 
 async def save_message(
@@ -95,6 +185,17 @@ async def save_message(
     return msg
 
 
+def set_conversation_state(conv: Conversation, state: dict) -> None:
+    """
+    Replace conv.state with a copy of `state` and mark the column dirty.
+
+    The pipeline mutates the loaded state dict in place, so the new value usually
+    compares equal to conv.state and a plain assignment would emit no UPDATE.
+    """
+    conv.state = copy.deepcopy(state)
+    flag_modified(conv, "state")
+
+
 async def update_conversation_state(db: AsyncSession, conversation_id: UUID, state: dict) -> Conversation | None:
     """Persist conversation.state safely for nested JSON updates."""
     result = await db.execute(select(Conversation).where(Conversation.id == conversation_id))
@@ -9,6 +9,8 @@ Usage:
 
 from __future__ import annotations
 
+import re
+
 from src.core.schemas import IntentConfig
 
 
@@ -26,6 +28,20 @@ class IntentRouter:
         # Sort intents by priority (ascending = highest priority first).
         self.intents = sorted(intents, key=lambda i: i.priority)
         self.fallback = fallback
+        # One escaped alternation per intent, compiled once: markers stay plain substrings.
+        self._patterns = [
+            (intent.id, self._compile_markers(intent.markers)) for intent in self.intents
+        ]
+        self._by_id: dict[str, IntentConfig] = {}
+        for intent in self.intents:
+            self._by_id.setdefault(intent.id, intent)
+        # Dispatch table: marker -> rank of the highest-priority intent that owns it,
+        # plus one union pattern so a miss costs a single scan.
+        self._marker_rank: dict[str, int] = {}
+        for rank, intent in enumerate(self.intents):
+            for marker in intent.markers:
+                self._marker_rank.setdefault(marker.lower(), rank)
+        self._any_marker = self._compile_markers(list(self._marker_rank))
 
     def detect(self, text: str) -> str:
         """Backward-compatible shortcut returning only intent id."""
@@ -41,20 +57,24 @@ class IntentRouter:
         - fallback -> 0.25
         """
         lower = text.lower()
-        for intent in self.intents:
-            if self._matches(lower, intent.markers):
-                return intent.id, 0.95
-        return self.fallback, 0.25
+        hit = self._any_marker.search(lower) if self._any_marker is not None else None
+        if hit is None:
+            return self.fallback, 0.25
+        # The hit's intent matches; only higher-priority intents can still win.
+        rank = self._marker_rank[hit.group()]
+        for intent_id, pattern in self._patterns[:rank]:
+            if pattern is not None and pattern.search(lower):
+                return intent_id, 0.95
+        return self._patterns[rank][0], 0.95
 
     def get_intent_config(self, intent_id: str) -> IntentConfig | None:
         """Return the full IntentConfig for a given intent ID, or None."""
-        for intent in self.intents:
-            if intent.id == intent_id:
-                return intent
-        return None
+        return self._by_id.get(intent_id)
 
     @staticmethod
-    def _matches(text_lower: str, markers: list[str]) -> bool:
-        """Check if any marker phrase is found in the text."""
-        return any(marker.lower() in text_lower for marker in markers)
+    def _compile_markers(markers: list[str]) -> re.Pattern[str] | None:
+        """Compile marker phrases into one lowercase substring pattern (None if no markers)."""
+        if not markers:
+            return None
+        return re.compile("|".join(re.escape(marker.lower()) for marker in markers))
 
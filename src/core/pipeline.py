@@ -1,19 +1,122 @@
 from __future__ import annotations
 
+import functools
 import logging
+import re
 import time
+from collections import deque
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from uuid import UUID
 
+from src.core.action_parser import parse_action_tags
 from src.core.contracts import ContractValidator
+from src.core.crud import (
+    get_conversation_history,
+    get_or_create_conversation,
+)
 from src.core.intent_lock import IntentLock
 from src.core.intent_router import IntentRouter
 from src.core.postprocess import Postprocessor
+from src.core.prompt_builder import PromptBuilder
+from src.core.schemas import AutomationsConfig
+from src.integrations.google_calendar import GoogleCalendarAdapter
+from src.integrations.telegram_notify import get_notifier
 
 logger = logging.getLogger(__name__)
 
-
-@dataclass
+# Subset of OutgoingMessage.metadata mirrored into PipelineContext.debug.
+_DEBUG_KEYS = ("prompt_sent", "documents_used", "latency_ms", "raw_response")
+
+_BUSY_SLOT_TEXT = (
+    "К сожалению, выбранный слот занят. "
+    "Предложите другой зал или другое время, и я сразу проверю доступность."
+)
+
+# Booking-field extraction patterns, compiled once at import.
+_PHONE_RE = re.compile(r"\+?\d[\d\s\-\(\)]{7,}")
+_NAME_RE = re.compile(r"(?:имя\s*[:\-]?\s*|меня\s+зовут\s+)([A-Za-zА-Яа-яЁё\-]{2,})", re.IGNORECASE)
+_DATE_RE = re.compile(r"\b(\d{1,2})[./](\d{1,2})(?:[./](\d{4}))?\b")
+_TIME_RE = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+_DUR_DIGIT_RE = re.compile(r"(?:на\s*)?(\d{1,2})\s*час")
+_PART_RE = re.compile(r"(\d{1,2})\s*(чел|человек|участ)")
+
+# Durations written with words: "два часа", "пять часов".
+_WORD_TO_NUM = {
+    "один": 1, "одна": 1,
+    "два": 2, "две": 2,
+    "три": 3,
+    "четыре": 4,
+    "пять": 5,
+    "шесть": 6,
+    "семь": 7,
+    "восемь": 8,
+    "девять": 9,
+    "десять": 10,
+    "одиннадцать": 11,
+    "двенадцать": 12,
+}
+_DUR_WORD_RE = re.compile(rf"\b({'|'.join(_WORD_TO_NUM)})\b\s*час")
+
+# Keyword sets matched against the lowercased message.
+_RESTART_MARKERS = (
+    "хочу записаться",
+    "хочу брон",
+    "заброниров",
+    "новая брон",
+    "еще брон",
+    "другой слот",
+    "другая дата",
+    "привет",
+    "здравствуйте",
+)
+_PHOTO_MARKERS = ("фото зал", "фотографии зал", "есть фото", "покажите фото", "посмотреть фото")
+_CALENDAR_DATE_KEYWORDS = (
+    "завтра", "сегодня", "суббот", "воскресен", "понедельник",
+    "вторник", "среду", "четверг", "пятниц", "числ",
+)
+_CALENDAR_TIME_KEYWORDS = ("час", "утр", "вечер", "дн", "ночь", "00", ":")
+_AVAILABILITY_MARKERS = (
+    "какое время",
+    "какие свобод",
+    "что свобод",
+    "свободные",
+    "во сколько",
+    "весь день",
+    "предложите",
+    "вы предложите",
+)
+# Greeting words that "меня зовут ..." parsing must not take for a name.
+_NAME_STOPWORDS = frozenset({"здравствуйте", "привет", "добрый", "день", "вечер"})
+
+# Flow stage by number of collected required booking fields (0..6).
+_REQUIRED_BOOKING_FIELDS = ("date", "time", "duration", "room", "name", "phone")
+_STAGE_BY_COLLECTED = ("qualify", "offer", "offer", "close", "close", "close", "finalize")
+
+# Room / relative-day / weekday tokens, matched as substrings in one pass.
+_KEYWORD_BUCKET = {
+    "агат": ("room", "Агат"),
+    "карелия": ("room", "Карелия"),
+    "уют": ("room", "Уют"),
+    "грань": ("room", "Грань"),
+    "лофт": ("room", "Лофт"),
+    "сегодня": ("rel", 0),
+    "завтра": ("rel", 1),
+    "послезавтра": ("rel", 2),
+    "понедельник": ("wd", 0),
+    "вторник": ("wd", 1),
+    "сред": ("wd", 2),
+    "четверг": ("wd", 3),
+    "пятниц": ("wd", 4),
+    "суббот": ("wd", 5),
+    "воскресен": ("wd", 6),
+}
+# Longest first so "послезавтра" is not consumed as "завтра".
+_KEYWORDS_RE = re.compile("|".join(sorted(map(re.escape, _KEYWORD_BUCKET), key=len, reverse=True)))
+
+
+@dataclass(slots=True)
 class IncomingMessage:
     """Normalized incoming message (common format across all channels)."""
 
@@ -27,7 +130,7 @@ class IncomingMessage:
     metadata: dict = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class OutgoingMessage:
     """Agent response ready to be sent through a channel adapter."""
 
@@ -37,7 +140,7 @@ class OutgoingMessage:
     metadata: dict = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class PipelineContext:
     """Pipeline context that gets enriched at each step."""
 
@@ -47,6 +150,8 @@ class PipelineContext:
     dialogue_policy: object
 
     history: list[dict] = field(default_factory=list)
+    # Fingerprint of `knowledge`, used as prompt-prefix cache key.
+    knowledge_hash: str = ""
     detected_intent: str | None = None
     intent_confidence: float = 0.0
     calendar_context: str = ""
@@ -55,10 +160,19 @@ class PipelineContext:
     outgoing: OutgoingMessage | None = None
     actions_to_run: list[str] = field(default_factory=list)
     booking_data: dict | None = None
+    # Booking results keyed by requested slot, shared by all booking paths in one turn.
+    booking_attempts: dict = field(default_factory=dict)
+    # Name of the next step to run; steps before it are skipped (set by fast paths).
+    skip_to: str | None = None
     error: str | None = None
     
     # Debug fields
     debug: dict = field(default_factory=dict)
+    # Lowercased incoming text, computed once for all keyword/regex checks.
+    text_lower: str = field(init=False, default="", repr=False)
+
+    def __post_init__(self) -> None:
+        self.text_lower = (self.incoming.text or "").lower()
 
 
 class MessagePipeline:
@@ -68,11 +182,12 @@ class MessagePipeline:
     Steps:
     1. enrich       - load history/state
     2. detect       - detect intent
-    3. pre_action   - actions before LLM (e.g., calendar lookup)
-    4. think        - request to LLM
-    5. validate     - contract validation
-    6. postprocess  - normalize output
-    7. post_action  - actions after LLM (booking/logging/etc.)
+    3. fastpath     - template replies that need no calendar/LLM (skip to validate)
+    4. pre_action   - actions before LLM (e.g., calendar lookup)
+    5. think        - request to LLM
+    6. validate     - contract validation
+    7. postprocess  - normalize output
+    8. post_action  - actions after LLM (booking/logging/etc.)
     """
 
     def __init__(self, brain, db_session=None):
@@ -95,6 +210,7 @@ class MessagePipeline:
         steps = [
             ("enrich", self._enrich),
             ("detect", self._detect_intent),
+            ("fastpath", self._fastpath),
             ("pre_action", self._pre_action),
             ("think", self._think),
             ("validate", self._validate),
@@ -103,6 +219,10 @@ class MessagePipeline:
         ]
 
         for step_name, step_fn in steps:
+            if ctx.skip_to:
+                if step_name != ctx.skip_to:
+                    continue
+                ctx.skip_to = None
             try:
                 ctx = await step_fn(ctx)
                 if ctx.error:
@@ -117,13 +237,12 @@ class MessagePipeline:
 
     async def _enrich(self, ctx: PipelineContext) -> PipelineContext:
         """Load conversation history and state from DB."""
+        if not ctx.knowledge_hash:
+            ctx.knowledge_hash = PromptBuilder.knowledge_hash(ctx.knowledge)
+
         if not self.db:
             return ctx
 
-        from uuid import UUID
-
-        from src.core.crud import get_conversation_history, get_or_create_conversation
-
         agent_id = ctx.incoming.metadata.get("agent_id")
         if not agent_id:
             return ctx
@@ -157,7 +276,7 @@ class MessagePipeline:
 
         # If previous booking was finalized and user starts a new booking cycle,
         # reset flow so stale booking_event_id/automation flags don't block new bookings.
-        if self._should_reset_finalized_flow(state, ctx.incoming.text or ""):
+        if self._should_reset_finalized_flow(state, ctx.text_lower):
             state["flow"] = {
                 "stage": "qualify",
                 "booking_data": {},
@@ -186,30 +305,60 @@ class MessagePipeline:
         return ctx
 
     @staticmethod
-    def _should_reset_finalized_flow(state: dict, text: str) -> bool:
-        """Detect explicit start of a new booking after previous finalize."""
+    def _should_reset_finalized_flow(state: dict, text_lower: str) -> bool:
+        """
+        Detect explicit start of a new booking after previous finalize.
+
+        Expects `text_lower` to be already lowercased.
+        """
         try:
             flow = (state or {}).get("flow") or {}
             finalized = bool(flow.get("booking_finalized")) or str(flow.get("stage", "")).lower() == "finalize"
             if not finalized:
                 return False
 
-            low = (text or "").lower()
-            restart_markers = [
-                "хочу записаться",
-                "хочу брон",
-                "заброниров",
-                "новая брон",
-                "еще брон",
-                "другой слот",
-                "другая дата",
-                "привет",
-                "здравствуйте",
-            ]
-            return any(m in low for m in restart_markers)
+            low = text_lower or ""
+            return any(m in low for m in _RESTART_MARKERS)
         except Exception:
             return False
 
+    async def _fastpath(self, ctx: PipelineContext) -> PipelineContext:
+        """Answer config-independent template requests without calendar or LLM.
+
+        Runs after detect, so the intent lock is applied as usual; a configured
+        greeting still wins and is answered by _think.
+        """
+        if self._greeting_text(ctx):
+            return ctx
+        if any(m in ctx.text_lower for m in _PHOTO_MARKERS):
+            photo_reply = (
+                "Да, конечно! Фото залов:\n"
+                "- Агат (22м²): https://j-one.studio/agat\n"
+                "- Карелия (29м²): https://j-one.studio/karelia\n"
+                "- Уют (29м²): https://j-one.studio/cozy\n"
+                "- Грань (34м²): https://j-one.studio/edge\n"
+                "- Лофт (45м²): https://j-one.studio/loft\n\n"
+                "Подскажите формат съёмки и количество участников — помогу выбрать зал."
+            )
+            ctx.ai_response = photo_reply
+            ctx.raw_response = photo_reply
+            ctx.outgoing = OutgoingMessage(
+                text=photo_reply,
+                conversation_id=ctx.incoming.metadata.get("conversation_id", ""),
+                channel_conversation_id=ctx.incoming.channel_conversation_id,
+                metadata=self._response_metadata(
+                    ctx,
+                    model="photo_rooms_template",
+                    usage={},
+                    latency_ms=0,
+                    documents_used=["rooms", "faq"],
+                    prompt_sent="",
+                    raw_response=photo_reply,
+                ),
+            )
+            ctx.skip_to = "validate"
+        return ctx
+
     async def _detect_intent(self, ctx: PipelineContext) -> PipelineContext:
         """Detect intent using IntentRouter + IntentLock."""
         if not self._router or not self._intent_lock:
@@ -236,19 +385,12 @@ class MessagePipeline:
     async def _pre_action(self, ctx: PipelineContext) -> PipelineContext:
         """Run actions before LLM: check calendar availability if date/time mentioned."""
         # Check if message mentions date/time patterns
-        text_lower = ctx.incoming.text.lower()
-        date_keywords = ["завтра", "сегодня", "суббот", "воскресен", "понедельник", 
-                        "вторник", "среду", "четверг", "пятниц", "числ"]
-        time_keywords = ["час", "утр", "вечер", "дн", "ночь", "00", ":"]
-        
-        has_date = any(kw in text_lower for kw in date_keywords)
-        has_time = any(kw in text_lower for kw in time_keywords)
+        text_lower = ctx.text_lower
+        has_date = any(kw in text_lower for kw in _CALENDAR_DATE_KEYWORDS)
+        has_time = any(kw in text_lower for kw in _CALENDAR_TIME_KEYWORDS)
         
         if has_date or has_time:
             try:
-                from pathlib import Path
-                from src.integrations.google_calendar import GoogleCalendarAdapter
-                
                 # Load calendar config from secrets (graceful degradation)
                 secrets_dir = Path("/app/secrets/j-one-studio")
                 calendar_id_file = secrets_dir / "google_calendar_id"
@@ -281,71 +423,28 @@ class MessagePipeline:
     async def _think(self, ctx: PipelineContext) -> PipelineContext:
         """Call the AI Brain."""
         # Fast path: deterministic greeting from config.
-        if (
-            (ctx.detected_intent or "").upper() == "GREETING"
-            and getattr(ctx.agent_config.style, "greeting", "").strip()
-        ):
-            greeting_text = ctx.agent_config.style.greeting.strip()
+        greeting_text = self._greeting_text(ctx)
+        if greeting_text:
             ctx.ai_response = greeting_text
             ctx.raw_response = greeting_text
-            ctx.debug = {
-                "prompt_sent": "",
-                "documents_used": [],
-                "latency_ms": 0,
-                "raw_response": greeting_text,
-            }
-            ctx.outgoing = OutgoingMessage(
-                text=greeting_text,
-                conversation_id=ctx.incoming.metadata.get("conversation_id", ""),
-                channel_conversation_id=ctx.incoming.channel_conversation_id,
-                metadata={
-                    "intent": ctx.detected_intent,
-                    "intent_confidence": ctx.intent_confidence,
-                    "model": "greeting_template",
-                    "usage": {},
-                    "latency_ms": 0,
-                    "documents_used": [],
-                    "prompt_sent": "",
-                    "raw_response": greeting_text,
-                    "config_version": ctx.incoming.metadata.get("config_version", ""),
-                },
-            )
-            return ctx
-
-        # Fast path: deterministic answer for photo-of-rooms requests.
-        text_lower = (ctx.incoming.text or "").lower()
-        photo_markers = ["фото зал", "фотографии зал", "есть фото", "покажите фото", "посмотреть фото"]
-        if any(m in text_lower for m in photo_markers):
-            photo_reply = (
-                "Да, конечно! Фото залов:\n"
-                "- Агат (22м²): https://j-one.studio/agat\n"
-                "- Карелия (29м²): https://j-one.studio/karelia\n"
-                "- Уют (29м²): https://j-one.studio/cozy\n"
-                "- Грань (34м²): https://j-one.studio/edge\n"
-                "- Лофт (45м²): https://j-one.studio/loft\n\n"
-                "Подскажите формат съёмки и количество участников — помогу выбрать зал."
+            meta = self._response_metadata(
+                ctx,
+                model="greeting_template",
+                usage={},
+                latency_ms=0,
+                documents_used=[],
+                prompt_sent="",
+                raw_response=greeting_text,
             )
-            ctx.ai_response = photo_reply
-            ctx.raw_response = photo_reply
+            ctx.debug = {k: meta[k] for k in _DEBUG_KEYS}
             ctx.outgoing = OutgoingMessage(
-                text=photo_reply,
+                text=greeting_text,
                 conversation_id=ctx.incoming.metadata.get("conversation_id", ""),
                 channel_conversation_id=ctx.incoming.channel_conversation_id,
-                metadata={
-                    "intent": ctx.detected_intent,
-                    "intent_confidence": ctx.intent_confidence,
-                    "model": "photo_rooms_template",
-                    "usage": {},
-                    "latency_ms": 0,
-                    "documents_used": ["rooms", "faq"],
-                    "prompt_sent": "",
-                    "raw_response": photo_reply,
-                },
+                metadata=meta,
             )
             return ctx
 
-        from src.core.prompt_builder import PromptBuilder
-
         # Get conversation flow state for prompt
         conv_state = ctx.incoming.metadata.get("conversation_state", {})
         flow_state = conv_state.get("flow", {})
@@ -356,25 +455,25 @@ class MessagePipeline:
             extra_context=ctx.calendar_context,
             flow_stage=flow_state.get("stage"),
             booking_data=flow_state.get("booking_data"),
+            config_version=ctx.incoming.metadata.get("config_version", ""),
+            knowledge_hash=ctx.knowledge_hash,
         )
 
-        messages = ctx.history + [{"role": "user", "content": ctx.incoming.text}]
-
+        # Bounded window: appending the user turn evicts the oldest entry in O(1),
+        # no intermediate concatenated/sliced list copies.
         max_hist = ctx.agent_config.llm.max_history
-        if len(messages) > max_hist:
-            messages = messages[-max_hist:]
+        messages: deque[dict] = deque(ctx.history, maxlen=max_hist or None)
+        messages.append({"role": "user", "content": ctx.incoming.text})
 
         # Track latency
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         documents_used = list(ctx.knowledge.keys()) if ctx.knowledge else []
 
         try:
             response = await self.brain.think(system_prompt, messages)
-            latency_ms = int((time.time() - start_time) * 1000)
+            latency_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
 
             # Parse action tags from AI response.
-            from src.core.action_parser import parse_action_tags
-
             parsed = parse_action_tags(response.content)
 
             ctx.ai_response = parsed.clean_text
@@ -382,34 +481,28 @@ class MessagePipeline:
             ctx.actions_to_run = parsed.actions
             ctx.booking_data = parsed.booking_data
 
+            meta = self._response_metadata(
+                ctx,
+                model=response.model,
+                usage=response.usage,
+                latency_ms=latency_ms,
+                documents_used=documents_used,
+                prompt_sent=system_prompt,
+                raw_response=response.content,
+            )
             # Store debug information
-            ctx.debug = {
-                "prompt_sent": system_prompt,
-                "documents_used": documents_used,
-                "latency_ms": latency_ms,
-                "raw_response": response.content,
-            }
+            ctx.debug = {k: meta[k] for k in _DEBUG_KEYS}
 
             ctx.outgoing = OutgoingMessage(
                 text=parsed.clean_text,
                 conversation_id=ctx.incoming.metadata.get("conversation_id", ""),
                 channel_conversation_id=ctx.incoming.channel_conversation_id,
-                metadata={
-                    "intent": ctx.detected_intent,
-                    "intent_confidence": ctx.intent_confidence,
-                    "model": response.model,
-                    "usage": response.usage,
-                    "latency_ms": latency_ms,
-                    "documents_used": documents_used,
-                    "prompt_sent": system_prompt,
-                    "raw_response": response.content,
-                    "config_version": ctx.incoming.metadata.get("config_version", ""),
-                },
+                metadata=meta,
             )
             return ctx
         except Exception as e:
             # Graceful degradation: keep chat responsive even if LLM is unavailable/rate-limited.
-            latency_ms = int((time.time() - start_time) * 1000)
+            latency_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             fallback_text = await self._build_llm_fallback(ctx)
             logger.exception("LLM think failed; using deterministic fallback")
 
@@ -421,21 +514,54 @@ class MessagePipeline:
                 text=fallback_text,
                 conversation_id=ctx.incoming.metadata.get("conversation_id", ""),
                 channel_conversation_id=ctx.incoming.channel_conversation_id,
-                metadata={
-                    "intent": ctx.detected_intent,
-                    "intent_confidence": ctx.intent_confidence,
-                    "model": "fallback_rule_engine",
-                    "usage": {},
-                    "latency_ms": latency_ms,
-                    "documents_used": documents_used,
-                    "prompt_sent": system_prompt,
-                    "raw_response": fallback_text,
-                    "llm_error": str(e),
-                    "config_version": ctx.incoming.metadata.get("config_version", ""),
-                },
+                metadata=self._response_metadata(
+                    ctx,
+                    model="fallback_rule_engine",
+                    usage={},
+                    latency_ms=latency_ms,
+                    documents_used=documents_used,
+                    prompt_sent=system_prompt,
+                    raw_response=fallback_text,
+                    llm_error=str(e),
+                ),
             )
             return ctx
 
+    @staticmethod
+    def _greeting_text(ctx: PipelineContext) -> str:
+        """Configured greeting if this turn is a GREETING, else ''."""
+        if (ctx.detected_intent or "").upper() != "GREETING":
+            return ""
+        return getattr(ctx.agent_config.style, "greeting", "").strip()
+
+    @staticmethod
+    def _response_metadata(
+        ctx: PipelineContext,
+        *,
+        model: str,
+        usage: dict,
+        latency_ms: int,
+        documents_used: list[str],
+        prompt_sent: str,
+        raw_response: str,
+        llm_error: str | None = None,
+    ) -> dict:
+        """Build OutgoingMessage.metadata for a _think result in one allocation."""
+        meta = {
+            "intent": ctx.detected_intent,
+            "intent_confidence": ctx.intent_confidence,
+            "model": model,
+            "usage": usage,
+            "latency_ms": latency_ms,
+            "documents_used": documents_used,
+            "prompt_sent": prompt_sent,
+            "raw_response": raw_response,
+            "config_version": ctx.incoming.metadata.get("config_version", ""),
+        }
+        if llm_error is not None:
+            meta["llm_error"] = llm_error
+        return meta
+
     async def _build_llm_fallback(self, ctx: PipelineContext) -> str:
         """Fallback reply when LLM call fails (quota/rate-limit/network)."""
         conv_state = ctx.incoming.metadata.get("conversation_state", {}) or {}
@@ -446,18 +572,8 @@ class MessagePipeline:
             return "Бронь уже зафиксирована. Передам менеджеру, он пришлёт детали и предоплату."
 
         if flow_state.get("booking_status") in {"busy", "busy_escalated"}:
-            text_lower = (ctx.incoming.text or "").lower()
-            availability_markers = [
-                "какое время",
-                "какие свобод",
-                "что свобод",
-                "свободные",
-                "во сколько",
-                "весь день",
-                "предложите",
-                "вы предложите",
-            ]
-            if any(m in text_lower for m in availability_markers):
+            text_lower = ctx.text_lower
+            if any(m in text_lower for m in _AVAILABILITY_MARKERS):
                 slots = await self._suggest_available_slots(flow_state)
                 if slots:
                     date_str = str(booking_data.get("date") or "указанную дату")
@@ -473,13 +589,7 @@ class MessagePipeline:
                         "если хотите, могу также предложить варианты по другим залам на эту дату."
                     )
 
-            busy_rooms = flow_state.get("last_conflicting_rooms") or []
-            rooms_hint = f" Сейчас заняты: {', '.join(busy_rooms)}." if busy_rooms else ""
-            return (
-                "К сожалению, выбранный слот занят. "
-                "Предложите другой зал или другое время, и я сразу проверю доступность."
-                f"{rooms_hint}"
-            ).strip()
+            return _busy_slot_text(flow_state.get("last_conflicting_rooms") or [])
 
         required_labels = {
             "date": "дата",
@@ -500,11 +610,6 @@ class MessagePipeline:
     async def _suggest_available_slots(self, flow_state: dict) -> list[str]:
         """Find free same-day slots for the selected room when requested slot is busy."""
         try:
-            from datetime import datetime
-            from pathlib import Path
-
-            from src.integrations.google_calendar import GoogleCalendarAdapter
-
             booking_data = (flow_state or {}).get("booking_data", {}) or {}
             date_str = str(booking_data.get("date") or "").strip()
             room = str(booking_data.get("room") or "").strip()
@@ -536,13 +641,15 @@ class MessagePipeline:
             close_hour = 23
             max_start = max(open_hour, close_hour - duration_hours)
 
+            day_start = _parse_booking_dt(date_str, "00:00")
+
             slots: list[str] = []
             for hh in range(open_hour, max_start + 1):
                 candidate_time = f"{hh:02d}:00"
                 if requested_time and candidate_time == requested_time:
                     continue
 
-                start = datetime.strptime(f"{date_str} {candidate_time}", "%d.%m.%Y %H:%M")
+                start = day_start.replace(hour=hh)
                 availability = await adapter.check_availability(
                     {
                         "start": start,
@@ -608,8 +715,7 @@ class MessagePipeline:
 
     async def _post_action(self, ctx: PipelineContext) -> PipelineContext:
         """Run actions after LLM: booking, escalation, state updates."""
-        conv_state = ctx.incoming.metadata.get("conversation_state", {})
-        flow_state = conv_state.get("flow", {})
+        flow_state = self._flow_state(ctx)
         booking_finalized_now = False
 
         # Runtime trace for debugging rule decisions in production.
@@ -620,32 +726,23 @@ class MessagePipeline:
         # This prevents missing fields when intent confidence fluctuates.
         self._update_flow_stage(ctx, flow_state)
 
+        # Create booking at most once per turn: on the LLM's [BOOKING:...] tag here, or
+        # via the fallback below when all fields are present but the tag was forgotten.
+        # The tag result is applied before the second _update_flow_stage, so a busy
+        # slot drops the stage back to "offer".
+        booking_requested = False
         for action_name in ctx.actions_to_run:
             if action_name == "CREATE_BOOKING":
+                if booking_requested:
+                    continue
+                booking_requested = True
                 booking_result = await self._handle_create_booking(ctx)
-                if booking_result.get("success") and booking_result.get("event_id"):
-                    event_id = booking_result.get("event_id")
-                    if ctx.outgoing:
-                        ctx.outgoing.metadata["booking_event_id"] = event_id
-                    flow_state["booking_event_id"] = event_id
-                    flow_state["booking_status"] = "created"
-                    flow_state["last_booking_attempt_fingerprint"] = self._booking_fingerprint(flow_state.get("booking_data", {}) or {})
-                    flow_state["stage"] = "finalize"
-                    booking_finalized_now = True
-                elif booking_result.get("reason") == "slot_busy":
-                    flow_state["booking_status"] = "busy"
-                    flow_state["last_conflicting_rooms"] = booking_result.get("conflicting_rooms") or []
-                    flow_state["last_booking_attempt_fingerprint"] = self._booking_fingerprint(flow_state.get("booking_data", {}) or {})
-                    if ctx.outgoing:
-                        busy_rooms = booking_result.get("conflicting_rooms") or []
-                        rooms_hint = f" Сейчас заняты: {', '.join(busy_rooms)}." if busy_rooms else ""
-                        ctx.outgoing.text = (
-                            "К сожалению, выбранный слот занят. "
-                            "Предложите другой зал или другое время, и я сразу проверю доступность."
-                            f"{rooms_hint}"
-                        ).strip()
-                else:
-                    flow_state.setdefault("booking_status", "pending_manager")
+                booking_finalized_now = self._apply_booking_result(
+                    ctx,
+                    flow_state,
+                    booking_result,
+                    self._booking_fingerprint(flow_state.get("booking_data", {}) or {}),
+                )
             elif action_name == "RESET":
                 logger.info("Resetting conversation state")
                 ctx.incoming.metadata["conversation_state"] = {}
@@ -665,8 +762,7 @@ class MessagePipeline:
         # (name/phone) into state and keeps stage consistent.
         self._update_flow_stage(ctx, flow_state)
 
-        # Fallback booking creation when all required fields are already present
-        # but LLM forgot to emit [BOOKING:...].
+        # Fallback booking when all required fields are present but the LLM forgot the tag.
         booking_data = (flow_state or {}).get("booking_data", {})
         required = ["date", "time", "duration", "room", "name", "phone"]
         has_all_booking_fields = all(booking_data.get(k) for k in required)
@@ -674,35 +770,16 @@ class MessagePipeline:
         last_attempt_fingerprint = str(flow_state.get("last_booking_attempt_fingerprint") or "")
         should_run_fallback_booking = (
             has_all_booking_fields
-            and "CREATE_BOOKING" not in (ctx.actions_to_run or [])
+            and not booking_requested
             and (not last_attempt_fingerprint or last_attempt_fingerprint != booking_fingerprint)
         )
 
         if should_run_fallback_booking:
             ctx.booking_data = booking_data
             booking_result = await self._handle_create_booking(ctx)
-            if booking_result.get("success") and booking_result.get("event_id"):
-                event_id = booking_result.get("event_id")
-                if ctx.outgoing:
-                    ctx.outgoing.metadata["booking_event_id"] = event_id
-                flow_state["booking_event_id"] = event_id
-                flow_state["booking_status"] = "created"
-                flow_state["last_booking_attempt_fingerprint"] = booking_fingerprint
-                booking_finalized_now = True
-            elif booking_result.get("reason") == "slot_busy":
-                flow_state["booking_status"] = "busy"
-                flow_state["last_conflicting_rooms"] = booking_result.get("conflicting_rooms") or []
-                flow_state["last_booking_attempt_fingerprint"] = booking_fingerprint
-                if ctx.outgoing:
-                    busy_rooms = booking_result.get("conflicting_rooms") or []
-                    rooms_hint = f" Сейчас заняты: {', '.join(busy_rooms)}." if busy_rooms else ""
-                    ctx.outgoing.text = (
-                        "К сожалению, выбранный слот занят. "
-                        "Предложите другой зал или другое время, и я сразу проверю доступность."
-                        f"{rooms_hint}"
-                    ).strip()
-            else:
-                flow_state.setdefault("booking_status", "pending_manager")
+            booking_finalized_now = self._apply_booking_result(
+                ctx, flow_state, booking_result, booking_fingerprint
+            )
 
         # If booking was finalized in this turn, keep an explicit durable marker.
         if booking_finalized_now:
@@ -724,18 +801,48 @@ class MessagePipeline:
         # Configurable automations from agent.config.automations
         await self._run_config_automations(ctx, flow_state)
 
-        if self.db and ctx.incoming.metadata.get("conversation_id"):
-            await self._save_conversation_state(ctx)
-
+        # conv.state is persisted by the caller (webhooks, poller, test-chat) in its own
+        # transaction, from ctx.incoming.metadata["conversation_state"].
         return ctx
 
+    @staticmethod
+    def _flow_state(ctx: PipelineContext) -> dict:
+        """Return the mutable flow-state dict attached to the conversation state."""
+        conv_state = ctx.incoming.metadata.setdefault("conversation_state", {})
+        return conv_state.setdefault("flow", {"stage": "qualify", "booking_data": {}})
+
+    @staticmethod
+    def _apply_booking_result(
+        ctx: PipelineContext,
+        flow_state: dict,
+        booking_result: dict,
+        booking_fingerprint: str,
+    ) -> bool:
+        """Merge booking outcome into flow state. Returns True if booking was created."""
+        if booking_result.get("success") and booking_result.get("event_id"):
+            event_id = booking_result.get("event_id")
+            if ctx.outgoing:
+                ctx.outgoing.metadata["booking_event_id"] = event_id
+            flow_state["booking_event_id"] = event_id
+            flow_state["booking_status"] = "created"
+            flow_state["last_booking_attempt_fingerprint"] = booking_fingerprint
+            return True
+
+        if booking_result.get("reason") == "slot_busy":
+            busy_rooms = booking_result.get("conflicting_rooms") or []
+            flow_state["booking_status"] = "busy"
+            flow_state["last_conflicting_rooms"] = busy_rooms
+            flow_state["last_booking_attempt_fingerprint"] = booking_fingerprint
+            if ctx.outgoing:
+                ctx.outgoing.text = _busy_slot_text(busy_rooms)
+            return False
+
+        flow_state.setdefault("booking_status", "pending_manager")
+        return False
+
     async def _handle_create_booking(self, ctx: PipelineContext) -> dict:
         """Create booking in Google Calendar."""
         try:
-            from pathlib import Path
-            from datetime import datetime, timedelta
-            from src.integrations.google_calendar import GoogleCalendarAdapter
-
             secrets_dir = Path("/app/secrets/j-one-studio")
             calendar_id_file = secrets_dir / "google_calendar_id"
             sa_path_file = secrets_dir / "google_sa_path"
@@ -758,7 +865,7 @@ class MessagePipeline:
                 }
             )
 
-            flow_state = ctx.incoming.metadata.get("conversation_state", {}).get("flow", {})
+            flow_state = self._flow_state(ctx)
             flow_booking = flow_state.get("booking_data", {}) or {}
             existing_event_id = flow_state.get("booking_event_id")
 
@@ -788,35 +895,19 @@ class MessagePipeline:
 
             # Fallback parse from the current message if some booking fields were not captured.
             text_now = ctx.incoming.text or ""
-            import re
             if not booking_info.get("duration"):
-                text_now_lower = text_now.lower()
-                dmatch = re.search(r"(?:на\s*)?(\d{1,2})\s*час", text_now_lower)
+                text_now_lower = ctx.text_lower
+                dmatch = _DUR_DIGIT_RE.search(text_now_lower)
                 if dmatch:
                     duration_hours = int(dmatch.group(1))
                     booking_info["duration"] = duration_hours
                 else:
-                    word_to_num = {
-                        "один": 1, "одна": 1,
-                        "два": 2, "две": 2,
-                        "три": 3,
-                        "четыре": 4,
-                        "пять": 5,
-                        "шесть": 6,
-                        "семь": 7,
-                        "восемь": 8,
-                        "девять": 9,
-                        "десять": 10,
-                        "одиннадцать": 11,
-                        "двенадцать": 12,
-                    }
-                    for word, num in word_to_num.items():
-                        if re.search(rf"\b{word}\b\s*час", text_now_lower):
-                            duration_hours = num
-                            booking_info["duration"] = duration_hours
-                            break
+                    wmatch = _DUR_WORD_RE.search(text_now_lower)
+                    if wmatch:
+                        duration_hours = _WORD_TO_NUM[wmatch.group(1)]
+                        booking_info["duration"] = duration_hours
             if not booking_info.get("phone"):
-                pmatch = re.search(r"\+?\d[\d\s\-\(\)]{7,}", text_now)
+                pmatch = _PHONE_RE.search(text_now)
                 if pmatch:
                     booking_info["phone"] = pmatch.group().strip()
                     phone = booking_info["phone"]
@@ -828,37 +919,43 @@ class MessagePipeline:
                 logger.warning("Booking missing date/time: %s", booking_info)
                 return {"success": False, "reason": "booking_datetime_missing"}
 
-            start = datetime.strptime(f"{date_str} {time_str}", "%d.%m.%Y %H:%M")
+            start = _parse_booking_dt(date_str, time_str)
             end = start + timedelta(hours=duration_hours)
 
-            availability = await adapter.check_availability(
-                {
-                    "start": start,
-                    "duration_hours": duration_hours,
-                    "room": room,
-                }
-            )
-            if availability.get("success") and availability.get("available") is False:
-                logger.info("Requested slot busy, skipping calendar create: %s", booking_info)
-                return {
-                    "success": False,
-                    "reason": "slot_busy",
-                    "conflicting_rooms": availability.get("conflicting_rooms", []),
-                }
+            # Request-scoped cache: legacy/fallback/automation paths may try the same
+            # slot several times within one turn.
+            slot_key = (date_str, time_str, duration_hours, room.lower())
+            cached = ctx.booking_attempts.get(slot_key)
+            if cached is not None:
+                return cached
 
             result = await adapter.create_booking(
                 {
                     "start": start,
                     "end": end,
+                    "room": room,
+                    "check_conflict": True,
                     "summary": f"Бронь J-One: {client_name} / {room}",
                     "description": f"Клиент: {client_name}; Телефон: {phone}; Канал: {ctx.incoming.channel_type}",
                 }
             )
 
+            if result.get("reason") == "slot_busy":
+                logger.info("Requested slot busy, skipping calendar create: %s", booking_info)
+                outcome = {
+                    "success": False,
+                    "reason": "slot_busy",
+                    "conflicting_rooms": result.get("conflicting_rooms", []),
+                }
+                ctx.booking_attempts[slot_key] = outcome
+                return outcome
+
             if result.get("success"):
                 event_id = result.get("event_id")
                 logger.info("Booking created in Google Calendar: %s", event_id)
-                return {"success": True, "event_id": event_id}
+                outcome = {"success": True, "event_id": event_id}
+                ctx.booking_attempts[slot_key] = outcome
+                return outcome
             else:
                 logger.error("Calendar booking failed: %s", result.get("error"))
                 return {"success": False, "reason": "calendar_create_failed", "error": result.get("error")}
@@ -870,10 +967,8 @@ class MessagePipeline:
     async def _handle_escalation(self, ctx: PipelineContext) -> dict:
         """Send escalation notification to manager via Telegram."""
         try:
-            from src.integrations.telegram_notify import TelegramNotifier
-
             tenant_slug = str(ctx.incoming.metadata.get("tenant_slug") or "j-one-studio")
-            notifier = TelegramNotifier.from_secrets(tenant_slug=tenant_slug)
+            notifier = get_notifier(tenant_slug)
             if not notifier:
                 logger.warning("Telegram notifier not configured, skipping escalation (tenant=%s)", tenant_slug)
                 return {"success": False, "reason": "notifier_not_configured"}
@@ -913,129 +1008,76 @@ class MessagePipeline:
             booking_data.update({k: v for k, v in ctx.booking_data.items() if v})
 
         text = ctx.incoming.text or ""
-        text_lower = text.lower()
+        text_lower = ctx.text_lower
 
-        import re
-
-        phone_match = re.search(r"\+?\d[\d\s\-\(\)]{7,}", text)
+        phone_match = _PHONE_RE.search(text)
         if phone_match:
             booking_data["phone"] = phone_match.group().strip()
 
         # Name parsing from user text ("имя Иван", "меня зовут Иван").
-        name_match = re.search(r"(?:имя\s*[:\-]?\s*|меня\s+зовут\s+)([A-Za-zА-Яа-яЁё\-]{2,})", text, flags=re.IGNORECASE)
+        name_match = _NAME_RE.search(text)
         if name_match:
             candidate = name_match.group(1).strip().title()
-            if candidate.lower() not in {"здравствуйте", "привет", "добрый", "день", "вечер"}:
+            if candidate.lower() not in _NAME_STOPWORDS:
                 booking_data["name"] = candidate
 
         if ctx.incoming.sender_name and not booking_data.get("name"):
             booking_data["name"] = ctx.incoming.sender_name
 
-        # Room extraction: if user mentions several rooms ("вместо Грань Лофт"),
-        # pick the last mentioned one as explicit correction target.
-        room_tokens = ["агат", "карелия", "уют", "грань", "лофт"]
-        room_hits: list[tuple[int, str]] = []
-        for room in room_tokens:
-            idx = text_lower.rfind(room)
-            if idx >= 0:
-                room_hits.append((idx, room))
-        if room_hits:
-            _pos, room = sorted(room_hits, key=lambda x: x[0])[-1]
-            booking_data["room"] = room.capitalize()
-
-        # Absolute date: DD.MM[.YYYY] (explicit user correction always overrides stale value)
-        date_match = re.search(r"\b(\d{1,2})[./](\d{1,2})(?:[./](\d{4}))?\b", text)
-        if date_match:
-            dd = int(date_match.group(1))
-            mm = int(date_match.group(2))
-            yyyy = int(date_match.group(3)) if date_match.group(3) else datetime.now().year
-            booking_data["date"] = f"{dd:02d}.{mm:02d}.{yyyy}"
-
-        # Relative date keywords (also override stale value when user explicitly re-specifies date).
-        low = text_lower
-        has_relative_date = any(token in low for token in [
-            "сегодня", "завтра", "послезавтра",
-            "понедельник", "вторник", "сред", "четверг", "пятниц", "суббот", "воскресен",
-        ])
-        if has_relative_date and not date_match:
-            now = datetime.now()
-            weekday_map = {
-                "понедельник": 0,
-                "вторник": 1,
-                "сред": 2,
-                "четверг": 3,
-                "пятниц": 4,
-                "суббот": 5,
-                "воскресен": 6,
-            }
-            resolved = None
-            if "сегодня" in low:
-                resolved = now
-            elif "завтра" in low:
-                from datetime import timedelta as _td
-                resolved = now + _td(days=1)
-            elif "послезавтра" in low:
-                from datetime import timedelta as _td
-                resolved = now + _td(days=2)
+        # One scan for rooms and relative dates. If user mentions several rooms
+        # ("вместо Грань Лофт"), the last mentioned one is the correction target;
+        # relative days win over weekdays, earliest day/weekday first.
+        room: str | None = None
+        rel_days: int | None = None
+        weekday: int | None = None
+        for kw_match in _KEYWORDS_RE.finditer(text_lower):
+            kind, value = _KEYWORD_BUCKET[kw_match.group()]
+            if kind == "room":
+                room = value
+            elif kind == "rel":
+                rel_days = value if rel_days is None else min(rel_days, value)
             else:
-                for token, target_wd in weekday_map.items():
-                    if token in low:
-                        from datetime import timedelta as _td
-                        delta = (target_wd - now.weekday()) % 7
-                        if delta == 0:
-                            delta = 7
-                        resolved = now + _td(days=delta)
-                        break
-
-            if resolved is not None:
-                booking_data["date"] = resolved.strftime("%d.%m.%Y")
-
-        time_match = re.search(r"\b([01]?\d|2[0-3]):([0-5]\d)\b", text)
+                weekday = value if weekday is None else min(weekday, value)
+        if room:
+            booking_data["room"] = room
+
+        date_match = _DATE_RE.search(text)
+        if date_match or rel_days is not None or weekday is not None:
+            # One clock read serves both the default year and relative-date math.
+            today = date.today()
+            if date_match:
+                # Absolute date: DD.MM[.YYYY]; an explicit user correction always overrides
+                # a stale value.
+                dd = int(date_match.group(1))
+                mm = int(date_match.group(2))
+                yyyy = int(date_match.group(3)) if date_match.group(3) else today.year
+                booking_data["date"] = f"{dd:02d}.{mm:02d}.{yyyy}"
+            else:
+                # Relative date keywords (also override stale value when user re-specifies date).
+                booking_data["date"] = _resolve_relative_date(today, rel_days, weekday)
+
+        time_match = _TIME_RE.search(text)
         if time_match:
             hh = int(time_match.group(1))
             mi = int(time_match.group(2))
             booking_data["time"] = f"{hh:02d}:{mi:02d}"
 
-        dur_match = re.search(r"(?:на\s*)?(\d{1,2})\s*час", text_lower)
+        dur_match = _DUR_DIGIT_RE.search(text_lower)
         if dur_match:
             booking_data["duration"] = int(dur_match.group(1))
 
         # Also support durations written with words: "два часа", "пять часов".
         if not dur_match:
-            word_to_num = {
-                "один": 1, "одна": 1,
-                "два": 2, "две": 2,
-                "три": 3,
-                "четыре": 4,
-                "пять": 5,
-                "шесть": 6,
-                "семь": 7,
-                "восемь": 8,
-                "девять": 9,
-                "десять": 10,
-                "одиннадцать": 11,
-                "двенадцать": 12,
-            }
-            for word, num in word_to_num.items():
-                if re.search(rf"\b{word}\b\s*час", text_lower):
-                    booking_data["duration"] = num
-                    break
+            word_match = _DUR_WORD_RE.search(text_lower)
+            if word_match:
+                booking_data["duration"] = _WORD_TO_NUM[word_match.group(1)]
 
-        part_match = re.search(r"(\d{1,2})\s*(чел|человек|участ)", text_lower)
+        part_match = _PART_RE.search(text_lower)
         if part_match:
             booking_data["participants"] = int(part_match.group(1))
 
-        required_fields = ["date", "time", "duration", "room", "name", "phone"]
-        collected_fields = sum(1 for field in required_fields if booking_data.get(field))
-
-        if collected_fields == 0:
-            flow_state["stage"] = "qualify"
-        elif collected_fields < 3:
-            flow_state["stage"] = "offer"
-        elif collected_fields < len(required_fields):
-            flow_state["stage"] = "close"
-        else:
-            flow_state["stage"] = "finalize"
+        collected_fields = sum(1 for field in _REQUIRED_BOOKING_FIELDS if booking_data.get(field))
+        flow_state["stage"] = _STAGE_BY_COLLECTED[collected_fields]
 
         # If previous attempt was busy, keep conversation in offer mode until slot changes.
         if flow_state.get("booking_status") == "busy":
@@ -1046,7 +1088,7 @@ class MessagePipeline:
             "Flow stage: %s, collected: %d/%d fields",
             flow_state["stage"],
             collected_fields,
-            len(required_fields),
+            len(_REQUIRED_BOOKING_FIELDS),
         )
 
     @staticmethod
@@ -1060,37 +1102,34 @@ class MessagePipeline:
 
     async def _run_config_automations(self, ctx: PipelineContext, flow_state: dict) -> None:
         """Run configurable automations from agent.config.automations."""
-        automations = getattr(ctx.agent_config, "automations", None)
-        if not automations or not getattr(automations, "enabled", False):
+        automations: AutomationsConfig | None = getattr(ctx.agent_config, "automations", None)
+        if not automations or not automations.enabled:
             return
 
-        rules = getattr(automations, "rules", []) or []
         auto_state = flow_state.setdefault("automations", {})
         trace = (ctx.outgoing.metadata.setdefault("automation_trace", []) if ctx.outgoing else None)
 
-        for rule in rules:
-            if not getattr(rule, "enabled", True):
+        for rule in automations.rules:
+            rule_id = rule.id
+            if not rule.enabled:
                 if trace is not None:
-                    trace.append({"rule_id": getattr(rule, "id", ""), "matched": False, "reason": "disabled"})
+                    trace.append({"rule_id": rule_id, "matched": False, "reason": "disabled"})
                 continue
 
-            rule_id = getattr(rule, "id", "") or ""
-            once_per_conversation = bool(getattr(rule, "once_per_conversation", True))
+            once_per_conversation = rule.once_per_conversation
             if once_per_conversation and auto_state.get(rule_id):
                 if trace is not None:
                     trace.append({"rule_id": rule_id, "matched": False, "reason": "already_executed"})
                 continue
 
-            when = getattr(rule, "when", {}) or {}
-            matched, reason = self._automation_matches(ctx, flow_state, when)
+            matched, reason = self._automation_matches(ctx, flow_state, rule.when)
             if not matched:
                 if trace is not None:
                     trace.append({"rule_id": rule_id, "matched": False, "reason": reason})
                 continue
 
-            actions = getattr(rule, "do", []) or []
             action_results = []
-            for action in actions:
+            for action in rule.do:
                 result = await self._run_automation_action(ctx, flow_state, action)
                 action_results.append({"action": action, "result": result})
 
@@ -1131,12 +1170,11 @@ class MessagePipeline:
 
         text_matches = when.get("text_matches")
         if text_matches:
-            import re
-            try:
-                if not re.search(str(text_matches), ctx.incoming.text or "", flags=re.IGNORECASE):
-                    return False, "text_no_match"
-            except re.error:
+            pattern = _compile_text_matches(str(text_matches))
+            if pattern is None:
                 return False, "invalid_regex"
+            if not pattern.search(ctx.incoming.text or ""):
+                return False, "text_no_match"
 
         return True, "matched"
 
@@ -1168,26 +1206,44 @@ class MessagePipeline:
         logger.warning("Unknown automation action: %s", action)
         return {"success": False, "reason": "unknown_action"}
 
-    async def _save_conversation_state(self, ctx: PipelineContext) -> None:
-        """Save updated conversation state to database."""
-        try:
-            from uuid import UUID
-            from src.core.crud import update_conversation_state
-            
-            conversation_id = ctx.incoming.metadata.get("conversation_id")
-            if not conversation_id:
-                return
-            
-            import json
-            conv_state = ctx.incoming.metadata.get("conversation_state", {})
-            # Force a detached plain-dict copy so SQLAlchemy JSON update is persisted.
-            conv_state = json.loads(json.dumps(conv_state, ensure_ascii=False))
-
-            await update_conversation_state(
-                self.db,
-                conversation_id=UUID(conversation_id),
-                state=conv_state,
-            )
-            
-        except Exception as e:
-            logger.error("Failed to save conversation state: %s", e)
+
+def _busy_slot_text(busy_rooms: list[str]) -> str:
+    """Reply used when the requested slot is taken, with a hint on busy rooms."""
+    if not busy_rooms:
+        return _BUSY_SLOT_TEXT
+    return f"{_BUSY_SLOT_TEXT} Сейчас заняты: {', '.join(busy_rooms)}."
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_text_matches(pattern: str) -> re.Pattern[str] | None:
+    """Compile an automation `text_matches` regex once; None if it is invalid."""
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error:
+        return None
+
+
+def _resolve_relative_date(today: date, rel_days: int | None, weekday: int | None) -> str:
+    """
+    Resolve a relative day offset or the next given weekday to "DD.MM.YYYY".
+
+    A weekday equal to today's means the same weekday next week.
+    """
+    if rel_days is not None:
+        delta = rel_days
+    else:
+        delta = (weekday - today.weekday()) % 7 or 7
+    resolved = today + timedelta(days=delta)
+    return f"{resolved.day:02d}.{resolved.month:02d}.{resolved.year}"
+
+
+def _parse_booking_dt(date_str: str, time_str: str) -> datetime:
+    """
+    Parse booking date "DD.MM.YYYY" and time "HH:MM" into a naive datetime.
+
+    Equivalent to strptime("%d.%m.%Y %H:%M") without format-string interpretation.
+    Raises ValueError on malformed input.
+    """
+    day, month, year = date_str.split(".")
+    hour, minute = time_str.split(":")
+    return datetime(int(year), int(month), int(day), int(hour), int(minute))
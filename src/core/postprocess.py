@@ -15,6 +15,28 @@ import re
 
 from src.core.schemas import AgentStyle, IntentContract
 
+_SENTENCE_END_RE = re.compile(r"[.!?]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n")
+
+# Bold/underline/code markers, line-leading headers and [text](url) links in one pass.
+# Headers may be wrapped in markers ("**## Title**"), which the old sequential
+# passes stripped before matching "^#".
+_INLINE_MARKERS_RE = re.compile(r"\*\*|__|`")
+_MARKDOWN_RE = re.compile(
+    r"^(?:\*\*|__)*#+(?:\s|\*\*|__)*|\*\*|__|`|\[([^\]]+)\]\([^\)]+\)",
+    re.MULTILINE,
+)
+
+
+# Every _MARKDOWN_RE alternative contains at least one of these substrings.
+_MARKDOWN_SIGILS = ("**", "__", "`", "#", "](")
+
+
+def _markdown_sub(m: re.Match[str]) -> str:
+    link_text = m.group(1)
+    # Link text may itself carry markers ("[**a**](url)").
+    return _INLINE_MARKERS_RE.sub("", link_text) if link_text else ""
+
 
 class Postprocessor:
     """Cleans LLM output to match agent style and intent constraints."""
@@ -25,6 +47,14 @@ class Postprocessor:
         r"^\s*(Давайте уточн|Давайте посчита|Давайте разбер)[^\.\!]*[\.\!]?\s*",
         r"^\s*(Итак|По цене так|Есть несколько)[^\.\!]*[\.\!]?\s*",
     ]
+    # The patterns used to run as three anchored subs in order; chaining them as
+    # optional groups after one "^" strips the same prefix in a single match.
+    _FILLER_RE = re.compile(
+        "^" + "".join(f"(?:{p.removeprefix('^')})?" for p in FILLER_PATTERNS),
+        re.IGNORECASE,
+    )
+    # Lowercased first letters of the filler words above (keep in sync).
+    _FILLER_INITIALS = frozenset("пхоякдие")
 
     def __init__(self, style: AgentStyle):
         self.style = style
@@ -33,6 +63,7 @@ class Postprocessor:
     PREPAYMENT_PATTERNS = [
         r"[^.!?\n]*(?:50\s*%|предоплат|аванс|оплат(?:а|ить|у)).*?[.!?\n]",
     ]
+    _PREPAYMENT_COMPILED = [re.compile(p, re.IGNORECASE) for p in PREPAYMENT_PATTERNS]
 
     def process(
         self,
@@ -65,8 +96,8 @@ class Postprocessor:
         result = self._remove_fillers(result)
 
         # Step 3: Remove forbidden content (if contract has forbidden words and intent is not the one that needs them)
-        if contract and contract.forbidden:
-            result = self._remove_forbidden_lines(result, contract.forbidden, intent_id)
+        if contract and contract.forbidden_re:
+            result = self._remove_forbidden_lines(result, contract.forbidden_re, intent_id)
 
         # Step 4: Enforce sentence limit
         result = self._enforce_sentence_limit(result, self.style.max_sentences)
@@ -85,77 +116,84 @@ class Postprocessor:
 
     def _remove_prepayment(self, text: str) -> str:
         """Remove sentences mentioning prepayment/advance payment."""
+        lowered = text.lower()
+        if "%" not in text and "оплат" not in lowered and "аванс" not in lowered:
+            return text
         result = text
-        for pattern in self.PREPAYMENT_PATTERNS:
-            result = re.sub(pattern, "", result, flags=re.IGNORECASE)
+        for pattern in self._PREPAYMENT_COMPILED:
+            result = pattern.sub("", result)
         return result
 
     @staticmethod
     def _remove_markdown(text: str) -> str:
         """Remove markdown formatting: **, __, #, `, []()."""
-        t = text
-        t = re.sub(r"\*\*", "", t)  # bold
-        t = re.sub(r"__", "", t)  # underline
-        t = re.sub(r"^#+\s*", "", t, flags=re.MULTILINE)  # headers
-        t = re.sub(r"`", "", t)  # code
-        t = re.sub(r"\[([^\]]+)\]\([^\)]+\)", r"\1", t)  # [text](url) -> text
-        return t
+        # Plain replies (the common case) skip the regex pass entirely.
+        if not any(sigil in text for sigil in _MARKDOWN_SIGILS):
+            return text
+        return _MARKDOWN_RE.sub(_markdown_sub, text)
 
     def _remove_fillers(self, text: str) -> str:
         """Remove common filler/introductory phrases from the start."""
-        result = text
-        for pattern in self.FILLER_PATTERNS:
-            result = re.sub(pattern, "", result, count=1, flags=re.IGNORECASE)
-        return result.strip()
+        head = text.lstrip()[:1].lower()
+        if head not in self._FILLER_INITIALS:
+            return text.strip()
+        return self._FILLER_RE.sub("", text, count=1).strip()
 
     @staticmethod
-    def _remove_forbidden_lines(text: str, forbidden: list[str], intent_id: str | None) -> str:
-        """Remove lines that contain forbidden words."""
-        lines = text.split("\n")
-        filtered: list[str] = []
-        for line in lines:
-            line_lower = line.lower()
-            has_forbidden = any(word.lower() in line_lower for word in forbidden)
-            if not has_forbidden:
-                filtered.append(line)
-        return "\n".join(filtered)
+    def _remove_forbidden_lines(
+        text: str,
+        forbidden: list[str] | re.Pattern[str],
+        intent_id: str | None,
+    ) -> str:
+        """Remove lines that contain forbidden words (list or precompiled alternation)."""
+        if not isinstance(forbidden, re.Pattern):
+            forbidden = re.compile("|".join(map(re.escape, forbidden)), re.IGNORECASE)
+        if not forbidden.search(text):
+            return text
+        return "\n".join(line for line in text.split("\n") if not forbidden.search(line))
 
     @staticmethod
     def _enforce_sentence_limit(text: str, max_sentences: int) -> str:
-        """Trim text to max_sentences."""
-        # Split by sentence-ending punctuation, keeping the delimiter.
-        parts = re.split(r"([.!?]+)", text)
-        sentences_found = 0
-        result_parts: list[str] = []
-
-        for i in range(0, len(parts), 2):
-            sentence = parts[i].strip()
-            if not sentence:
-                continue
-            sentences_found += 1
-            if sentences_found > max_sentences:
-                break
-            result_parts.append(parts[i])
-            # Add the delimiter if available.
-            if i + 1 < len(parts):
-                result_parts.append(parts[i + 1])
-
-        return "".join(result_parts).strip()
+        """Trim text to max_sentences (blank fragments and their delimiters are dropped)."""
+        if max_sentences <= 0:
+            return ""
+
+        # Scan sentence ends lazily and stop at the limit; kept sentences are
+        # (start, end) spans, so the common case is a single slice of `text`.
+        spans: list[tuple[int, int]] = []
+        pos = 0
+        for m in _SENTENCE_END_RE.finditer(text):
+            start, pos = pos, m.end()
+            if text[start : m.start()].strip():
+                spans.append((start, pos))
+                if len(spans) == max_sentences:
+                    break
+        else:
+            # Trailing sentence without end punctuation.
+            if text[pos:].strip():
+                spans.append((pos, len(text)))
+
+        if not spans:
+            return ""
+        if all(spans[i][1] == spans[i + 1][0] for i in range(len(spans) - 1)):
+            return text[spans[0][0] : spans[-1][1]].strip()
+        return "".join(text[a:b] for a, b in spans).strip()
 
     @staticmethod
     def _enforce_question_limit(text: str, max_questions: int) -> str:
         """If text has too many question marks, truncate after the Nth one."""
-        count = 0
-        for i, ch in enumerate(text):
-            if ch == "?":
-                count += 1
-                if count >= max_questions:
-                    # Keep up to and including this question mark.
-                    return text[: i + 1].strip()
-        return text
+        idx = -1
+        for _ in range(max(max_questions, 1)):
+            idx = text.find("?", idx + 1)
+            if idx < 0:
+                return text
+        # Keep up to and including the Nth question mark.
+        return text[: idx + 1].strip()
 
     @staticmethod
     def _clean_whitespace(text: str) -> str:
         """Normalize whitespace: collapse multiple newlines, trim."""
-        text = re.sub(r"\n\s*\n", "\n\n", text)
-        return text.strip()
+        # A blank-line run needs two newlines; most short replies have fewer.
+        if text.count("\n") < 2:
+            return text.strip()
+        return _BLANK_LINES_RE.sub("\n\n", text).strip()
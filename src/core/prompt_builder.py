@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
 
 from src.core.schemas import AgentConfig
@@ -7,6 +9,27 @@ from src.core.schemas import AgentConfig
 # Moscow timezone (UTC+3) — J-One Studio is in Moscow
 MSK = timezone(timedelta(hours=3))
 
+WEEKDAYS_RU = ("понедельник", "вторник", "среда", "четверг", "пятница", "суббота", "воскресенье")
+
+STAGE_DESCRIPTIONS = {
+    "qualify": "Квалификация — выявление потребности клиента (формат, кол-во человек, бюджет)",
+    "offer": "Предложение — подбор зала и формата, расчет стоимости",
+    "close": "Закрытие — сбор данных для бронирования (дата, время, контакты)",
+    "finalize": "Финализация — подтверждение брони и детали",
+}
+
+# Booking fields listed in the flow section, in prompt order.
+BOOKING_FIELD_LABELS = {
+    "format": "Формат",
+    "room": "Зал",
+    "date": "Дата",
+    "time": "Время",
+    "duration": "Длительность",
+    "participants": "Участников",
+    "name": "Имя",
+    "phone": "Телефон",
+}
+
 # Few-shot examples: ideal dialogues based on real scripts
 FEW_SHOT_EXAMPLES = """
 ## ПРИМЕРЫ ДИАЛОГОВ (следуй этому стилю)
@@ -33,6 +56,49 @@ FEW_SHOT_EXAMPLES = """
 """.strip()
 
 
+# Output format rules and control tags (static, always the last prompt section)
+OUTPUT_RULES = "\n".join([
+    "## ПРАВИЛА ОТВЕТА",
+    "1. Отвечай на том же языке, что и клиент.",
+    "2. Если клиент называет относительную дату ('завтра', 'в субботу', 'на следующей неделе'), "
+    "подтверждай конкретной датой (ДД.ММ.ГГГГ).",
+    "3. Строго соблюдай все ОБЯЗАТЕЛЬНЫЕ ПРАВИЛА выше.",
+    "4. Сначала отвечай на прямой вопрос клиента, потом делай апсейл (если уместен).",
+    "5. Не выдумывай информацию. Бери данные только из БАЗЫ ЗНАНИЙ.",
+    "6. Завершай каждое сообщение призывом к действию (выбор даты, зала, формата).",
+    "",
+    "### УПРАВЛЯЮЩИЕ ТЕГИ (используй когда нужно):",
+    "",
+    "**[ACTION:ESCALATE]** — Используй когда:",
+    "- Клиент просит связаться с живым человеком",
+    "- Вопрос выходит за рамки твоих компетенций",
+    "- Клиент недоволен или конфликтует",
+    "- Нужно обсудить специальные условия",
+    "",
+    "**[ACTION:RESET]** — Используй когда:",
+    "- Клиент явно хочет начать диалог заново",
+    "- Меняется тема разговора кардинально",
+    "",
+    "**[BOOKING:дата|время|длительность|зал|имя|телефон]** — Используй когда собраны ВСЕ данные:",
+    "- Дата (формат: ДД.ММ.ГГГГ)",
+    "- Время (формат: ЧЧ:ММ)",
+    "- Длительность (в часах, например: 2 или 3)",
+    "- Зал (Агат/Карелия/Уют/Грань/Лофт)",
+    "- Имя клиента",
+    "- Телефон клиента",
+    "",
+    "Примеры:",
+    "- [BOOKING:24.02.2026|14:00|2|Агат|Иван Петров|+79161234567]",
+    "- [BOOKING:17.02.2026|18:00|3|Уют|Мария|+79261234567]",
+    "",
+    "⚠️ ВАЖНО:",
+    "1. Генерируй тег [BOOKING:...] ТОЛЬКО когда все 6 полей заполнены!",
+    "2. Длительность ОБЯЗАТЕЛЬНО указывай цифрой (количество часов).",
+    "3. Если клиент не указал длительность — уточни перед генерацией тега.",
+    "4. Не выдумывай данные — если чего-то не хватает, спроси клиента.",
+])
+
+
 class PromptBuilder:
     """Собирает системный промпт из конфига агента и базы знаний."""
 
@@ -43,143 +109,146 @@ class PromptBuilder:
         extra_context: str = "",
         flow_stage: str | None = None,
         booking_data: dict | None = None,
+        config_version: str = "",
+        knowledge_hash: str = "",
     ) -> str:
-        sections: list[str] = []
+        """
+        Build the system prompt.
+
+        The prompt starts with a static prefix (role, style, rules, knowledge,
+        few-shot examples) that only depends on the agent config and knowledge
+        base. When both config_version and knowledge_hash are given, the prefix
+        is cached, and its byte-stable layout lets LLM providers reuse their
+        prompt cache across turns. Per-turn sections (date, flow state, extra
+        context) follow the prefix.
+        """
+        if config_version and knowledge_hash:
+            prefix = _cached_static_prefix(agent_config, knowledge, config_version, knowledge_hash)
+        else:
+            prefix = _render_static_prefix(agent_config, knowledge)
+
+        sections: list[str] = [prefix]
 
         # --- Дата и время ---
         now = datetime.now(MSK)
-        weekdays_ru = ["понедельник", "вторник", "среда", "четверг", "пятница", "суббота", "воскресенье"]
-        day_name = weekdays_ru[now.weekday()]
+        day_name = WEEKDAYS_RU[now.weekday()]
         sections.append(
             f"## ТЕКУЩАЯ ДАТА И ВРЕМЯ\n"
-            f"Сегодня: {now.strftime('%d.%m.%Y')} ({day_name}), время: {now.strftime('%H:%M')} (Москва)."
+            f"Сегодня: {now.day:02d}.{now.month:02d}.{now.year} ({day_name}), "
+            f"время: {now.hour:02d}:{now.minute:02d} (Москва)."
         )
 
-        # --- Роль и персона ---
-        sections.append(f"## РОЛЬ\n{agent_config.identity.role}")
-        sections.append(f"## ПЕРСОНА\n{agent_config.identity.persona}")
-        if agent_config.identity.fallback_phrase:
-            sections.append(
-                f'Если спросят кто ты — отвечай: "{agent_config.identity.fallback_phrase}"'
-            )
-
-        # --- Стиль ---
-        style = agent_config.style
-        style_lines = [
-            f"- Тон: {style.tone}",
-            f"- Обращение: на «{style.politeness}»",
-            f"- Эмодзи: {style.emoji_policy} (максимум 1-2 за сообщение)",
-            f"- Максимум предложений в ответе: {style.max_sentences}",
-            f"- Максимум вопросов в ответе: {style.max_questions}",
-        ]
-        if style.clean_text:
-            style_lines.append("- БЕЗ markdown-разметки. Никаких **жирный**, # заголовков, [ссылок](url). Только чистый текст.")
-        sections.append("## СТИЛЬ ОБЩЕНИЯ\n" + "\n".join(style_lines))
-
-        # --- Правила ---
-        if agent_config.rules:
-            rules_text: list[str] = []
-            for i, rule in enumerate(agent_config.rules, 1):
-                rule_line = f"{i}. [{rule.priority.upper()}] {rule.description}"
-                if rule.positive_example:
-                    rule_line += f"\n   ✓ Правильно: {rule.positive_example}"
-                if rule.negative_example:
-                    rule_line += f"\n   ✗ Неправильно: {rule.negative_example}"
-                rules_text.append(rule_line)
-            sections.append("## ОБЯЗАТЕЛЬНЫЕ ПРАВИЛА\n" + "\n".join(rules_text))
-
-        # --- База знаний ---
-        if knowledge:
-            kb_text = "\n\n".join(
-                [f"### {name.upper().replace('_', ' ')}\n{content}" for name, content in knowledge.items()]
-            )
-            sections.append(f"## БАЗА ЗНАНИЙ\n{kb_text}")
-
-        # --- Примеры диалогов ---
-        sections.append(FEW_SHOT_EXAMPLES)
-
         # --- Conversation Flow State (NEW) ---
         if flow_stage or booking_data:
-            flow_section = "## ТЕКУЩИЙ ЭТАП ДИАЛОГА\n"
-            
+            flow_parts = ["## ТЕКУЩИЙ ЭТАП ДИАЛОГА\n"]
+
             if flow_stage:
-                stage_descriptions = {
-                    "qualify": "Квалификация — выявление потребности клиента (формат, кол-во человек, бюджет)",
-                    "offer": "Предложение — подбор зала и формата, расчет стоимости",
-                    "close": "Закрытие — сбор данных для бронирования (дата, время, контакты)",
-                    "finalize": "Финализация — подтверждение брони и детали",
-                }
-                flow_section += f"Этап: **{flow_stage.upper()}** — {stage_descriptions.get(flow_stage, 'Неизвестный этап')}\n\n"
-            
+                description = STAGE_DESCRIPTIONS.get(flow_stage, "Неизвестный этап")
+                flow_parts.append(f"Этап: **{flow_stage.upper()}** — {description}\n\n")
+
             if booking_data:
-                flow_section += "**Собранные данные:**\n"
-                fields = {
-                    "format": "Формат",
-                    "room": "Зал",
-                    "date": "Дата",
-                    "time": "Время",
-                    "duration": "Длительность",
-                    "participants": "Участников",
-                    "name": "Имя",
-                    "phone": "Телефон",
-                }
-                for key, label in fields.items():
-                    value = booking_data.get(key)
-                    if value:
-                        flow_section += f"- {label}: {value}\n"
-                    else:
-                        flow_section += f"- {label}: _не указан_\n"
-                
-                flow_section += "\n**Следующий шаг:** Собери недостающие данные для завершения брони.\n"
-            
-            sections.append(flow_section)
+                flow_parts.append("**Собранные данные:**\n")
+                for key, label in BOOKING_FIELD_LABELS.items():
+                    flow_parts.append(f"- {label}: {booking_data.get(key) or '_не указан_'}\n")
+                flow_parts.append(
+                    "\n**Следующий шаг:** Собери недостающие данные для завершения брони.\n"
+                )
+
+            sections.append("".join(flow_parts))
 
         # --- Дополнительный контекст ---
         if extra_context:
             sections.append(f"## ТЕКУЩИЙ КОНТЕКСТ\n{extra_context}")
 
         # --- Выходные правила ---
-        output_rules = [
-            "## ПРАВИЛА ОТВЕТА",
-            "1. Отвечай на том же языке, что и клиент.",
-            "2. Если клиент называет относительную дату ('завтра', 'в субботу', 'на следующей неделе'), "
-            "подтверждай конкретной датой (ДД.ММ.ГГГГ).",
-            "3. Строго соблюдай все ОБЯЗАТЕЛЬНЫЕ ПРАВИЛА выше.",
-            "4. Сначала отвечай на прямой вопрос клиента, потом делай апсейл (если уместен).",
-            "5. Не выдумывай информацию. Бери данные только из БАЗЫ ЗНАНИЙ.",
-            "6. Завершай каждое сообщение призывом к действию (выбор даты, зала, формата).",
-            "",
-            "### УПРАВЛЯЮЩИЕ ТЕГИ (используй когда нужно):",
-            "",
-            "**[ACTION:ESCALATE]** — Используй когда:",
-            "- Клиент просит связаться с живым человеком",
-            "- Вопрос выходит за рамки твоих компетенций",
-            "- Клиент недоволен или конфликтует",
-            "- Нужно обсудить специальные условия",
-            "",
-            "**[ACTION:RESET]** — Используй когда:",
-            "- Клиент явно хочет начать диалог заново",
-            "- Меняется тема разговора кардинально",
-            "",
-            "**[BOOKING:дата|время|длительность|зал|имя|телефон]** — Используй когда собраны ВСЕ данные:",
-            "- Дата (формат: ДД.ММ.ГГГГ)",
-            "- Время (формат: ЧЧ:ММ)",
-            "- Длительность (в часах, например: 2 или 3)",
-            "- Зал (Агат/Карелия/Уют/Грань/Лофт)",
-            "- Имя клиента",
-            "- Телефон клиента",
-            "",
-            "Примеры:",
-            "- [BOOKING:24.02.2026|14:00|2|Агат|Иван Петров|+79161234567]",
-            "- [BOOKING:17.02.2026|18:00|3|Уют|Мария|+79261234567]",
-            "",
-            "⚠️ ВАЖНО:",
-            "1. Генерируй тег [BOOKING:...] ТОЛЬКО когда все 6 полей заполнены!",
-            "2. Длительность ОБЯЗАТЕЛЬНО указывай цифрой (количество часов).",
-            "3. Если клиент не указал длительность — уточни перед генерацией тега.",
-            "4. Не выдумывай данные — если чего-то не хватает, спроси клиента.",
-        ]
-        
-        sections.append("\n".join(output_rules))
+        sections.append(OUTPUT_RULES)
 
         return "\n\n".join(sections)
+
+    @staticmethod
+    def knowledge_hash(knowledge: dict[str, str]) -> str:
+        """Stable fingerprint of the knowledge base (order-sensitive, like the prompt)."""
+        digest = hashlib.sha256()
+        for name, content in (knowledge or {}).items():
+            digest.update(name.encode("utf-8"))
+            digest.update(b"\0")
+            digest.update(content.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()[:16]
+
+
+# Static prefix cache: (config_version, knowledge_hash) -> rendered prefix.
+_STATIC_PREFIX_CACHE: OrderedDict[tuple[str, str], str] = OrderedDict()
+_STATIC_PREFIX_CACHE_SIZE = 256
+
+
+def _cached_static_prefix(
+    agent_config: AgentConfig,
+    knowledge: dict[str, str],
+    config_version: str,
+    knowledge_hash: str,
+) -> str:
+    key = (config_version, knowledge_hash)
+    prefix = _STATIC_PREFIX_CACHE.get(key)
+    if prefix is not None:
+        _STATIC_PREFIX_CACHE.move_to_end(key)
+        return prefix
+
+    prefix = _render_static_prefix(agent_config, knowledge)
+    _STATIC_PREFIX_CACHE[key] = prefix
+    if len(_STATIC_PREFIX_CACHE) > _STATIC_PREFIX_CACHE_SIZE:
+        _STATIC_PREFIX_CACHE.popitem(last=False)
+    return prefix
+
+
+def _render_static_prefix(agent_config: AgentConfig, knowledge: dict[str, str]) -> str:
+    """Render prompt sections that depend only on agent config and knowledge base."""
+    sections: list[str] = []
+
+    # --- Роль и персона ---
+    sections.append(f"## РОЛЬ\n{agent_config.identity.role}")
+    sections.append(f"## ПЕРСОНА\n{agent_config.identity.persona}")
+    if agent_config.identity.fallback_phrase:
+        sections.append(
+            f'Если спросят кто ты — отвечай: "{agent_config.identity.fallback_phrase}"'
+        )
+
+    # --- Стиль ---
+    style = agent_config.style
+    style_lines = [
+        f"- Тон: {style.tone}",
+        f"- Обращение: на «{style.politeness}»",
+        f"- Эмодзи: {style.emoji_policy} (максимум 1-2 за сообщение)",
+        f"- Максимум предложений в ответе: {style.max_sentences}",
+        f"- Максимум вопросов в ответе: {style.max_questions}",
+    ]
+    if style.clean_text:
+        style_lines.append(
+            "- БЕЗ markdown-разметки. Никаких **жирный**, # заголовков, [ссылок](url). "
+            "Только чистый текст."
+        )
+    sections.append("## СТИЛЬ ОБЩЕНИЯ\n" + "\n".join(style_lines))
+
+    # --- Правила ---
+    if agent_config.rules:
+        rules_text: list[str] = []
+        for i, rule in enumerate(agent_config.rules, 1):
+            rules_text.append(f"{i}. [{rule.priority.upper()}] {rule.description}")
+            if rule.positive_example:
+                rules_text.append(f"   ✓ Правильно: {rule.positive_example}")
+            if rule.negative_example:
+                rules_text.append(f"   ✗ Неправильно: {rule.negative_example}")
+        sections.append("## ОБЯЗАТЕЛЬНЫЕ ПРАВИЛА\n" + "\n".join(rules_text))
+
+    # --- База знаний ---
+    if knowledge:
+        kb_text = "\n\n".join(
+            f"### {name.upper().replace('_', ' ')}\n{content}"
+            for name, content in knowledge.items()
+        )
+        sections.append(f"## БАЗА ЗНАНИЙ\n{kb_text}")
+
+    # --- Примеры диалогов ---
+    sections.append(FEW_SHOT_EXAMPLES)
+
+    return "\n\n".join(sections)
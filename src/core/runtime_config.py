@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from datetime import datetime, timezone
 
-from src.core.schemas import TenantFullConfig
+from src.core.schemas import AgentConfig, DialoguePolicyConfig, TenantFullConfig
 
 SCHEMA_VERSION = "1.0.0"
 
@@ -13,12 +15,25 @@ def build_runtime_config(cfg: TenantFullConfig, tenant_slug: str) -> dict:
     This payload is intentionally explicit and versioned, so UI/DB/runtime
     stay in sync and can migrate safely in future versions.
     """
+    # One serializer walk for all dumped sections instead of one call per model.
+    dumped = cfg.model_dump(include={"agent", "dialogue_policy", "actions"})
     return {
         "schema_version": SCHEMA_VERSION,
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "tenant_slug": tenant_slug,
-        "agent": cfg.agent.model_dump(),
-        "dialogue_policy": cfg.dialogue_policy.model_dump(),
-        "actions": [a.model_dump() for a in cfg.actions],
-        "knowledge_keys": sorted(list(cfg.knowledge.keys())),
+        "agent": dumped["agent"],
+        "dialogue_policy": dumped["dialogue_policy"],
+        "actions": dumped["actions"],
+        "knowledge_keys": sorted(cfg.knowledge),
     }
+
+
+def config_version(agent_config: AgentConfig, dialogue_policy: DialoguePolicyConfig) -> str:
+    """Short fingerprint of the effective agent config, for traceability and prompt caching."""
+    cfg_payload = {
+        "agent": agent_config.model_dump(),
+        "dialogue_policy": dialogue_policy.model_dump(),
+    }
+    return hashlib.sha256(
+        json.dumps(cfg_payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:12]
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import re
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 
 
 class AgentIdentity(BaseModel):
@@ -41,6 +42,19 @@ class ChannelConfig(BaseModel):
     config: dict = Field(default_factory=dict)
 
 
+class AutomationRule(BaseModel):
+    id: str = ""
+    enabled: bool = True
+    once_per_conversation: bool = True
+    when: dict = Field(default_factory=dict)
+    do: list[str] = Field(default_factory=list)
+
+
+class AutomationsConfig(BaseModel):
+    enabled: bool = False
+    rules: list[AutomationRule] = Field(default_factory=list)
+
+
 class AgentConfig(BaseModel):
     id: str
     name: str
@@ -51,12 +65,41 @@ class AgentConfig(BaseModel):
     llm: LLMConfig = Field(default_factory=LLMConfig)
     channels: list[ChannelConfig] = Field(default_factory=list)
     runtime: dict = Field(default_factory=dict)
+    automations: AutomationsConfig = Field(default_factory=AutomationsConfig)
 
 
 class IntentContract(BaseModel):
     must_include_any: list[str] = Field(default_factory=list)
     forbidden: list[str] = Field(default_factory=list)
 
+    _forbidden_re: re.Pattern[str] | None = PrivateAttr(default=None)
+    _must_include_re: re.Pattern[str] | None = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def _compile_forbidden(self) -> IntentContract:
+        # Compiled once when the config is loaded, not on the first message.
+        self._forbidden_re = (
+            re.compile("|".join(map(re.escape, self.forbidden)), re.IGNORECASE)
+            if self.forbidden
+            else None
+        )
+        self._must_include_re = (
+            re.compile("|".join(map(re.escape, self.must_include_any)))
+            if self.must_include_any
+            else None
+        )
+        return self
+
+    @property
+    def forbidden_re(self) -> re.Pattern[str] | None:
+        """Case-insensitive alternation of `forbidden` (None when the list is empty)."""
+        return self._forbidden_re
+
+    @property
+    def must_include_re(self) -> re.Pattern[str] | None:
+        """Case-sensitive alternation of `must_include_any` (None when the list is empty)."""
+        return self._must_include_re
+
 
 class IntentConfig(BaseModel):
     id: str
@@ -91,3 +134,16 @@ class TenantFullConfig(BaseModel):
     dialogue_policy: DialoguePolicyConfig = Field(default_factory=DialoguePolicyConfig)
     actions: list[ActionConfig] = Field(default_factory=list)
     knowledge: dict[str, str] = Field(default_factory=dict)
+
+    _sheets_action: ActionConfig | None = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def _find_sheets_action(self) -> TenantFullConfig:
+        # Looked up once when the config is loaded, not for every replied message.
+        self._sheets_action = next((a for a in self.actions if a.type == "google_sheets"), None)
+        return self
+
+    @property
+    def sheets_action(self) -> ActionConfig | None:
+        """First `google_sheets` action (lead logging), or None if not configured."""
+        return self._sheets_action
@@ -20,6 +20,10 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Secret file contents keyed by path, validated against (dev, inode, mtime, size)
+# so an edited or replaced file is re-read on the next lookup.
+_file_cache: dict[str, tuple[tuple[int, int, int, int], str]] = {}
+
 
 def resolve_secret(tenant_slug: str, secret_name: str) -> str | None:
     """
@@ -41,13 +45,41 @@ def resolve_secret(tenant_slug: str, secret_name: str) -> str | None:
     # 2. Try secrets directory.
     secrets_dir = Path("secrets") / tenant_slug
     secret_file = secrets_dir / secret_name
-    if secret_file.exists():
-        return secret_file.read_text(encoding="utf-8").strip()
+    value = _read_secret_file(secret_file)
+    if value is not None:
+        return value
 
     logger.warning("Secret not found: %s/%s", tenant_slug, secret_name)
     return None
 
 
+def clear_secret_cache() -> None:
+    """Drop cached secret file contents (e.g. after secrets are edited via the API)."""
+    _file_cache.clear()
+
+
+def _read_secret_file(path: Path) -> str | None:
+    """Read a secret file, reusing the cached value while the file is unchanged."""
+    key = str(path)
+    try:
+        st = os.stat(key)
+    except OSError:
+        _file_cache.pop(key, None)
+        return None
+
+    signature = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+    cached = _file_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    try:
+        value = path.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    _file_cache[key] = (signature, value)
+    return value
+
+
 def _slugify(s: str) -> str:
     """Convert slug to env-safe format: j-one-studio -> J_ONE_STUDIO."""
     return s.replace("-", "_").upper()
@@ -7,11 +7,27 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 from src.config import get_settings
 
 
+_settings = get_settings()
+
+# asyncpg: disable per-session PG JIT, which only adds planning pauses to the
+# short OLTP queries this app issues.
+_connect_args = (
+    {"server_settings": {"jit": "off"}}
+    if _settings.database_url.startswith("postgresql+asyncpg")
+    else {}
+)
+
 engine = create_async_engine(
-    get_settings().database_url,
-    echo=get_settings().debug,
+    _settings.database_url,
+    echo=_settings.debug if _settings.db_echo is None else _settings.db_echo,
     pool_size=20,
     max_overflow=10,
+    # Drop dead/stale connections before use instead of failing the first query,
+    # recycle long-lived ones, and reuse the most recently returned (warm) connection.
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    pool_use_lifo=True,
+    connect_args=_connect_args,
 )
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
@@ -6,13 +6,82 @@ Uses Google Calendar API via service account.
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
-from datetime import datetime, timedelta, timezone
+import re
+import time
+from datetime import UTC, datetime, timedelta, timezone
 
 from src.integrations.base import IntegrationAdapter
+from src.integrations.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
+# Naive booking times are studio-local (J-One Studio is in Moscow, UTC+3, no DST).
+_MSK = timezone(timedelta(hours=3), name="Europe/Moscow")
+_EVENT_TIMEZONE = "Europe/Moscow"
+
+# VEVENT blocks and their DTSTART/DTEND properties (with optional ;TZID=... params).
+_ICS_EVENT_RE = re.compile(
+    r"^[ \t]*BEGIN:VEVENT[ \t]*\r?$(.*?)^[ \t]*END:VEVENT", re.MULTILINE | re.DOTALL
+)
+_ICS_DT_RE = re.compile(r"^[ \t]*DT(START|END)[^:\r\n]*:([^\r\n]*)", re.MULTILINE)
+
+@functools.lru_cache(maxsize=16)
+def _calendar_service(sa_path: str, readonly: bool):
+    """Build (once per key file and scope) an authorized Calendar API v3 client."""
+    from google.oauth2 import service_account
+    from googleapiclient.discovery import build
+
+    scope = "https://www.googleapis.com/auth/calendar"
+    credentials = service_account.Credentials.from_service_account_file(
+        sa_path,
+        scopes=[f"{scope}.readonly" if readonly else scope],
+    )
+    return build(
+        "calendar", "v3", credentials=credentials, cache_discovery=False, static_discovery=True
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def _events_resource(service):
+    """service.events(), built once per service (resource construction costs ~1 ms)."""
+    return service.events()
+
+
+def _execute_blocking(request):
+    """Execute on a fresh transport: the cached service's httplib2.Http is not thread-safe."""
+    import google_auth_httplib2
+    import httplib2
+
+    credentials = getattr(request.http, "credentials", None)
+    if credentials is None:
+        return request.execute()
+    http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+    return request.execute(http=http)
+
+
+async def _execute(request) -> dict:
+    """Run a blocking googleapiclient request off the event loop."""
+    return await asyncio.to_thread(_execute_blocking, request)
+
+
+# Availability answers are shared across conversations for a short time, and
+# concurrent checks of the same slot wait on a single upstream request.
+_AVAILABILITY_TTL_S = 15.0
+_availability_cache: dict[tuple, tuple[float, dict]] = {}
+_availability_inflight: dict[tuple, asyncio.Future] = {}
+
+
+def clear_availability_cache() -> None:
+    """Forget cached availability answers (e.g. after a booking was created)."""
+    _availability_cache.clear()
+
+
+def _copy_availability(result: dict) -> dict:
+    return {**result, "conflicting_rooms": list(result.get("conflicting_rooms", []))}
+
 
 class GoogleCalendarAdapter(IntegrationAdapter):
     """
@@ -26,6 +95,8 @@ class GoogleCalendarAdapter(IntegrationAdapter):
     """
 
     integration_type = "google_calendar"
+    # Supported actions, each handled by the same-named coroutine method.
+    _ACTIONS = frozenset({"check_availability", "create_booking"})
 
     def __init__(self, config: dict):
         super().__init__(config)
@@ -41,12 +112,9 @@ class GoogleCalendarAdapter(IntegrationAdapter):
             check_availability: params = {"start": datetime}
             create_booking: params = {"start": datetime, "end": datetime, "summary": str, "description": str}
         """
-        if action == "check_availability":
-            return await self.check_availability(params)
-        elif action == "create_booking":
-            return await self.create_booking(params)
-        else:
-            return {"success": False, "error": f"Unknown action: {action}"}
+        if action in self._ACTIONS:
+            return await getattr(self, action)(params)
+        return {"success": False, "error": f"Unknown action: {action}"}
 
     async def check_availability(self, params: dict) -> dict:
         """
@@ -55,6 +123,9 @@ class GoogleCalendarAdapter(IntegrationAdapter):
         If room is provided, checks overlapping events and filters by room name in
         summary (expected format: "... / <room>"). This allows shared calendar with
         parallel bookings in different rooms.
+
+        Answers from the Calendar API / ICS feed are cached for a few seconds per
+        (calendar, window, room); concurrent identical checks share one request.
         """
         try:
             start = params["start"]
@@ -65,86 +136,83 @@ class GoogleCalendarAdapter(IntegrationAdapter):
             end = start + timedelta(hours=duration)
 
             # Normalize to timezone-aware datetimes for Google API.
-            msk = timezone(timedelta(hours=3))
             if start.tzinfo is None:
-                start = start.replace(tzinfo=msk)
+                start = start.replace(tzinfo=_MSK)
             if end.tzinfo is None:
-                end = end.replace(tzinfo=msk)
+                end = end.replace(tzinfo=_MSK)
 
-            # 1) Preferred: check via Google Calendar API with service account.
-            sa_path = self.config.get("service_account_path", "")
-            if sa_path and self.calendar_id:
-                try:
-                    from google.oauth2 import service_account
-                    from googleapiclient.discovery import build
-
-                    credentials = service_account.Credentials.from_service_account_file(
-                        sa_path,
-                        scopes=["https://www.googleapis.com/auth/calendar.readonly"],
-                    )
-                    service = build("calendar", "v3", credentials=credentials)
-
-                    events_result = (
-                        service.events()
-                        .list(
-                            calendarId=self.calendar_id,
-                            timeMin=start.isoformat(),
-                            timeMax=end.isoformat(),
-                            singleEvents=True,
-                            orderBy="startTime",
-                        )
-                        .execute()
-                    )
-                    events = events_result.get("items", [])
-
-                    if not room:
-                        return {"success": True, "available": len(events) == 0, "conflicting_rooms": []}
-
-                    room_lower = room.lower()
-                    conflicting = [
-                        e for e in events if room_lower in str(e.get("summary", "")).lower()
-                    ]
-
-                    busy_rooms: list[str] = []
-                    for e in events:
-                        summary = str(e.get("summary", ""))
-                        if "/" in summary:
-                            candidate = summary.split("/")[-1].strip()
-                            if candidate and candidate not in busy_rooms:
-                                busy_rooms.append(candidate)
+            key = (self.calendar_id, self.ics_url, start.isoformat(), end.isoformat(), room.lower())
+            cached = _availability_cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                return _copy_availability(cached[1])
 
-                    return {
-                        "success": True,
-                        "available": len(conflicting) == 0,
-                        "conflicting_rooms": busy_rooms,
-                    }
-                except Exception as api_err:
-                    logger.warning("Calendar API availability check failed, fallback to ICS: %s", api_err)
-
-            # 2) Fallback: public ICS feed (without room filtering).
-            if self.ics_url:
-                import httpx
-
-                async with httpx.AsyncClient() as client:
-                    resp = await client.get(self.ics_url, timeout=10.0)
-                    ics_text = resp.text
-
-                events = self._parse_ics_events(ics_text)
-                overlaps = [
-                    e
-                    for e in events
-                    if e.get("start") and e.get("end") and start < e["end"] and end > e["start"]
-                ]
-                return {"success": True, "available": len(overlaps) == 0, "conflicting_rooms": []}
-
-            # 3) Fail-open fallback.
-            logger.warning("No Calendar API/ICS configured for availability — assuming free")
-            return {"success": True, "available": True, "conflicting_rooms": []}
+            inflight = _availability_inflight.get(key)
+            if inflight is not None:
+                try:
+                    result = await asyncio.shield(inflight)
+                except asyncio.CancelledError:
+                    # The leading check was cancelled, not us: query ourselves.
+                    if not inflight.cancelled() or asyncio.current_task().cancelling():
+                        raise
+                    result = await self._fetch_availability(start, end, room)
+            else:
+                future = asyncio.get_running_loop().create_future()
+                _availability_inflight[key] = future
+                try:
+                    result = await self._fetch_availability(start, end, room)
+                except Exception as e:
+                    future.set_exception(e)
+                    # Mark retrieved so a check without waiters doesn't log "never retrieved".
+                    future.exception()
+                    raise
+                except BaseException:
+                    future.cancel()
+                    raise
+                finally:
+                    _availability_inflight.pop(key, None)
+                future.set_result(result)
+                if result is not None:
+                    _availability_cache[key] = (time.monotonic() + _AVAILABILITY_TTL_S, result)
+
+            if result is None:
+                # 3) Fail-open fallback.
+                logger.warning("No Calendar API/ICS configured for availability — assuming free")
+                return {"success": True, "available": True, "conflicting_rooms": []}
+            return _copy_availability(result)
 
         except Exception as e:
             logger.error("Calendar availability check failed: %s", e)
             return {"success": True, "available": True, "conflicting_rooms": []}
 
+    async def _fetch_availability(self, start: datetime, end: datetime, room: str) -> dict | None:
+        """Query the Calendar API (or the ICS feed as fallback); None if neither is configured."""
+        # 1) Preferred: check via Google Calendar API with service account.
+        sa_path = self.config.get("service_account_path", "")
+        if sa_path and self.calendar_id:
+            try:
+                service = self._build_service(sa_path, readonly=True)
+                events = await self._list_events(service, start, end)
+                return self._availability_from_events(events, room)
+            except Exception as api_err:
+                logger.warning("Calendar API availability check failed, fallback to ICS: %s", api_err)
+
+        # 2) Fallback: public ICS feed (without room filtering).
+        if self.ics_url:
+            resp = await get_http_client().get(self.ics_url, timeout=10.0)
+            # Only the ASCII DTSTART/DTEND lines are read, so skip charset handling:
+            # latin-1 maps bytes 1:1 and can't fail on UTF-8 summaries.
+            ics_text = resp.content.decode("latin-1")
+
+            events = self._parse_ics_events(ics_text, time_min=start, time_max=end)
+            overlaps = [
+                e
+                for e in events
+                if e.get("start") and e.get("end") and start < e["end"] and end > e["start"]
+            ]
+            return {"success": True, "available": len(overlaps) == 0, "conflicting_rooms": []}
+
+        return None
+
     async def create_booking(self, params: dict) -> dict:
         """
         Create a booking event in Google Calendar.
@@ -154,25 +222,26 @@ class GoogleCalendarAdapter(IntegrationAdapter):
                 "start": datetime,
                 "end": datetime,
                 "summary": str,
-                "description": str (optional)
+                "description": str (optional),
+                "room": str (optional, used by the conflict check),
+                "check_conflict": bool (optional, default False)
             }
 
+        With check_conflict=True the slot is re-checked through the same authorized
+        service right before insert, so callers don't need a separate
+        check_availability() round-trip.
+
         Returns:
-            {"success": True, "event_id": str} or {"success": False, "error": str}
+            {"success": True, "event_id": str} or {"success": False, "error": str}.
+            A busy slot yields
+            {"success": False, "reason": "slot_busy", "conflicting_rooms": [...]}.
         """
         try:
-            from google.oauth2 import service_account
-            from googleapiclient.discovery import build
-
             sa_path = self.config.get("service_account_path", "")
             if not sa_path:
                 return {"success": False, "error": "No service account configured"}
 
-            credentials = service_account.Credentials.from_service_account_file(
-                sa_path,
-                scopes=["https://www.googleapis.com/auth/calendar"],
-            )
-            service = build("calendar", "v3", credentials=credentials)
+            service = self._build_service(sa_path, readonly=False)
 
             start = params["start"]
             end = params["end"]
@@ -181,26 +250,44 @@ class GoogleCalendarAdapter(IntegrationAdapter):
             if isinstance(end, str):
                 end = datetime.fromisoformat(end)
 
-            msk = timezone(timedelta(hours=3))
             if start.tzinfo is None:
-                start = start.replace(tzinfo=msk)
+                start = start.replace(tzinfo=_MSK)
             if end.tzinfo is None:
-                end = end.replace(tzinfo=msk)
+                end = end.replace(tzinfo=_MSK)
+
+            if params.get("check_conflict"):
+                room = str(params.get("room", "") or "").strip()
+                try:
+                    events = await self._list_events(service, start, end)
+                    availability = self._availability_from_events(events, room)
+                except Exception as api_err:
+                    # Fail-open, same as check_availability().
+                    logger.warning("Calendar conflict check failed, creating anyway: %s", api_err)
+                    availability = {"success": True, "available": True, "conflicting_rooms": []}
+                if availability.get("available") is False:
+                    return {
+                        "success": False,
+                        "reason": "slot_busy",
+                        "conflicting_rooms": availability.get("conflicting_rooms", []),
+                    }
 
             # Google Calendar requires timezone when dateTime is naive.
             # Use Europe/Moscow by default for J-One Studio.
             event = {
                 "summary": params.get("summary", "Booking"),
                 "description": params.get("description", ""),
-                "start": {"dateTime": start.isoformat(), "timeZone": "Europe/Moscow"},
-                "end": {"dateTime": end.isoformat(), "timeZone": "Europe/Moscow"},
+                "start": {"dateTime": start.isoformat(), "timeZone": _EVENT_TIMEZONE},
+                "end": {"dateTime": end.isoformat(), "timeZone": _EVENT_TIMEZONE},
             }
 
-            result = service.events().insert(
-                calendarId=self.calendar_id,
-                body=event,
-            ).execute()
+            result = await _execute(
+                _events_resource(service).insert(
+                    calendarId=self.calendar_id,
+                    body=event,
+                )
+            )
 
+            clear_availability_cache()
             logger.info("Created calendar event: %s", result.get("id"))
             return {"success": True, "event_id": result.get("id", "")}
 
@@ -209,34 +296,102 @@ class GoogleCalendarAdapter(IntegrationAdapter):
             return {"success": False, "error": str(e)}
 
     @staticmethod
-    def _parse_ics_events(ics_text: str) -> list[dict]:
-        """Parse ICS text into a list of events with start/end datetimes."""
-        events: list[dict] = []
-        lines = ics_text.split("\n")
-        in_event = False
-        event: dict = {}
-
-        for line in lines:
-            line = line.strip()
-            if line == "BEGIN:VEVENT":
-                in_event = True
-                event = {}
-            elif line == "END:VEVENT":
-                in_event = False
-                events.append(event)
-            elif in_event:
-                if line.startswith("DTSTART"):
-                    event["start"] = _parse_ics_datetime(line.split(":", 1)[-1])
-                elif line.startswith("DTEND"):
-                    event["end"] = _parse_ics_datetime(line.split(":", 1)[-1])
+    def _build_service(sa_path: str, readonly: bool = True):
+        """Return the cached Calendar API v3 client for a service account file."""
+        return _calendar_service(sa_path, readonly)
+
+    async def _list_events(self, service, start: datetime, end: datetime) -> list[dict]:
+        """List single events overlapping [start, end)."""
+        events_result = await _execute(
+            _events_resource(service).list(
+                calendarId=self.calendar_id,
+                timeMin=start.isoformat(),
+                timeMax=end.isoformat(),
+                singleEvents=True,
+                orderBy="startTime",
+            )
+        )
+        return events_result.get("items", [])
 
+    @staticmethod
+    def _availability_from_events(events: list[dict], room: str) -> dict:
+        """
+        Build availability result from overlapping events.
+
+        Room is matched against event summary (expected format: "... / <room>").
+        """
+        if not room:
+            return {"success": True, "available": len(events) == 0, "conflicting_rooms": []}
+
+        room_lower = room.lower()
+        available = True
+        busy_rooms: dict[str, None] = {}  # insertion-ordered set
+        for e in events:
+            summary = str(e.get("summary", ""))
+            if available and room_lower in summary.lower():
+                available = False
+            if "/" in summary:
+                candidate = summary.rsplit("/", 1)[-1].strip()
+                if candidate:
+                    busy_rooms[candidate] = None
+
+        return {
+            "success": True,
+            "available": available,
+            "conflicting_rooms": list(busy_rooms),
+        }
+
+    @staticmethod
+    def _parse_ics_events(
+        ics_text: str,
+        *,
+        time_min: datetime | None = None,
+        time_max: datetime | None = None,
+    ) -> list[dict]:
+        """
+        Parse ICS text into a list of events with start/end datetimes.
+
+        With an aware time_min/time_max window, UTC events ("...Z" stamps) that
+        can't overlap it are dropped by comparing the raw stamps, before any
+        datetime is built. Other events are always returned for the caller to filter.
+        """
+        lo = _ics_utc_stamp(time_min)
+        hi = _ics_utc_stamp(time_max)
+        events: list[dict] = []
+        for match in _ICS_EVENT_RE.finditer(ics_text):
+            raw: dict[str, str] = {}
+            for dt in _ICS_DT_RE.finditer(match.group(1)):
+                raw["start" if dt.group(1) == "START" else "end"] = dt.group(2).strip()
+
+            raw_start = raw.get("start", "")
+            raw_end = raw.get("end", "")
+            if len(raw_start) == len(raw_end) == 16 and raw_start[-1] == raw_end[-1] == "Z":
+                if (lo and raw_end <= lo) or (hi and raw_start >= hi):
+                    continue
+
+            events.append({key: _parse_ics_datetime(value) for key, value in raw.items()})
         return events
 
 
+def _ics_utc_stamp(dt: datetime | None) -> str | None:
+    """Format an aware datetime as an ICS UTC stamp (YYYYMMDDTHHMMSSZ)."""
+    if dt is None or dt.tzinfo is None:
+        return None
+    return dt.astimezone(UTC).strftime("%Y%m%dT%H%M%SZ")
+
+
 def _parse_ics_datetime(s: str) -> datetime | None:
     """Parse ICS datetime string (YYYYMMDDTHHMMSSZ)."""
     try:
         s = s.strip()
+        # Canonical UTC/local stamps are ISO 8601 basic format, parsed in C.
+        if (
+            (len(s) == 15 or (len(s) == 16 and s[15] == "Z"))
+            and s[8] == "T"
+            and s[:8].isdigit()
+            and s[9:15].isdigit()
+        ):
+            return datetime.fromisoformat(s)
         y = int(s[0:4])
         m = int(s[4:6])
         d = int(s[6:8])
@@ -244,9 +399,7 @@ def _parse_ics_datetime(s: str) -> datetime | None:
         mi = int(s[11:13])
         sec = int(s[13:15])
         if s.endswith("Z"):
-            from datetime import timezone
-
-            return datetime(y, m, d, h, mi, sec, tzinfo=timezone.utc)
+            return datetime(y, m, d, h, mi, sec, tzinfo=UTC)
         return datetime(y, m, d, h, mi, sec)
     except (ValueError, IndexError):
         return None
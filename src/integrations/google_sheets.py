@@ -4,13 +4,94 @@ Google Sheets Integration — log leads and bookings to a spreadsheet.
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
-from datetime import datetime
+from datetime import UTC, datetime
 
 from src.integrations.base import IntegrationAdapter
 
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=16)
+def _sheets_service(sa_path: str):
+    """Build (once per key file) an authorized Sheets API v4 client."""
+    from google.oauth2 import service_account
+    from googleapiclient.discovery import build
+
+    credentials = service_account.Credentials.from_service_account_file(
+        sa_path,
+        scopes=["https://www.googleapis.com/auth/spreadsheets"],
+    )
+    return build(
+        "sheets", "v4", credentials=credentials, cache_discovery=False, static_discovery=True
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def _values_resource(service):
+    """service.spreadsheets().values(), built once per service."""
+    return service.spreadsheets().values()
+
+
+def _execute_blocking(request):
+    """Execute on a fresh transport: the cached service's httplib2.Http is not thread-safe."""
+    import google_auth_httplib2
+    import httplib2
+
+    credentials = getattr(request.http, "credentials", None)
+    if credentials is None:
+        return request.execute()
+    http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+    return request.execute(http=http)
+
+
+# Write-behind buffer for batching adapters, keyed by (sa_path, spreadsheet_id, sheet_name).
+_BATCH_WINDOW_S = 0.25
+_BATCH_MAX_ROWS = 25
+_pending_rows: dict[tuple[str, str, str], list[list]] = {}
+_flush_task: asyncio.Task | None = None
+
+
+async def _append_rows(
+    sa_path: str, spreadsheet_id: str, sheet_name: str, rows: list[list]
+) -> dict:
+    """Append rows to a sheet with a single API call."""
+    try:
+        service = _sheets_service(sa_path)
+        request = _values_resource(service).append(
+            spreadsheetId=spreadsheet_id,
+            range=f"{sheet_name}!A1",
+            valueInputOption="USER_ENTERED",
+            insertDataOption="INSERT_ROWS",
+            body={"values": rows},
+        )
+        await asyncio.to_thread(_execute_blocking, request)
+
+        logger.info("Appended %d row(s) to %s/%s", len(rows), spreadsheet_id, sheet_name)
+        return {"success": True}
+
+    except Exception as e:
+        logger.error("Failed to append to Sheets: %s", e)
+        return {"success": False, "error": str(e)}
+
+
+async def flush_pending_rows() -> None:
+    """Write all buffered rows, one append per sheet (call at end of worker tick / on shutdown)."""
+    while _pending_rows:
+        key = next(iter(_pending_rows))
+        rows = _pending_rows.pop(key)
+        await _append_rows(*key, rows)
+
+
+async def _flush_after_window() -> None:
+    global _flush_task
+    try:
+        await asyncio.sleep(_BATCH_WINDOW_S)
+        await flush_pending_rows()
+    finally:
+        _flush_task = None
+
 
 class GoogleSheetsAdapter(IntegrationAdapter):
     """
@@ -20,9 +101,13 @@ class GoogleSheetsAdapter(IntegrationAdapter):
         service_account_path: str
         spreadsheet_id: str
         sheet_name: str — sheet tab name (default "Лиды")
+        batch: bool — buffer rows and write them in one call per sheet
+            (flushed after a short window or by flush_pending_rows(); default False)
     """
 
     integration_type = "google_sheets"
+    # Supported actions, each handled by the same-named coroutine method.
+    _ACTIONS = frozenset({"append_lead", "append_booking"})
 
     def __init__(self, config: dict):
         super().__init__(config)
@@ -30,10 +115,8 @@ class GoogleSheetsAdapter(IntegrationAdapter):
         self.sheet_name = config.get("sheet_name", "Лиды")
 
     async def execute(self, action: str, params: dict) -> dict:
-        if action == "append_lead":
-            return await self.append_lead(params)
-        elif action == "append_booking":
-            return await self.append_booking(params)
+        if action in self._ACTIONS:
+            return await getattr(self, action)(params)
         return {"success": False, "error": f"Unknown action: {action}"}
 
     async def append_lead(self, params: dict) -> dict:
@@ -52,7 +135,7 @@ class GoogleSheetsAdapter(IntegrationAdapter):
         }
         """
         row = [
-            params.get("datetime", datetime.utcnow().isoformat()),
+            params.get("datetime", datetime.now(UTC).isoformat()),
             params.get("channel", ""),
             params.get("name", ""),
             params.get("contact", ""),
@@ -77,33 +160,24 @@ class GoogleSheetsAdapter(IntegrationAdapter):
         return await self._append_row(row)
 
     async def _append_row(self, row: list) -> dict:
-        """Append a single row to the configured sheet."""
-        try:
-            from google.oauth2 import service_account
-            from googleapiclient.discovery import build
-
-            sa_path = self.config.get("service_account_path", "")
-            if not sa_path:
-                return {"success": False, "error": "No service account configured"}
-
-            credentials = service_account.Credentials.from_service_account_file(
-                sa_path,
-                scopes=["https://www.googleapis.com/auth/spreadsheets"],
-            )
-            service = build("sheets", "v4", credentials=credentials)
-
-            service.spreadsheets().values().append(
-                spreadsheetId=self.spreadsheet_id,
-                range=f"{self.sheet_name}!A1",
-                valueInputOption="USER_ENTERED",
-                insertDataOption="INSERT_ROWS",
-                body={"values": [row]},
-            ).execute()
-
-            logger.info("Appended row to %s/%s", self.spreadsheet_id, self.sheet_name)
-            return {"success": True}
-
-        except Exception as e:
-            logger.error("Failed to append to Sheets: %s", e)
-            return {"success": False, "error": str(e)}
+        """Append a single row to the configured sheet (or buffer it when batching)."""
+        global _flush_task
+
+        sa_path = self.config.get("service_account_path", "")
+        if not sa_path:
+            return {"success": False, "error": "No service account configured"}
+
+        if not self.config.get("batch"):
+            return await _append_rows(sa_path, self.spreadsheet_id, self.sheet_name, [row])
+
+        key = (sa_path, self.spreadsheet_id, self.sheet_name)
+        rows = _pending_rows.setdefault(key, [])
+        rows.append(row)
+        if len(rows) >= _BATCH_MAX_ROWS:
+            del _pending_rows[key]
+            return await _append_rows(*key, rows)
+
+        if _flush_task is None or _flush_task.get_loop() is not asyncio.get_running_loop():
+            _flush_task = asyncio.create_task(_flush_after_window())
+        return {"success": True, "queued": True}
 
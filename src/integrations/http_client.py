@@ -0,0 +1,42 @@
+"""
+Shared outbound HTTP client for integrations (Telegram notify, ICS feeds, Umnico API).
+
+One keep-alive pool per event loop (httpx connections can't cross loops).
+HTTP/2 is used when the optional `h2` package is installed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+
+import httpx
+
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+_http_client: httpx.AsyncClient | None = None
+_http_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client for the running event loop, creating it on first use."""
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        _http_client = httpx.AsyncClient(
+            http2=_HTTP2,
+            timeout=15.0,
+            limits=httpx.Limits(
+                max_connections=100, max_keepalive_connections=50, keepalive_expiry=60.0
+            ),
+        )
+        _http_client_loop = loop
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client (called on app shutdown)."""
+    global _http_client, _http_client_loop
+    client, _http_client, _http_client_loop = _http_client, None, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
+import functools
 import os
-from dataclasses import dataclass
-
-import httpx
+from dataclasses import dataclass, field
 
 from src.core.secrets import resolve_secret
+from src.integrations.http_client import get_http_client
 
 
 @dataclass
@@ -15,34 +15,24 @@ class TelegramNotifier:
     bot_token: str
     chat_id: str
     thread_id: int | None = None
+    # Per-instance constants, built once (get_notifier reuses instances).
+    url: str = field(init=False, repr=False)
+    _base_payload: dict = field(init=False, repr=False)
+    _dashboard_url: str = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+        self._base_payload = {"chat_id": self.chat_id, "disable_web_page_preview": True}
+        if self.thread_id is not None:
+            self._base_payload["message_thread_id"] = self.thread_id
+        self._dashboard_url = os.getenv("AGENTBOX_DASHBOARD_URL", "").strip().rstrip("/")
 
     @classmethod
     def from_secrets(cls, tenant_slug: str) -> "TelegramNotifier | None":
-        token = (
-            resolve_secret(tenant_slug, "telegram_bot_token")
-            or os.getenv("TELEGRAM_BOT_TOKEN")
-            or ""
-        ).strip()
-        chat_id = (
-            resolve_secret(tenant_slug, "escalation_chat_id")
-            or resolve_secret(tenant_slug, "telegram_escalation_chat_id")
-            or os.getenv("TELEGRAM_ESCALATION_CHAT_ID")
-            or ""
-        ).strip()
-        thread_raw = (
-            resolve_secret(tenant_slug, "escalation_thread_id")
-            or os.getenv("TELEGRAM_ESCALATION_THREAD_ID")
-            or ""
-        ).strip()
-
-        if not token or not chat_id:
+        settings = _resolve_settings(tenant_slug)
+        if settings is None:
             return None
-
-        thread_id: int | None = None
-        if thread_raw.isdigit():
-            thread_id = int(thread_raw)
-
-        return cls(bot_token=token, chat_id=chat_id, thread_id=thread_id)
+        return cls(*settings)
 
     async def send_escalation(
         self,
@@ -51,8 +41,6 @@ class TelegramNotifier:
         last_message: str | None,
         conversation_link: str | None = None,
     ) -> dict:
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-
         safe_client = (client_name or "Клиент").strip()
         safe_channel = (channel or "unknown").strip()
         safe_text = (last_message or "").strip()
@@ -67,22 +55,15 @@ class TelegramNotifier:
         if safe_text:
             lines.append(f"Сообщение: {safe_text}")
         if conversation_link:
-            base_url = os.getenv("AGENTBOX_DASHBOARD_URL", "").strip().rstrip("/")
+            base_url = self._dashboard_url
             full_link = f"{base_url}{conversation_link}" if base_url and conversation_link.startswith("/") else conversation_link
             lines.append(f"Диалог: {full_link}")
 
-        payload: dict = {
-            "chat_id": self.chat_id,
-            "text": "\n".join(lines),
-            "disable_web_page_preview": True,
-        }
-        if self.thread_id is not None:
-            payload["message_thread_id"] = self.thread_id
+        payload = {**self._base_payload, "text": "\n".join(lines)}
 
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                resp = await client.post(url, json=payload)
-                data = resp.json()
+            resp = await get_http_client().post(self.url, json=payload)
+            data = resp.json()
 
             if resp.status_code == 200 and data.get("ok"):
                 result = data.get("result") or {}
@@ -94,3 +75,51 @@ class TelegramNotifier:
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
+
+
+def _resolve_settings(tenant_slug: str) -> tuple[str, str, int | None] | None:
+    """(bot_token, chat_id, thread_id) from tenant secrets / env, or None if not configured."""
+    token = (
+        resolve_secret(tenant_slug, "telegram_bot_token")
+        or os.getenv("TELEGRAM_BOT_TOKEN")
+        or ""
+    ).strip()
+    chat_id = (
+        resolve_secret(tenant_slug, "escalation_chat_id")
+        or resolve_secret(tenant_slug, "telegram_escalation_chat_id")
+        or os.getenv("TELEGRAM_ESCALATION_CHAT_ID")
+        or ""
+    ).strip()
+    thread_raw = (
+        resolve_secret(tenant_slug, "escalation_thread_id")
+        or os.getenv("TELEGRAM_ESCALATION_THREAD_ID")
+        or ""
+    ).strip()
+
+    if not token or not chat_id:
+        return None
+
+    thread_id: int | None = None
+    if thread_raw.isdigit():
+        thread_id = int(thread_raw)
+
+    return token, chat_id, thread_id
+
+
+@functools.lru_cache(maxsize=32)
+def _notifier_for(bot_token: str, chat_id: str, thread_id: int | None) -> TelegramNotifier:
+    return TelegramNotifier(bot_token=bot_token, chat_id=chat_id, thread_id=thread_id)
+
+
+def get_notifier(tenant_slug: str) -> TelegramNotifier | None:
+    """
+    Per-tenant notifier.
+
+    Secrets are resolved on every call (cheap: files are stat-cached), so a new or
+    removed token takes effect immediately; the notifier itself is reused for as
+    long as its settings are unchanged.
+    """
+    settings = _resolve_settings(tenant_slug)
+    if settings is None:
+        return None
+    return _notifier_for(*settings)
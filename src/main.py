@@ -16,6 +16,8 @@ from src.api.v1.tenants import router as tenants_router
 from src.api.v1.webhooks import router as webhooks_router
 from src.config import get_settings
 from src.db import engine
+from src.integrations.google_sheets import flush_pending_rows
+from src.integrations.http_client import close_http_client
 
 
 settings = get_settings()
@@ -30,6 +32,8 @@ async def lifespan(app: FastAPI):
     try:
         yield
     finally:
+        await flush_pending_rows()
+        await close_http_client()
         await engine.dispose()
         logger.info("Application shutdown completed")
 
@@ -44,14 +48,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-origins = (
-    [o.strip() for o in settings.allowed_origins.split(",") if o.strip()]
-    if settings.allowed_origins != "*"
-    else ["*"]
-)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=origins,
+    allow_origins=settings.allowed_origins_list,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from uuid import UUID
 
-from sqlalchemy import Boolean, ForeignKey, Index, String, UniqueConstraint
+from sqlalchemy import Boolean, ForeignKey, Index, String, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -14,6 +14,8 @@ class Agent(UUIDMixin, TimestampMixin, Base):
     __table_args__ = (
         UniqueConstraint("tenant_id", "slug", name="uq_agents_tenant_id_slug"),
         Index("ix_agents_tenant_id", "tenant_id"),
+        # The poller selects active agents every few seconds, ordered by id.
+        Index("ix_agents_active_true", "id", postgresql_where=text("is_active")),
     )
 
     tenant_id: Mapped[UUID] = mapped_column(
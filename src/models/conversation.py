@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from uuid import UUID
 
-from sqlalchemy import Boolean, ForeignKey, Index, String, Text, UniqueConstraint
+from sqlalchemy import Boolean, ForeignKey, Index, String, Text, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -31,7 +31,7 @@ class Conversation(UUIDMixin, TimestampMixin, Base):
     lead_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     lead_phone: Mapped[str | None] = mapped_column(String(64), nullable=True)
     lead_email: Mapped[str | None] = mapped_column(String(255), nullable=True)
-    state: Mapped[dict] = mapped_column(JSONB, default=dict, nullable=False)
+    state: Mapped[dict] = mapped_column(JSONB, server_default=text("'{}'::jsonb"), nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
 
     agent: Mapped["Agent"] = relationship(back_populates="conversations")
@@ -44,7 +44,7 @@ class Conversation(UUIDMixin, TimestampMixin, Base):
 class Message(UUIDMixin, TimestampMixin, Base):
     __tablename__ = "messages"
     __table_args__ = (
-        Index("ix_messages_conversation_id", "conversation_id"),
+        Index("ix_messages_conversation_id_created_at", "conversation_id", "created_at"),
         Index("ix_messages_created_at", "created_at"),
     )
 
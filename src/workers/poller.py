@@ -16,28 +16,103 @@ Workflow per tick:
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
+import json
 import logging
-
+import threading
+import time
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from celery.signals import worker_process_init
+from redis.asyncio import Redis
+
+# Imported for registration side effects: get_channel_adapter() relies on
+# CHANNEL_REGISTRY being populated.
+import src.channels.umnico  # noqa: F401
+from src.config import get_settings
+from src.integrations.google_sheets import GoogleSheetsAdapter, flush_pending_rows
 from src.workers.celery_app import celery_app
 
 logger = logging.getLogger(__name__)
 
 
-# State: track last processed message per conversation to avoid duplicates.
-# In production, this should be in Redis. For now, in-memory dict.
-_last_message_ids: dict[str, str] = {}
+# Dedup: the user row stored with each reply (metadata.channel_message_id) is the
+# authority on what was answered. Redis SET NX is only a fast path that drops
+# repeats of recent ids before they reach the DB, and lets parallel workers
+# claim a message; its TTL just bounds memory.
+_DEDUP_TTL_S = 86400
+_dedup_redis: Redis | None = None
+_dedup_redis_loop: asyncio.AbstractEventLoop | None = None
+
+# Agents polled at once per tick (each holds a DB connection while it runs).
+_POLL_CONCURRENCY = 10
+
+# Poll-based channels per agent, keyed by the agent row's updated_at they were derived from.
+_POLL_CHANNEL_TYPES = frozenset({"umnico"})
+_agent_poll_channels_cache: dict[UUID, tuple[datetime, list[dict]]] = {}
+
+# Tenants without an Umnico token are skipped until this monotonic time.
+_NO_TOKEN_TTL_S = 300.0
+_no_token_until: dict[str, float] = {}
+
+# Polling errors: one traceback per (agent, channel type) per window, the rest are counted.
+_ERROR_LOG_WINDOW_S = 60.0
+_poll_errors: dict[tuple, tuple[float, int]] = {}
+
+# Message batches at least this large are written with COPY instead of INSERT.
+_COPY_THRESHOLD = 500
+
+
+def _get_dedup_redis() -> Redis:
+    global _dedup_redis, _dedup_redis_loop
+    loop = asyncio.get_running_loop()
+    if _dedup_redis is None or _dedup_redis_loop is not loop:
+        _dedup_redis = Redis.from_url(get_settings().redis_url)
+        _dedup_redis_loop = loop
+    return _dedup_redis
+
+
+async def _first_seen(agent_id, channel_conversation_id: str, channel_message_id: str) -> bool:
+    """
+    Claim a polled message in Redis; False if it was claimed before.
 
-# Keep one asyncio loop per worker process. Creating a new loop for each Celery tick
-# causes asyncpg/SQLAlchemy "attached to a different loop" and "another operation in progress".
+    True when Redis is unreachable: the DB check in _poll_agent() still decides.
+    """
+    key = f"poll:seen:{agent_id}:{channel_conversation_id}:{channel_message_id}"
+    try:
+        return bool(await _get_dedup_redis().set(key, 1, nx=True, ex=_DEDUP_TTL_S))
+    except Exception as e:
+        logger.warning("Poll dedup via Redis failed, relying on the DB check: %s", e)
+        return True
+
+
+# Keep one asyncio loop per worker process, running forever in a background thread.
+# Creating a new loop for each Celery tick causes asyncpg/SQLAlchemy "attached to a
+# different loop" and "another operation in progress"; a persistent loop also keeps
+# the DB pool, Redis and HTTP connections warm between ticks.
 _worker_loop: asyncio.AbstractEventLoop | None = None
+_worker_loop_lock = threading.Lock()
+
+# Upper bound on one tick; a stuck tick is cancelled so the next one can run.
+_TICK_TIMEOUT_S = 120.0
 
 
 def _get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Return the worker's background event loop, starting its thread on first use."""
     global _worker_loop
-    if _worker_loop is None or _worker_loop.is_closed():
-        _worker_loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(_worker_loop)
-    return _worker_loop
+    with _worker_loop_lock:
+        if _worker_loop is None or _worker_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="poller-loop", daemon=True).start()
+            _worker_loop = loop
+        return _worker_loop
+
+
+@worker_process_init.connect
+def _start_worker_loop(**_kwargs) -> None:
+    """Start the loop thread when a worker process boots, not on its first tick."""
+    _get_worker_loop()
 
 
 @celery_app.task(name="agentbox.poll_channels")
@@ -47,8 +122,12 @@ def poll_channels_task():
 
     Scheduled via celery beat (every 3-5 seconds).
     """
-    loop = _get_worker_loop()
-    loop.run_until_complete(_poll_channels())
+    future = asyncio.run_coroutine_threadsafe(_poll_channels(), _get_worker_loop())
+    try:
+        future.result(timeout=_TICK_TIMEOUT_S)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        logger.error("Polling tick exceeded %.0fs; cancelled", _TICK_TIMEOUT_S)
 
 
 async def _poll_channels():
@@ -57,83 +136,284 @@ async def _poll_channels():
 
     1. Query all active agents from DB
     2. For each agent with poll-based channels -> fetch messages -> process -> reply
+       (agents are polled concurrently, each in its own DB session)
     """
     from sqlalchemy import select
 
-    # Import channel modules for registration side effects.
-    # Poller uses `get_channel_adapter()`, which relies on CHANNEL_REGISTRY being populated.
-    import src.channels.umnico  # noqa: F401
-
-    from src.channels import get_channel_adapter
-    from src.core.brain import Brain
-    from src.core.config_loader import load_tenant_config
-    from src.core.secrets import resolve_secret
-    from src.core.crud import (
-        get_conversation_history,
-        get_or_create_conversation,
-        save_message,
-    )
-    from src.core.pipeline import MessagePipeline, PipelineContext
     from src.db import async_session
     from src.models import Agent, Tenant
 
     async with async_session() as db:
-        # 1. Load active agents.
+        # 1. Load active agents (plain rows: only the columns polling needs).
         result = await db.execute(
-            select(Agent, Tenant)
+            select(
+                Agent.id,
+                Agent.slug,
+                Agent.config,
+                Agent.updated_at,
+                Tenant.id.label("tenant_id"),
+                Tenant.slug.label("tenant_slug"),
+            )
             .join(Tenant, Agent.tenant_id == Tenant.id)
             .where(Agent.is_active == True)  # noqa: E712
+            .order_by(Agent.id)
         )
         rows = result.all()
 
-        for agent, tenant in rows:
-            agent_config_dict = agent.config or {}
-            channels = agent_config_dict.get("channels", [])
+    # 2. Agents are independent: overlap their channel/LLM/DB round-trips, bounded so
+    # a tick can't take more connections than the pool has.
+    semaphore = asyncio.Semaphore(_POLL_CONCURRENCY)
 
-            # Filter poll-based channels.
-            poll_channels = [ch for ch in channels if ch.get("type") in ("umnico",)]
+    async def _bounded(agent) -> None:
+        async with semaphore:
+            await _poll_agent(agent)
 
-            for ch_config in poll_channels:
-                try:
-                    umnico_token = (
-                        resolve_secret(tenant.slug, "umnico_api_token")
-                        or resolve_secret(tenant.slug, "umnico_token")
-                    )
-                    if not umnico_token:
-                        logger.warning("Umnico token missing for tenant=%s; skip polling", tenant.slug)
-                        continue
-
-                    ch_config_resolved = {**ch_config.get("config", {}), "token": umnico_token}
-                    adapter = get_channel_adapter(ch_config["type"], ch_config_resolved)
-                    messages = await adapter.receive()
-
-                    for msg in messages:
-                        # Dedup: skip if we already processed this message.
-                        dedup_key = f"{agent.id}:{msg.channel_conversation_id}"
-                        if _last_message_ids.get(dedup_key) == msg.channel_message_id:
-                            continue
-                        _last_message_ids[dedup_key] = msg.channel_message_id
-
-                        # Get or create conversation.
-                        conv, is_new = await get_or_create_conversation(
-                            db,
-                            agent_id=agent.id,
-                            channel_type=msg.channel_type,
-                            channel_conversation_id=msg.channel_conversation_id,
-                        )
+    results = await asyncio.gather(*(_bounded(agent) for agent in rows), return_exceptions=True)
+    for agent, outcome in zip(rows, results, strict=True):
+        if isinstance(outcome, BaseException):
+            logger.error("Polling failed for agent %s: %s", agent.id, outcome)
 
-                        # Load history.
-                        history = await get_conversation_history(
-                            db,
-                            conv.id,
-                            limit=agent_config_dict.get("llm", {}).get("max_history", 20),
-                        )
+    # Lead rows are buffered per sheet during the tick; write them in one call each.
+    await flush_pending_rows()
+
+
+async def _write_messages(db, rows: list) -> None:
+    """
+    Add queued Message rows to the session, or COPY them straight into `messages`
+    when the batch is large (skips per-row INSERT parsing/planning).
+    """
+    if len(rows) < _COPY_THRESHOLD:
+        db.add_all(rows)
+        return
+
+    # COPY runs on the session's connection, inside its transaction; created_at and
+    # updated_at are left to their server defaults, like ORM inserts.
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        "messages",
+        columns=["id", "conversation_id", "role", "content", "metadata"],
+        records=[
+            (
+                row.id or uuid4(),
+                row.conversation_id,
+                row.role,
+                row.content,
+                None if row.metadata_ is None else json.dumps(row.metadata_, ensure_ascii=False),
+            )
+            for row in rows
+        ],
+    )
+
+
+async def _apply_conversation_updates(db, conv_updates: dict[UUID, dict]) -> None:
+    """
+    Write the tick's final state per conversation in one executemany UPDATE.
+
+    Lead name/phone only fill empty columns (COALESCE), so no loaded values are compared.
+    """
+    if not conv_updates:
+        return
+
+    from sqlalchemy import bindparam, func, update
+
+    from src.models import Conversation
+
+    table = Conversation.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("p_id"))
+        .values(
+            state=bindparam("p_state"),
+            lead_name=func.coalesce(table.c.lead_name, bindparam("p_lead_name")),
+            lead_phone=func.coalesce(table.c.lead_phone, bindparam("p_lead_phone")),
+        )
+    )
+    await db.execute(
+        stmt,
+        [
+            {
+                "p_id": conv_id,
+                "p_state": fields["state"],
+                "p_lead_name": fields.get("lead_name"),
+                "p_lead_phone": fields.get("lead_phone"),
+            }
+            for conv_id, fields in conv_updates.items()
+        ],
+    )
+
+
+def _log_poll_error(agent_id, channel_type: str | None, error: Exception) -> None:
+    """Log a channel polling failure, rate-limited so a sustained outage doesn't flood the log."""
+    key = (agent_id, channel_type)
+    now = time.monotonic()
+    logged_at, suppressed = _poll_errors.get(key, (float("-inf"), 0))
+    if now - logged_at < _ERROR_LOG_WINDOW_S:
+        _poll_errors[key] = (logged_at, suppressed + 1)
+        return
+
+    _poll_errors[key] = (now, 0)
+    logger.error(
+        "Polling error for agent %s, channel %s: %s (%d similar errors suppressed)",
+        agent_id,
+        channel_type,
+        error,
+        suppressed,
+        exc_info=error,
+    )
+
+
+def _resolve_umnico_token(tenant_slug: str) -> str | None:
+    """Umnico token of a tenant; a missing token is remembered for _NO_TOKEN_TTL_S."""
+    from src.core.secrets import resolve_secret
+
+    now = time.monotonic()
+    if _no_token_until.get(tenant_slug, 0.0) > now:
+        return None
+
+    token = (
+        resolve_secret(tenant_slug, "umnico_api_token")
+        or resolve_secret(tenant_slug, "umnico_token")
+    )
+    if not token:
+        if tenant_slug not in _no_token_until:
+            logger.warning("Umnico token missing for tenant=%s; skip polling", tenant_slug)
+        _no_token_until[tenant_slug] = now + _NO_TOKEN_TTL_S
+        return None
 
-                        # Load tenant config for knowledge base.
-                        tenant_cfg = load_tenant_config(f"tenants/{tenant.slug}")
+    _no_token_until.pop(tenant_slug, None)
+    return token
 
-                        # Build context.
-                        msg.metadata["conversation_state"] = conv.state or {}
+
+def _get_poll_channels(agent) -> list[dict]:
+    """Poll-based channel configs of an agent, re-derived only when the agent row changed."""
+    cached = _agent_poll_channels_cache.get(agent.id)
+    if cached is not None and cached[0] == agent.updated_at:
+        return cached[1]
+
+    channels = (agent.config or {}).get("channels", [])
+    poll_channels = [ch for ch in channels if ch.get("type") in _POLL_CHANNEL_TYPES]
+    _agent_poll_channels_cache[agent.id] = (agent.updated_at, poll_channels)
+    return poll_channels
+
+
+async def _poll_agent(agent) -> None:
+    """
+    Poll one agent's channels and reply to new messages, committing in its own session.
+
+    `agent` is a row from _poll_channels() (agent columns plus tenant_id/tenant_slug).
+    """
+    from src.channels import get_channel_adapter
+    from src.core.brain import Brain
+    from src.core.config_loader import load_tenant_config_cached
+    from src.core.crud import (
+        get_answered_channel_message_ids,
+        get_conversation_history,
+        get_or_create_conversations,
+    )
+    from src.core.pipeline import MessagePipeline, PipelineContext
+    from src.core.runtime_config import config_version
+    from src.core.secrets import resolve_secret
+    from src.db import async_session
+    from src.models import Message
+
+    poll_channels = _get_poll_channels(agent)
+    if not poll_channels:
+        return
+    umnico_token = _resolve_umnico_token(agent.tenant_slug)
+    if not umnico_token:
+        return
+
+    async with async_session() as db:
+        # Tenant config, its version and the pipeline are built on the first new
+        # message and shared by the rest of this agent's messages.
+        tenant_cfg = None
+        cfg_version = ""
+        pipeline = None
+        sheets_config: dict | None = None
+        # Final state/lead fields per conversation, written with one UPDATE each at the end.
+        conv_updates: dict[UUID, dict] = {}
+        history_limit = (agent.config or {}).get("llm", {}).get("max_history", 20)
+        # Lead rows go to Google Sheets off the message path; awaited before the commit.
+        sheets_tasks: list[asyncio.Task] = []
+
+        for ch_config in poll_channels:
+            # User/assistant rows for this channel batch, inserted together by the
+            # next autoflush (or the tick's commit) instead of one flush per row.
+            pending_messages: list[Message] = []
+            try:
+                ch_config_resolved = {**ch_config.get("config", {}), "token": umnico_token}
+                adapter = get_channel_adapter(ch_config["type"], ch_config_resolved)
+                messages = await adapter.receive()
+
+                # Dedup fast path: skip messages recently claimed in Redis.
+                new_messages = [
+                    msg
+                    for msg in messages
+                    if await _first_seen(
+                        agent.id, msg.channel_conversation_id, msg.channel_message_id
+                    )
+                ]
+
+                # Get or create all conversations of the batch at once.
+                convs = await get_or_create_conversations(
+                    db,
+                    agent.id,
+                    ((msg.channel_type, msg.channel_conversation_id) for msg in new_messages),
+                )
+
+                # Dedup authority: skip messages that already have a stored reply.
+                answered = await get_answered_channel_message_ids(
+                    db,
+                    (conv.id for conv in convs.values()),
+                    (msg.channel_message_id for msg in new_messages),
+                )
+                new_messages = [
+                    msg
+                    for msg in new_messages
+                    if (
+                        convs[(msg.channel_type, msg.channel_conversation_id)].id,
+                        msg.channel_message_id,
+                    )
+                    not in answered
+                ]
+
+                # Messages of one conversation are processed together: its history is
+                # loaded once and extended in memory with each answered turn.
+                grouped: dict[tuple[str, str], list] = {}
+                for msg in new_messages:
+                    conv_key = (msg.channel_type, msg.channel_conversation_id)
+                    grouped.setdefault(conv_key, []).append(msg)
+
+                for conv_key, conv_messages in grouped.items():
+                    conv = convs[conv_key]
+
+                    # Load history.
+                    history = await get_conversation_history(db, conv.id, limit=history_limit)
+
+                    for msg in conv_messages:
+                        # Load tenant config for knowledge base, and create brain and pipeline.
+                        if tenant_cfg is None:
+                            tenant_cfg = load_tenant_config_cached(f"tenants/{agent.tenant_slug}")
+                            cfg_version = config_version(
+                                tenant_cfg.agent, tenant_cfg.dialogue_policy
+                            )
+                            api_key = resolve_secret(agent.tenant_slug, "openai_key")
+                            brain = Brain.from_config(tenant_cfg.agent.llm, api_key=api_key)
+                            pipeline = MessagePipeline(brain=brain, db_session=db)
+
+                            # Lead logging to Google Sheets (optional, configured via actions.yaml).
+                            if tenant_cfg.sheets_action is not None:
+                                sheets_config = {"batch": True, **tenant_cfg.sheets_action.config}
+                                sa_path = resolve_secret(agent.tenant_slug, "google_sa_path")
+                                if sa_path:
+                                    sheets_config["service_account_path"] = sa_path
+
+                        # Build context. config_version also keys the prompt-prefix cache.
+                        # State from an earlier message of this tick wins over the loaded row.
+                        state = conv_updates.get(conv.id, {}).get("state", conv.state)
+                        msg.metadata["conversation_state"] = state or {}
+                        msg.metadata["config_version"] = cfg_version
 
                         ctx = PipelineContext(
                             incoming=msg,
@@ -143,11 +423,6 @@ async def _poll_channels():
                             history=history,
                         )
 
-                        # Create brain and pipeline.
-                        api_key = resolve_secret(tenant.slug, "openai_key")
-                        brain = Brain.from_config(tenant_cfg.agent.llm, api_key=api_key)
-                        pipeline = MessagePipeline(brain=brain, db_session=db)
-
                         # Process.
                         ctx = await pipeline.process(ctx)
 
@@ -168,46 +443,57 @@ async def _poll_channels():
                             )
 
                             if sent:
-                                # Save messages to DB.
-                                await save_message(db, conv.id, "user", msg.text)
-                                await save_message(
-                                    db,
-                                    conv.id,
-                                    "assistant",
-                                    ctx.outgoing.text,
-                                    metadata=ctx.outgoing.metadata,
+                                # Queue messages for the batch insert.
+                                pending_messages.append(
+                                    Message(
+                                        conversation_id=conv.id,
+                                        role="user",
+                                        content=msg.text,
+                                        metadata_={"channel_message_id": msg.channel_message_id},
+                                    )
+                                )
+                                pending_messages.append(
+                                    Message(
+                                        conversation_id=conv.id,
+                                        role="assistant",
+                                        content=ctx.outgoing.text,
+                                        metadata_=ctx.outgoing.metadata or {},
+                                    )
                                 )
 
                                 # Log lead to Google Sheets (optional, configured via actions.yaml).
-                                from src.integrations.google_sheets import GoogleSheetsAdapter
-
-                                sheets_actions = [a for a in tenant_cfg.actions if a.type == "google_sheets"]
-                                if sheets_actions:
-                                    sheets_config = {**sheets_actions[0].config}
-                                    sa_path = resolve_secret(tenant.slug, "google_sa_path")
-                                    if sa_path:
-                                        sheets_config["service_account_path"] = sa_path
+                                if sheets_config is not None:
                                     sheets = GoogleSheetsAdapter(sheets_config)
-                                    await sheets.execute(
-                                        "append_lead",
-                                        {
-                                            "channel": msg.channel_type,
-                                            "name": msg.sender_name or "",
-                                            "contact": msg.sender_phone or "",
-                                            "message": msg.text,
-                                        },
+                                    sheets_tasks.append(
+                                        asyncio.create_task(
+                                            sheets.execute(
+                                                "append_lead",
+                                                {
+                                                    "channel": msg.channel_type,
+                                                    "name": msg.sender_name or "",
+                                                    "contact": msg.sender_phone or "",
+                                                    "message": msg.text,
+                                                },
+                                            )
+                                        )
                                     )
 
                                 # Update conversation state.
-                                conv.state = msg.metadata.get("conversation_state", {})
-
-                                # Update lead info if available.
-                                if msg.sender_name and not conv.lead_name:
-                                    conv.lead_name = msg.sender_name
-                                if msg.sender_phone and not conv.lead_phone:
-                                    conv.lead_phone = msg.sender_phone
-
-                                await db.flush()
+                                updates = conv_updates.setdefault(conv.id, {})
+                                updates["state"] = msg.metadata.get("conversation_state", {})
+
+                                # Lead info, if available (only fills empty columns).
+                                if msg.sender_name:
+                                    updates.setdefault("lead_name", msg.sender_name)
+                                if msg.sender_phone:
+                                    updates.setdefault("lead_phone", msg.sender_phone)
+
+                                # The next message of this conversation sees the answered turn.
+                                history = [
+                                    *history,
+                                    {"role": "user", "content": msg.text},
+                                    {"role": "assistant", "content": ctx.outgoing.text},
+                                ][-history_limit:]
 
                         logger.info(
                             "Processed message for agent %s: [%s] -> %s",
@@ -216,14 +502,19 @@ async def _poll_channels():
                             (ctx.outgoing.text[:30] + "...") if ctx.outgoing else "(no reply)",
                         )
 
-                except Exception as e:
-                    logger.exception(
-                        "Polling error for agent %s, channel %s: %s",
-                        agent.id,
-                        ch_config.get("type"),
-                        e,
-                    )
+            except Exception as e:
+                _log_poll_error(agent.id, ch_config.get("type"), e)
+
+            # Also after a failure: these replies were already sent.
+            await _write_messages(db, pending_messages)
+
+        for outcome in await asyncio.gather(*sheets_tasks, return_exceptions=True):
+            if isinstance(outcome, BaseException):
+                logger.error(
+                    "Lead logging to Google Sheets failed for agent %s: %s", agent.id, outcome
+                )
 
+        await _apply_conversation_updates(db, conv_updates)
         await db.commit()
 
 
@@ -0,0 +1,145 @@
+"""
+Shared fixtures. Session fixtures are built once per process (once per worker under
+`pytest -n auto`); load_tenant_config only reads files, so workers don't contend.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Callable, Iterator
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any
+from unittest.mock import AsyncMock
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src.core.config_loader import load_tenant_config
+from src.core.contracts import ContractValidator
+from src.core.intent_lock import IntentLock
+from src.core.intent_router import IntentRouter
+from src.core.pipeline import OutgoingMessage
+from src.core.postprocess import Postprocessor
+from src.core.schemas import IntentConfig, TenantFullConfig
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+
+def areturn(value: Any) -> Callable[..., Any]:
+    """Coroutine function returning `value`; cheaper than AsyncMock when nothing asserts on it."""
+
+    async def _stub(*_args: Any, **_kwargs: Any) -> Any:
+        return value
+
+    return _stub
+
+
+def pytest_asyncio_loop_factories(config, item):
+    """Run async tests on uvloop (installed with uvicorn[standard]) when it's available."""
+    try:
+        import uvloop
+    except ImportError:
+        return {"asyncio": asyncio.new_event_loop}
+    return {"uvloop": uvloop.new_event_loop}
+
+
+@pytest.fixture(scope="session")
+def jone_cfg() -> TenantFullConfig:
+    """J-One tenant config, parsed once per session. Shared: tests must not mutate it."""
+    return load_tenant_config("tenants/j-one-studio")
+
+
+@pytest.fixture(scope="session")
+def jone_router(jone_cfg: TenantFullConfig) -> IntentRouter:
+    return IntentRouter(jone_cfg.dialogue_policy.intents)
+
+
+@pytest.fixture(scope="session")
+def jone_validator(jone_cfg: TenantFullConfig) -> ContractValidator:
+    return ContractValidator(jone_cfg.agent.style)
+
+
+@pytest.fixture(scope="session")
+def jone_postprocessor(jone_cfg: TenantFullConfig) -> Postprocessor:
+    return Postprocessor(jone_cfg.agent.style)
+
+
+@pytest.fixture(scope="session")
+def jone_intents(jone_cfg: TenantFullConfig) -> list[IntentConfig]:
+    return jone_cfg.dialogue_policy.intents
+
+
+@pytest.fixture(scope="session")
+def intent_lock() -> IntentLock:
+    """IntentLock keeps no state of its own (it lives in the passed dict), so one is enough."""
+    return IntentLock(lock_turns=2)
+
+
+@pytest.fixture(scope="session")
+def app() -> FastAPI:
+    """The FastAPI app, imported on first use so non-API test runs skip its import graph."""
+    from src.main import app as _app
+
+    return _app
+
+
+@pytest.fixture(scope="session")
+async def async_client(app: FastAPI) -> AsyncIterator[AsyncClient]:
+    """One in-process HTTP client for the FastAPI app, shared by all API tests."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def override_db(app: FastAPI) -> Iterator[Callable[[Any], None]]:
+    """Serve `get_db` from the given stand-in session for one test."""
+    from src.db import get_db
+
+    def _install(db: Any) -> None:
+        async def _get_db():
+            yield db
+
+        app.dependency_overrides[get_db] = _get_db
+
+    yield _install
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture
+def pipeline_stubs(monkeypatch: pytest.MonkeyPatch) -> SimpleNamespace:
+    """
+    Stub out everything a webhook touches behind the DB row lookup: conversation CRUD,
+    the pipeline (replies "ok"), Telegram send and secrets. monkeypatch undoes it all.
+    """
+    conversation = SimpleNamespace(
+        id="11111111-1111-1111-1111-111111111111", state={}, lead_name=None
+    )
+    # Only save_message is an AsyncMock (tests may assert what was stored).
+    stubs = SimpleNamespace(
+        conversation=conversation,
+        get_or_create_conversation=areturn((conversation, True)),
+        get_conversation_history=areturn([]),
+        save_message=AsyncMock(return_value=None),
+        send=areturn(True),
+        secrets={"openai_key": "sk-test", "telegram_bot_token": "tg-test"},
+    )
+
+    async def _fake_process(self, ctx):  # noqa: ANN001
+        ctx.outgoing = OutgoingMessage(
+            text="ok",
+            conversation_id=ctx.incoming.metadata.get("conversation_id", ""),
+            channel_conversation_id=ctx.incoming.channel_conversation_id,
+            metadata={},
+        )
+        return ctx
+
+    for name in ("get_or_create_conversation", "get_conversation_history", "save_message"):
+        monkeypatch.setattr(f"src.core.crud.{name}", getattr(stubs, name))
+    monkeypatch.setattr("src.core.pipeline.MessagePipeline.process", _fake_process)
+    monkeypatch.setattr("src.channels.telegram.TelegramAdapter.send", stubs.send)
+    monkeypatch.setattr(
+        "src.api.v1.webhooks.resolve_secret",
+        lambda _tenant_slug, secret_name: stubs.secrets.get(secret_name),
+    )
+    return stubs
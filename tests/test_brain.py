@@ -83,3 +83,27 @@ def test_prompt_builder_with_extra_context_has_context_section():
         agent_config=agent, knowledge={}, extra_context="Calendar: free slots"
     )
     assert "## CURRENT CONTEXT" in prompt
+
+
+def test_prompt_builder_reuses_cached_prefix_and_keeps_it_first():
+    agent = AgentConfig(
+        id="a1",
+        name="Agent",
+        identity=AgentIdentity(role="Support", persona="Helpful"),
+        rules=[],
+        llm=LLMConfig(),
+    )
+    knowledge = {"pricing": "4990"}
+    kb_hash = PromptBuilder.knowledge_hash(knowledge)
+
+    first = PromptBuilder.build(agent, knowledge, config_version="v1", knowledge_hash=kb_hash)
+    second = PromptBuilder.build(
+        agent, knowledge, flow_stage="offer", config_version="v1", knowledge_hash=kb_hash
+    )
+    uncached = PromptBuilder.build(agent, knowledge)
+
+    prefix = first.split("## ТЕКУЩАЯ ДАТА И ВРЕМЯ")[0]
+    assert prefix.startswith("## РОЛЬ")
+    assert second.startswith(prefix)
+    assert uncached.startswith(prefix)
+    assert kb_hash != PromptBuilder.knowledge_hash({"pricing": "5990"})
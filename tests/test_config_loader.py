@@ -4,7 +4,7 @@ from pathlib import Path
 
 import pytest
 
-from src.core.config_loader import list_tenants, load_tenant_config
+from src.core.config_loader import list_tenants, load_tenant_config, load_tenant_config_cached
 
 
 def test_load_template_config_does_not_crash():
@@ -62,3 +62,61 @@ def test_missing_agent_yaml_raises(tmp_path: Path):
     with pytest.raises(FileNotFoundError):
         load_tenant_config(tenant_dir)
 
+
+
+def test_cached_config_reused_until_files_change(tmp_path: Path):
+    import os
+
+    tenant_dir = tmp_path / "t2"
+    (tenant_dir / "knowledge").mkdir(parents=True)
+    agent_yaml = tenant_dir / "agent.yaml"
+    agent_yaml.write_text(
+        "agent:\n  id: t2\n  name: Первый\n  identity:\n    role: r\n    persona: p\n",
+        encoding="utf-8",
+    )
+
+    first = load_tenant_config_cached(tenant_dir)
+    assert load_tenant_config_cached(tenant_dir) is first
+
+    agent_yaml.write_text(
+        "agent:\n  id: t2\n  name: Второй\n  identity:\n    role: r\n    persona: p\n",
+        encoding="utf-8",
+    )
+    st = agent_yaml.stat()
+    os.utime(agent_yaml, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    second = load_tenant_config_cached(tenant_dir)
+    assert second is not first
+    assert second.agent.name == "Второй"
+
+    (tenant_dir / "knowledge" / "faq.md").write_text("# FAQ", encoding="utf-8")
+    third = load_tenant_config_cached(tenant_dir)
+    assert third is not second
+    assert "faq" in third.knowledge
+
+
+def test_sheets_action_resolved_at_load(tmp_path: Path):
+    tenant_dir = tmp_path / "t3"
+    tenant_dir.mkdir()
+    (tenant_dir / "agent.yaml").write_text(
+        "agent:\n  id: t3\n  name: T\n  identity:\n    role: r\n    persona: p\n", encoding="utf-8"
+    )
+    (tenant_dir / "actions.yaml").write_text(
+        """
+actions:
+  - id: calendar
+    type: google_calendar
+    trigger: booking
+  - id: leads
+    type: google_sheets
+    trigger: lead
+    config:
+      spreadsheet_id: "abc"
+""".lstrip(),
+        encoding="utf-8",
+    )
+
+    cfg = load_tenant_config(tenant_dir)
+    assert cfg.sheets_action is not None
+    assert cfg.sheets_action.id == "leads"
+    assert "_sheets_action" not in cfg.model_dump()
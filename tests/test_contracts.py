@@ -1,83 +1,73 @@
 from __future__ import annotations
 
-from src.core.config_loader import load_tenant_config
+import pytest
+
 from src.core.contracts import ContractValidator
 from src.core.intent_router import IntentRouter
-
-
-def _validator() -> tuple[ContractValidator, IntentRouter]:
-    cfg = load_tenant_config("tenants/j-one-studio")
-    return ContractValidator(cfg.agent.style), IntentRouter(cfg.dialogue_policy.intents)
-
-
-def test_pricing_contract_ok():
-    validator, router = _validator()
-    contract = router.get_intent_config("PRICING").contract  # type: ignore[union-attr]
-    result = validator.validate("Стоимость 4990₽/час", contract)
-    assert result.ok is True
-
-
-def test_pricing_contract_must_include_fails():
-    validator, router = _validator()
-    contract = router.get_intent_config("PRICING").contract  # type: ignore[union-attr]
-    result = validator.validate("Стоимость указана на сайте", contract)
-    assert result.ok is False
-    assert any("must_include" in v for v in result.violations)
-
-
-def test_pricing_contract_forbidden_fails():
-    validator, router = _validator()
-    contract = router.get_intent_config("PRICING").contract  # type: ignore[union-attr]
-    result = validator.validate("4990₽, адрес: Нижняя Сыромятническая", contract)
-    assert result.ok is False
-    assert any("forbidden" in v for v in result.violations)
-
-
-def test_address_contract_ok():
-    validator, router = _validator()
-    contract = router.get_intent_config("ADDRESS").contract  # type: ignore[union-attr]
-    result = validator.validate("Адрес: Нижняя Сыромятническая 11", contract)
-    assert result.ok is True
-
-
-def test_address_contract_forbidden_price_fails():
-    validator, router = _validator()
-    contract = router.get_intent_config("ADDRESS").contract  # type: ignore[union-attr]
-    result = validator.validate("Цена 4990₽, адрес: Нижняя Сыромятническая 11", contract)
-    assert result.ok is False
-    assert any("forbidden" in v for v in result.violations)
-
-
-def test_rooms_contract_ok():
-    validator, router = _validator()
-    contract = router.get_intent_config("ROOMS").contract  # type: ignore[union-attr]
-    result = validator.validate("У нас есть Агат и Карелия", contract)
-    assert result.ok is True
-
-
-def test_max_sentences_enforced():
-    validator, _ = _validator()
+from src.core.schemas import IntentContract
+
+# (intent id, reply, expected violation kind or None when the reply passes, test id).
+# Params stay small: each case resolves its contract from the session router.
+CONTRACT_CASES = [
+    ("PRICING", "Стоимость 4990₽/час", None, "pricing-ok"),
+    ("PRICING", "Стоимость указана на сайте", "must_include", "pricing-no-price"),
+    ("PRICING", "4990₽, адрес: Нижняя Сыромятническая", "forbidden", "pricing-address"),
+    ("ADDRESS", "Адрес: Нижняя Сыромятническая 11", None, "address-ok"),
+    ("ADDRESS", "Цена 4990₽, адрес: Нижняя Сыромятническая 11", "forbidden", "address-price"),
+    ("ROOMS", "У нас есть Агат и Карелия", None, "rooms-ok"),
+]
+
+
+@pytest.mark.parametrize(
+    ("intent_id", "text", "violation"),
+    [pytest.param(*case[:3], id=case[3]) for case in CONTRACT_CASES],
+)
+def test_intent_contract(
+    jone_validator: ContractValidator,
+    jone_router: IntentRouter,
+    intent_id: str,
+    text: str,
+    violation: str | None,
+):
+    contract = jone_router.get_intent_config(intent_id).contract  # type: ignore[union-attr]
+    result = jone_validator.validate(text, contract)
+    if violation is None:
+        assert result.ok is True, result.violations
+    else:
+        assert result.ok is False
+        assert any(violation in v for v in result.violations)
+
+
+def test_max_sentences_enforced(jone_validator: ContractValidator):
     text = "One. Two. Three. Four. Five."
-    result = validator.validate(text, contract=None)
+    result = jone_validator.validate(text, contract=None)
     assert result.ok is False
     assert any("max_sentences" in v for v in result.violations)
 
 
-def test_max_questions_enforced():
-    validator, _ = _validator()
-    result = validator.validate("One? Two?", contract=None)
+def test_max_questions_enforced(jone_validator: ContractValidator):
+    result = jone_validator.validate("One? Two?", contract=None)
     assert result.ok is False
     assert any("max_questions" in v for v in result.violations)
 
 
-def test_without_contract_only_style_is_checked():
-    validator, _ = _validator()
-    result = validator.validate("One. Two. Three.", contract=None)
+def test_without_contract_only_style_is_checked(jone_validator: ContractValidator):
+    result = jone_validator.validate("One. Two. Three.", contract=None)
     assert result.ok is True
 
 
-def test_empty_text_ok_without_contract():
-    validator, _ = _validator()
-    result = validator.validate("", contract=None)
+def test_empty_text_ok_without_contract(jone_validator: ContractValidator):
+    result = jone_validator.validate("", contract=None)
     assert result.ok is True
 
+
+
+def test_contract_patterns_report_each_forbidden_word(jone_validator: ContractValidator):
+    contract = IntentContract(must_include_any=["Адрес"], forbidden=["цена", "Зал"])
+    result = jone_validator.validate("адрес: ЦЕНА и зал.", contract)
+    assert result.violations == [
+        "must_include: none of ['Адрес'] found",
+        "forbidden: 'цена' found",
+        "forbidden: 'Зал' found",
+    ]
+    assert jone_validator.validate("Адрес: Москва.", contract).ok is True
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.core.crud import (
+    get_answered_channel_message_ids,
+    get_or_create_conversations,
+    set_conversation_state,
+)
+from src.models import Conversation
+
+
+class _Scalars:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return iter(self._rows)
+
+
+class _RecordingDb:
+    def __init__(self, existing, inserted):
+        self.existing = existing
+        self.inserted = inserted
+        self.statements: list[str] = []
+
+    async def execute(self, stmt):
+        self.statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+        return _Scalars(self.existing)
+
+    async def scalars(self, stmt):
+        self.statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+        return iter(self.inserted)
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_conversations_batches_select_and_insert():
+    agent_id = uuid4()
+    existing = SimpleNamespace(channel_type="umnico", channel_conversation_id="lead-1")
+    created = SimpleNamespace(channel_type="umnico", channel_conversation_id="lead-2")
+    db = _RecordingDb(existing=[existing], inserted=[created])
+
+    convs = await get_or_create_conversations(
+        db,
+        agent_id,
+        [("umnico", "lead-1"), ("umnico", "lead-2"), ("umnico", "lead-1")],
+    )
+
+    assert convs == {("umnico", "lead-1"): existing, ("umnico", "lead-2"): created}
+    assert len(db.statements) == 2
+    select_sql, insert_sql = db.statements
+    assert "(conversations.channel_type, conversations.channel_conversation_id) IN" in select_sql
+    on_conflict = "ON CONFLICT ON CONSTRAINT uq_conversations_agent_channel_conv_id DO NOTHING"
+    assert on_conflict in insert_sql
+    assert "RETURNING" in insert_sql
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_conversations_empty_batch_skips_db():
+    db = _RecordingDb(existing=[], inserted=[])
+    assert await get_or_create_conversations(db, uuid4(), []) == {}
+    assert db.statements == []
+
+
+@pytest.mark.asyncio
+async def test_get_answered_channel_message_ids_filters_user_rows_by_metadata():
+    conv_id = uuid4()
+    statements: list[str] = []
+
+    class _Db:
+        async def execute(self, stmt):
+            statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+            return SimpleNamespace(all=lambda: [(conv_id, "m1")])
+
+    answered = await get_answered_channel_message_ids(_Db(), [conv_id, conv_id], ["m1", "m2"])
+
+    assert answered == {(conv_id, "m1")}
+    assert len(statements) == 1
+    assert "messages.metadata ->> " in statements[0]
+    assert "messages.conversation_id IN" in statements[0]
+
+
+@pytest.mark.asyncio
+async def test_get_answered_channel_message_ids_empty_batch_skips_db():
+    db = _RecordingDb(existing=[], inserted=[])
+    assert await get_answered_channel_message_ids(db, [], ["m1"]) == set()
+    assert db.statements == []
+
+
+def _loaded_conversation(state: dict) -> Conversation:
+    """A Conversation as if loaded from the DB: `state` is its committed value."""
+    conv = Conversation(
+        id=uuid4(), agent_id=uuid4(), channel_type="telegram", channel_conversation_id="c1"
+    )
+    conv.state = state
+    make_transient_to_detached(conv)
+    return conv
+
+
+def test_set_conversation_state_marks_in_place_changes_dirty():
+    conv = _loaded_conversation({"flow": {"stage": "qualify"}})
+    state = conv.state
+    state["flow"]["stage"] = "offer"  # the pipeline mutates the loaded dict
+
+    conv.state = state
+    assert not inspect(conv).attrs.state.history.has_changes()  # plain assignment: no UPDATE
+
+    set_conversation_state(conv, state)
+    history = inspect(conv).attrs.state.history
+    assert history.has_changes()
+    assert history.added == [{"flow": {"stage": "offer"}}]
+    assert conv.state is not state
@@ -4,54 +4,53 @@ Golden test runner — loads YAML test cases and validates intent detection + po
 
 from __future__ import annotations
 
+from functools import cache
 from pathlib import Path
 
 import pytest
 import yaml
 
-from src.core.config_loader import load_tenant_config
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _Loader
+
 from src.core.intent_router import IntentRouter
 from src.core.postprocess import Postprocessor
 
-
 GOLDEN_DIR = Path("tests/golden/j-one")
 
 
+@cache
 def _load_golden(filename: str) -> dict:
     with open(GOLDEN_DIR / filename, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
-
-
-@pytest.fixture
-def jone_router() -> IntentRouter:
-    cfg = load_tenant_config("tenants/j-one-studio")
-    return IntentRouter(cfg.dialogue_policy.intents)
-
-
-@pytest.fixture
-def jone_postprocessor() -> Postprocessor:
-    cfg = load_tenant_config("tenants/j-one-studio")
-    return Postprocessor(cfg.agent.style)
+        return yaml.load(f, Loader=_Loader)
 
 
 _intent_files = ["greeting.yaml", "pricing.yaml", "address.yaml", "booking.yaml", "escalate.yaml"]
 
-
-@pytest.mark.parametrize("filename", _intent_files)
-def test_intent_golden(jone_router: IntentRouter, filename: str):
-    data = _load_golden(filename)
-    for case in data["messages"]:
-        detected = jone_router.detect(case["user"])
-        assert detected == case["expected_intent"], (
-            f"[{filename}] '{case['user']}': expected {case['expected_intent']}, got {detected}"
-        )
-
-
-def test_postprocess_golden(jone_postprocessor: Postprocessor):
-    data = _load_golden("postprocess.yaml")
-    for case in data["samples"]:
-        result = jone_postprocessor.process(case["input"])
-        assert result == case["expected_clean"], (
-            f"Input: '{case['input']}' -> Expected: '{case['expected_clean']}' -> Got: '{result}'"
-        )
-
+# One test per golden case, built at collection time so a failure names the case.
+# Ids are "<file>-<n>" (pytest would escape Cyrillic case text in ids).
+_intent_cases = [
+    pytest.param(case["user"], case["expected_intent"], id=f"{Path(filename).stem}-{n}")
+    for filename in _intent_files
+    for n, case in enumerate(_load_golden(filename)["messages"], 1)
+]
+_postprocess_cases = [
+    pytest.param(case["input"], case["expected_clean"], id=f"postprocess-{n}")
+    for n, case in enumerate(_load_golden("postprocess.yaml")["samples"], 1)
+]
+
+
+@pytest.mark.parametrize(("user_text", "expected_intent"), _intent_cases)
+def test_intent_golden(jone_router: IntentRouter, user_text: str, expected_intent: str):
+    detected = jone_router.detect(user_text)
+    assert detected == expected_intent, f"'{user_text}': expected {expected_intent}, got {detected}"
+
+
+@pytest.mark.parametrize(("raw", "expected_clean"), _postprocess_cases)
+def test_postprocess_golden(jone_postprocessor: Postprocessor, raw: str, expected_clean: str):
+    result = jone_postprocessor.process(raw)
+    assert result == expected_clean, (
+        f"Input: '{raw}' -> Expected: '{expected_clean}' -> Got: '{result}'"
+    )
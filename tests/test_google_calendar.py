@@ -1,18 +1,70 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from unittest.mock import AsyncMock, patch
+import asyncio
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
 import pytest
 
+from src.integrations import google_calendar, http_client
 from src.integrations.google_calendar import GoogleCalendarAdapter, _parse_ics_datetime
 
+# One busy slot: 2026-02-15 14:00-16:00 UTC.
+_ICS_BYTES = (
+    b"BEGIN:VCALENDAR\n"
+    b"BEGIN:VEVENT\n"
+    b"DTSTART:20260215T140000Z\n"
+    b"DTEND:20260215T160000Z\n"
+    b"END:VEVENT\n"
+    b"END:VCALENDAR\n"
+)
+
+
+@pytest.fixture
+def mock_httpx(monkeypatch):
+    """Install a stand-in httpx.AsyncClient whose GET returns the ICS bytes (or raises)."""
+
+    def _install(content_or_exc: bytes | Exception) -> SimpleNamespace:
+        # The adapter calls get() on the shared client directly (no `async with`), so the
+        # stand-in needs only get() and is_closed.
+        if isinstance(content_or_exc, Exception):
+            get = AsyncMock(side_effect=content_or_exc)
+        else:
+            get = AsyncMock(return_value=httpx.Response(200, content=content_or_exc))
+        mock_client = SimpleNamespace(get=get, is_closed=False)
+        # Drop any cached shared client so the next get_http_client() builds the mock.
+        monkeypatch.setattr(http_client, "_http_client", None)
+        monkeypatch.setattr(httpx, "AsyncClient", MagicMock(return_value=mock_client))
+        return mock_client
+
+    return _install
+
+
+@pytest.fixture(autouse=True)
+def _clear_availability_cache():
+    google_calendar.clear_availability_cache()
+    yield
+    google_calendar.clear_availability_cache()
+
 
 def test_parse_ics_datetime_utc():
     dt = _parse_ics_datetime("20260215T140000Z")
-    assert dt == datetime(2026, 2, 15, 14, 0, 0, tzinfo=timezone.utc)
+    assert dt == datetime(2026, 2, 15, 14, 0, 0, tzinfo=UTC)
+
 
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("20260215T140000", datetime(2026, 2, 15, 14, 0, 0)),
+        (" 20260215T140000Z\r", datetime(2026, 2, 15, 14, 0, 0, tzinfo=UTC)),
+        ("20260217", None),
+        ("2026021XT140000Z", None),
+    ],
+)
+def test_parse_ics_datetime_shapes(raw, expected):
+    assert _parse_ics_datetime(raw) == expected
 
 def test_parse_ics_events_parses_two_events():
     ics_text = (
@@ -29,84 +81,83 @@ def test_parse_ics_events_parses_two_events():
     )
     events = GoogleCalendarAdapter._parse_ics_events(ics_text)
     assert len(events) == 2
-    assert events[0]["start"] == datetime(2026, 2, 15, 14, 0, 0, tzinfo=timezone.utc)
-    assert events[0]["end"] == datetime(2026, 2, 15, 16, 0, 0, tzinfo=timezone.utc)
-    assert events[1]["start"] == datetime(2026, 2, 16, 10, 0, 0, tzinfo=timezone.utc)
-    assert events[1]["end"] == datetime(2026, 2, 16, 11, 0, 0, tzinfo=timezone.utc)
+    assert events[0]["start"] == datetime(2026, 2, 15, 14, 0, 0, tzinfo=UTC)
+    assert events[0]["end"] == datetime(2026, 2, 15, 16, 0, 0, tzinfo=UTC)
+    assert events[1]["start"] == datetime(2026, 2, 16, 10, 0, 0, tzinfo=UTC)
+    assert events[1]["end"] == datetime(2026, 2, 16, 11, 0, 0, tzinfo=UTC)
 
 
-@pytest.mark.asyncio
-async def test_check_availability_slot_free_returns_available_true():
+def test_parse_ics_events_handles_crlf_params_and_noise():
     ics_text = (
-        "BEGIN:VCALENDAR\n"
-        "BEGIN:VEVENT\n"
-        "DTSTART:20260215T140000Z\n"
-        "DTEND:20260215T160000Z\n"
-        "END:VEVENT\n"
-        "END:VCALENDAR\n"
+        "BEGIN:VCALENDAR\r\n"
+        "PRODID:-//Google Inc//Google Calendar 70.9054//EN\r\n"
+        "BEGIN:VEVENT\r\n"
+        "DTSTART;TZID=Europe/Moscow:20260215T140000\r\n"
+        "DTEND;TZID=Europe/Moscow:20260215T160000\r\n"
+        "SUMMARY:Бронь / Агат\r\n"
+        "END:VEVENT\r\n"
+        "BEGIN:VEVENT\r\n"
+        "SUMMARY:No times\r\n"
+        "END:VEVENT\r\n"
+        "END:VCALENDAR\r\n"
     )
-    adapter = GoogleCalendarAdapter({"ics_url": "https://example.com/cal.ics"})
-    response = httpx.Response(200, content=ics_text.encode("utf-8"))
-
-    mock_client = AsyncMock()
-    mock_client.get = AsyncMock(return_value=response)
-    mock_client.__aenter__.return_value = mock_client
-    mock_client.__aexit__.return_value = None
-
-    with patch("httpx.AsyncClient", return_value=mock_client):
-        result = await adapter.check_availability(
-            {"start": datetime(2026, 2, 15, 10, 0, 0, tzinfo=timezone.utc), "duration_hours": 2}
-        )
-
-    assert result == {"success": True, "available": True}
-
+    events = GoogleCalendarAdapter._parse_ics_events(ics_text)
+    assert events == [
+        {"start": datetime(2026, 2, 15, 14, 0, 0), "end": datetime(2026, 2, 15, 16, 0, 0)},
+        {},
+    ]
 
-@pytest.mark.asyncio
-async def test_check_availability_overlap_returns_available_false():
+def test_parse_ics_events_window_drops_non_overlapping_utc_events():
     ics_text = (
         "BEGIN:VCALENDAR\n"
-        "BEGIN:VEVENT\n"
-        "DTSTART:20260215T140000Z\n"
-        "DTEND:20260215T160000Z\n"
-        "END:VEVENT\n"
+        "BEGIN:VEVENT\nDTSTART:20260101T100000Z\nDTEND:20260101T120000Z\nEND:VEVENT\n"
+        "BEGIN:VEVENT\nDTSTART:20260215T080000Z\nDTEND:20260215T100000Z\nEND:VEVENT\n"
+        "BEGIN:VEVENT\nDTSTART:20260215T110000Z\nDTEND:20260215T130000Z\nEND:VEVENT\n"
+        "BEGIN:VEVENT\nDTSTART;TZID=Europe/Moscow:20261231T100000\nDTEND;TZID=Europe/Moscow:20261231T120000\nEND:VEVENT\n"
         "END:VCALENDAR\n"
     )
-    adapter = GoogleCalendarAdapter({"ics_url": "https://example.com/cal.ics"})
-    response = httpx.Response(200, content=ics_text.encode("utf-8"))
+    events = GoogleCalendarAdapter._parse_ics_events(
+        ics_text,
+        time_min=datetime(2026, 2, 15, 10, 0, 0, tzinfo=UTC),
+        time_max=datetime(2026, 2, 15, 12, 0, 0, tzinfo=UTC),
+    )
+    assert [e["start"] for e in events] == [
+        datetime(2026, 2, 15, 11, 0, 0, tzinfo=UTC),
+        datetime(2026, 12, 31, 10, 0, 0),
+    ]
 
-    mock_client = AsyncMock()
-    mock_client.get = AsyncMock(return_value=response)
-    mock_client.__aenter__.return_value = mock_client
-    mock_client.__aexit__.return_value = None
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("start_hour", "expected_available"),
+    [(10, True), (15, False)],
+    ids=["slot-free", "overlap"],
+)
+async def test_check_availability_against_busy_slot(mock_httpx, start_hour, expected_available):
+    adapter = GoogleCalendarAdapter({"ics_url": "https://example.com/cal.ics"})
+    mock_httpx(_ICS_BYTES)
 
-    with patch("httpx.AsyncClient", return_value=mock_client):
-        result = await adapter.check_availability(
-            {"start": datetime(2026, 2, 15, 15, 0, 0, tzinfo=timezone.utc), "duration_hours": 2}
-        )
+    result = await adapter.check_availability(
+        {"start": datetime(2026, 2, 15, start_hour, 0, 0, tzinfo=UTC), "duration_hours": 2}
+    )
 
-    assert result == {"success": True, "available": False}
+    assert result == {"success": True, "available": expected_available}
 
 
 @pytest.mark.asyncio
 async def test_check_availability_no_ics_url_fails_open_available_true():
     adapter = GoogleCalendarAdapter({"ics_url": ""})
-    result = await adapter.check_availability({"start": datetime(2026, 2, 15, 10, 0, 0, tzinfo=timezone.utc)})
+    start = datetime(2026, 2, 15, 10, 0, 0, tzinfo=UTC)
+    result = await adapter.check_availability({"start": start})
     assert result == {"success": True, "available": True}
 
 
 @pytest.mark.asyncio
-async def test_check_availability_http_error_fails_open_available_true():
+async def test_check_availability_http_error_fails_open_available_true(mock_httpx):
     adapter = GoogleCalendarAdapter({"ics_url": "https://example.com/cal.ics"})
+    mock_httpx(RuntimeError("HTTP error"))
 
-    mock_client = AsyncMock()
-    mock_client.get = AsyncMock(side_effect=RuntimeError("HTTP error"))
-    mock_client.__aenter__.return_value = mock_client
-    mock_client.__aexit__.return_value = None
-
-    with patch("httpx.AsyncClient", return_value=mock_client):
-        result = await adapter.check_availability(
-            {"start": datetime(2026, 2, 15, 10, 0, 0, tzinfo=timezone.utc)}
-        )
+    start = datetime(2026, 2, 15, 10, 0, 0, tzinfo=UTC)
+    result = await adapter.check_availability({"start": start})
 
     assert result == {"success": True, "available": True}
 
@@ -127,3 +178,147 @@ async def test_execute_unknown_action_returns_error():
     assert result["success"] is False
     assert "Unknown action" in result["error"]
 
+
+
+@pytest.mark.asyncio
+async def test_create_booking_check_conflict_busy_skips_insert():
+    adapter = GoogleCalendarAdapter({"calendar_id": "cal", "service_account_path": "/sa.json"})
+    service = MagicMock()
+    service.events.return_value.list.return_value.execute.return_value = {
+        "items": [{"summary": "Бронь J-One: Иван / Агат"}]
+    }
+
+    with patch.object(GoogleCalendarAdapter, "_build_service", return_value=service):
+        result = await adapter.create_booking(
+            {
+                "start": datetime(2026, 2, 15, 10, 0, 0),
+                "end": datetime(2026, 2, 15, 12, 0, 0),
+                "room": "Агат",
+                "check_conflict": True,
+            }
+        )
+
+    assert result == {"success": False, "reason": "slot_busy", "conflicting_rooms": ["Агат"]}
+    service.events.return_value.insert.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_create_booking_check_conflict_free_inserts():
+    adapter = GoogleCalendarAdapter({"calendar_id": "cal", "service_account_path": "/sa.json"})
+    service = MagicMock()
+    service.events.return_value.list.return_value.execute.return_value = {
+        "items": [{"summary": "Бронь J-One: Иван / Лофт"}]
+    }
+    service.events.return_value.insert.return_value.execute.return_value = {"id": "evt-1"}
+
+    with patch.object(GoogleCalendarAdapter, "_build_service", return_value=service):
+        result = await adapter.create_booking(
+            {
+                "start": datetime(2026, 2, 15, 10, 0, 0),
+                "end": datetime(2026, 2, 15, 12, 0, 0),
+                "room": "Агат",
+                "check_conflict": True,
+            }
+        )
+
+    assert result == {"success": True, "event_id": "evt-1"}
+
+
+@pytest.mark.asyncio
+async def test_check_availability_reuses_shared_ics_client(monkeypatch):
+    ics_text = "BEGIN:VCALENDAR\nEND:VCALENDAR\n"
+    seen_clients: list[int] = []
+
+    async def fake_get(self, url, timeout=None):
+        seen_clients.append(id(self))
+        return httpx.Response(200, content=ics_text.encode("utf-8"))
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+    adapter = GoogleCalendarAdapter({"ics_url": "https://example.com/cal.ics"})
+    start = datetime(2026, 2, 15, 10, 0, 0, tzinfo=UTC)
+
+    first = await adapter.check_availability({"start": start})
+    later = {"start": start.replace(hour=12)}
+    second = await GoogleCalendarAdapter({"ics_url": "https://example.com/cal.ics"}).check_availability(later)
+
+    assert first["available"] is True and second["available"] is True
+    assert len(seen_clients) == 2 and len(set(seen_clients)) == 1
+    assert seen_clients[0] == id(http_client.get_http_client())
+
+    await http_client.close_http_client()
+    assert http_client._http_client is None
+
+
+def test_build_service_is_cached_per_key_file_and_scope():
+    google_calendar._calendar_service.cache_clear()
+    with (
+        patch("google.oauth2.service_account.Credentials.from_service_account_file") as from_file,
+        patch("googleapiclient.discovery.build", side_effect=lambda *a, **kw: MagicMock()) as build,
+    ):
+        ro = GoogleCalendarAdapter._build_service("/sa.json", readonly=True)
+        assert GoogleCalendarAdapter._build_service("/sa.json", readonly=True) is ro
+        rw = GoogleCalendarAdapter._build_service("/sa.json", readonly=False)
+
+    assert rw is not ro
+    assert from_file.call_count == 2
+    assert build.call_count == 2
+    google_calendar._calendar_service.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_execute_uses_fresh_transport_per_call():
+    request = MagicMock()
+    request.execute.return_value = {"items": []}
+
+    await asyncio.gather(google_calendar._execute(request), google_calendar._execute(request))
+
+    transports = [c.kwargs["http"] for c in request.execute.call_args_list]
+    assert len(transports) == 2
+    assert transports[0] is not transports[1]
+    assert transports[0].http is not transports[1].http
+    assert all(t.credentials is request.http.credentials for t in transports)
+
+
+@pytest.mark.asyncio
+async def test_check_availability_single_flight_and_ttl_cache(monkeypatch):
+    calls = 0
+    release = asyncio.Event()
+
+    async def fake_fetch(self, start, end, room):
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"success": True, "available": False, "conflicting_rooms": ["Агат"]}
+
+    monkeypatch.setattr(GoogleCalendarAdapter, "_fetch_availability", fake_fetch)
+    params = {"start": datetime(2026, 2, 15, 10, 0, 0), "room": "Агат"}
+
+    adapters = [GoogleCalendarAdapter({"calendar_id": "cal"}) for _ in range(3)]
+    pending = [asyncio.create_task(adapter.check_availability(params)) for adapter in adapters]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*pending)
+    cached = await GoogleCalendarAdapter({"calendar_id": "cal"}).check_availability(params)
+
+    assert calls == 1
+    busy = {"success": True, "available": False, "conflicting_rooms": ["Агат"]}
+    assert all(r == busy for r in results)
+    assert cached == results[0] and cached is not results[0]
+
+    google_calendar.clear_availability_cache()
+    await GoogleCalendarAdapter({"calendar_id": "cal"}).check_availability(params)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_list_events_reuses_events_resource():
+    adapter = GoogleCalendarAdapter({"calendar_id": "cal"})
+    service = MagicMock()
+    service.events.return_value.list.return_value.execute.return_value = {"items": []}
+    start = datetime(2026, 2, 15, 10, 0, 0, tzinfo=UTC)
+
+    await adapter._list_events(service, start, start.replace(hour=12))
+    await adapter._list_events(service, start.replace(hour=12), start.replace(hour=14))
+
+    service.events.assert_called_once_with()
+    assert service.events.return_value.list.call_count == 2
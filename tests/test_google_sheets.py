@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from unittest.mock import AsyncMock
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from src.integrations import google_sheets
 from src.integrations.google_sheets import GoogleSheetsAdapter
 
 
@@ -61,3 +63,70 @@ async def test_append_lead_without_service_account_path_returns_success_false():
     result = await adapter.append_lead({"message": "hi"})
     assert result["success"] is False
 
+
+
+@pytest.mark.asyncio
+async def test_append_row_reuses_cached_service():
+    google_sheets._sheets_service.cache_clear()
+    service = MagicMock()
+    adapter = GoogleSheetsAdapter({"spreadsheet_id": "s", "service_account_path": "/sa.json"})
+
+    with patch("googleapiclient.discovery.build", return_value=service) as build, patch(
+        "google.oauth2.service_account.Credentials.from_service_account_file"
+    ):
+        assert await adapter.append_lead({"message": "hi"}) == {"success": True}
+        assert await adapter.append_booking({"hall": "Агат"}) == {"success": True}
+
+    build.assert_called_once()
+    append = service.spreadsheets.return_value.values.return_value.append
+    assert append.return_value.execute.call_count == 2
+    google_sheets._sheets_service.cache_clear()
+
+
+def test_execute_uses_fresh_transport_per_call():
+    request = MagicMock()
+
+    google_sheets._execute_blocking(request)
+    google_sheets._execute_blocking(request)
+
+    first, second = (c.kwargs["http"] for c in request.execute.call_args_list)
+    assert first is not second and first.http is not second.http
+    assert first.credentials is request.http.credentials
+
+
+@pytest.mark.asyncio
+async def test_batch_mode_buffers_rows_until_flush():
+    config = {
+        "spreadsheet_id": "s",
+        "sheet_name": "Лиды",
+        "service_account_path": "/sa.json",
+        "batch": True,
+    }
+    append_rows_mock = AsyncMock(return_value={"success": True})
+    with patch.object(google_sheets, "_append_rows", append_rows_mock) as append_rows:
+        first = await GoogleSheetsAdapter(config).append_lead({"datetime": "t1", "message": "a"})
+        second = await GoogleSheetsAdapter(config).append_lead({"datetime": "t2", "message": "b"})
+
+        assert first == second == {"success": True, "queued": True}
+        append_rows.assert_not_awaited()
+
+        await google_sheets.flush_pending_rows()
+
+    append_rows.assert_awaited_once()
+    (sa_path, spreadsheet_id, sheet_name, rows), _ = append_rows.await_args
+    assert (sa_path, spreadsheet_id, sheet_name) == ("/sa.json", "s", "Лиды")
+    assert [r[0] for r in rows] == ["t1", "t2"]
+    assert google_sheets._pending_rows == {}
+
+
+@pytest.mark.asyncio
+async def test_append_lead_datetime_defaults_to_utc_now_only_when_missing():
+    adapter = GoogleSheetsAdapter({"spreadsheet_id": "s"})
+    adapter._append_row = AsyncMock(return_value={"success": True})  # type: ignore[method-assign]
+
+    await adapter.append_lead({"message": "hi"})
+    await adapter.append_lead({"message": "hi", "datetime": ""})
+
+    (default_row,), (empty_row,) = (c.args for c in adapter._append_row.await_args_list)
+    assert datetime.fromisoformat(default_row[0]).tzinfo is not None
+    assert empty_row[0] == ""
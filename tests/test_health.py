@@ -1,15 +1,9 @@
 import pytest
-from httpx import ASGITransport, AsyncClient
-
-from src.main import app
 
 
 @pytest.mark.asyncio
-async def test_health_ok():
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as client:
-        resp = await client.get("/health")
+async def test_health_ok(async_client):
+    resp = await async_client.get("/health")
 
     assert resp.status_code == 200
     assert resp.json() == {"status": "ok", "version": "0.1.0"}
-
@@ -1,89 +1,79 @@
 from __future__ import annotations
 
-from src.core.config_loader import load_tenant_config
 from src.core.intent_lock import IntentLock
+from src.core.schemas import IntentConfig
 
 
-def _intents():
-    cfg = load_tenant_config("tenants/j-one-studio")
-    return cfg.dialogue_policy.intents
-
-
-def test_first_message_sets_lock():
-    lock = IntentLock(lock_turns=2)
+def test_first_message_sets_lock(intent_lock: IntentLock, jone_intents: list[IntentConfig]):
     state: dict = {}
-    effective = lock.apply(state, raw_intent="PRICING", intents=_intents())
+    effective = intent_lock.apply(state, raw_intent="PRICING", intents=jone_intents)
     assert effective == "PRICING"
     assert state[IntentLock.KEY_LOCKED] == "PRICING"
     assert state[IntentLock.KEY_TURNS_LEFT] == 2
 
 
-def test_second_turn_lock_holds():
-    lock = IntentLock(lock_turns=2)
+def test_second_turn_lock_holds(intent_lock: IntentLock, jone_intents: list[IntentConfig]):
     state = {IntentLock.KEY_LOCKED: "PRICING", IntentLock.KEY_TURNS_LEFT: 2}
-    effective = lock.apply(state, raw_intent="SAFE_FAQ", intents=_intents())
+    effective = intent_lock.apply(state, raw_intent="SAFE_FAQ", intents=jone_intents)
     assert effective == "PRICING"
     assert state[IntentLock.KEY_TURNS_LEFT] == 1
 
 
-def test_third_turn_lock_holds_to_zero():
-    lock = IntentLock(lock_turns=2)
+def test_third_turn_lock_holds_to_zero(intent_lock: IntentLock, jone_intents: list[IntentConfig]):
     state = {IntentLock.KEY_LOCKED: "PRICING", IntentLock.KEY_TURNS_LEFT: 1}
-    effective = lock.apply(state, raw_intent="SAFE_FAQ", intents=_intents())
+    effective = intent_lock.apply(state, raw_intent="SAFE_FAQ", intents=jone_intents)
     assert effective == "PRICING"
     assert state[IntentLock.KEY_TURNS_LEFT] == 0
 
 
-def test_fourth_turn_lock_expired():
-    lock = IntentLock(lock_turns=2)
+def test_fourth_turn_lock_expired(intent_lock: IntentLock, jone_intents: list[IntentConfig]):
     state = {IntentLock.KEY_LOCKED: "PRICING", IntentLock.KEY_TURNS_LEFT: 0}
-    effective = lock.apply(state, raw_intent="SAFE_FAQ", intents=_intents())
+    effective = intent_lock.apply(state, raw_intent="SAFE_FAQ", intents=jone_intents)
     assert effective == "SAFE_FAQ"
     assert state[IntentLock.KEY_LOCKED] == "SAFE_FAQ"
     assert state[IntentLock.KEY_TURNS_LEFT] == 2
 
 
-def test_escalate_always_overrides():
-    lock = IntentLock(lock_turns=2)
+def test_escalate_always_overrides(intent_lock: IntentLock, jone_intents: list[IntentConfig]):
     state = {IntentLock.KEY_LOCKED: "PRICING", IntentLock.KEY_TURNS_LEFT: 2}
-    effective = lock.apply(state, raw_intent="ESCALATE", intents=_intents())
+    effective = intent_lock.apply(state, raw_intent="ESCALATE", intents=jone_intents)
     assert effective == "ESCALATE"
     assert state[IntentLock.KEY_LOCKED] == "ESCALATE"
     assert state[IntentLock.KEY_TURNS_LEFT] == 2
 
 
-def test_higher_priority_overrides_lock():
+def test_higher_priority_overrides_lock(intent_lock: IntentLock, jone_intents: list[IntentConfig]):
     # PRICING=30, ADDRESS=20 in J-One config.
-    lock = IntentLock(lock_turns=2)
     state = {IntentLock.KEY_LOCKED: "PRICING", IntentLock.KEY_TURNS_LEFT: 2}
-    effective = lock.apply(state, raw_intent="ADDRESS", intents=_intents())
+    effective = intent_lock.apply(state, raw_intent="ADDRESS", intents=jone_intents)
     assert effective == "ADDRESS"
     assert state[IntentLock.KEY_LOCKED] == "ADDRESS"
     assert state[IntentLock.KEY_TURNS_LEFT] == 2
 
 
-def test_lower_priority_does_not_override_lock():
+def test_lower_priority_does_not_override_lock(
+    intent_lock: IntentLock, jone_intents: list[IntentConfig]
+):
     # ADDRESS=20, ROOMS=60 in J-One config.
-    lock = IntentLock(lock_turns=2)
     state = {IntentLock.KEY_LOCKED: "ADDRESS", IntentLock.KEY_TURNS_LEFT: 2}
-    effective = lock.apply(state, raw_intent="ROOMS", intents=_intents())
+    effective = intent_lock.apply(state, raw_intent="ROOMS", intents=jone_intents)
     assert effective == "ADDRESS"
     assert state[IntentLock.KEY_LOCKED] == "ADDRESS"
     assert state[IntentLock.KEY_TURNS_LEFT] == 1
 
 
-def test_same_intent_repeated_does_not_reset_turns():
-    lock = IntentLock(lock_turns=2)
+def test_same_intent_repeated_does_not_reset_turns(
+    intent_lock: IntentLock, jone_intents: list[IntentConfig]
+):
     state = {IntentLock.KEY_LOCKED: "PRICING", IntentLock.KEY_TURNS_LEFT: 2}
-    effective = lock.apply(state, raw_intent="PRICING", intents=_intents())
+    effective = intent_lock.apply(state, raw_intent="PRICING", intents=jone_intents)
     assert effective == "PRICING"
     assert state[IntentLock.KEY_TURNS_LEFT] == 1
 
 
-def test_state_is_mutated_in_place():
-    lock = IntentLock(lock_turns=2)
+def test_state_is_mutated_in_place(intent_lock: IntentLock, jone_intents: list[IntentConfig]):
     state: dict = {}
-    lock.apply(state, raw_intent="GREETING", intents=_intents())
+    intent_lock.apply(state, raw_intent="GREETING", intents=jone_intents)
     assert IntentLock.KEY_LOCKED in state
     assert IntentLock.KEY_TURNS_LEFT in state
 
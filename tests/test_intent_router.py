@@ -1,58 +1,63 @@
 from __future__ import annotations
 
-from src.core.config_loader import load_tenant_config
-from src.core.intent_router import IntentRouter
-
-
-def _router() -> IntentRouter:
-    cfg = load_tenant_config("tenants/j-one-studio")
-    return IntentRouter(cfg.dialogue_policy.intents)
-
-
-def test_pricing():
-    assert _router().detect("Сколько стоит съёмка?") == "PRICING"
-
-
-def test_address():
-    assert _router().detect("Где вы находитесь?") == "ADDRESS"
-
-
-def test_rooms():
-    assert _router().detect("Какие залы есть?") == "ROOMS"
-
-
-def test_greeting():
-    assert _router().detect("Привет!") == "GREETING"
-
+import pytest
 
-def test_booking():
-    assert _router().detect("Хочу забронировать") == "BOOKING"
-
-
-def test_reschedule():
-    assert _router().detect("Можно перенести запись?") == "RESCHEDULE"
-
-
-def test_escalate_discount():
-    assert _router().detect("Мне нужна скидку") == "ESCALATE"
-
-
-def test_fallback():
-    assert _router().detect("Расскажите о чём-нибудь") == "SAFE_FAQ"
-
-
-def test_priority_escalate_over_address():
-    assert _router().detect("Срочно нужен адрес") == "ESCALATE"
-
-
-def test_get_intent_config_pricing_has_contract():
-    cfg = load_tenant_config("tenants/j-one-studio")
-    router = IntentRouter(cfg.dialogue_policy.intents)
-    intent = router.get_intent_config("PRICING")
+from src.core.intent_router import IntentRouter
+from src.core.schemas import IntentConfig
+
+# (message, expected intent, test id). Ids are ASCII: pytest escapes Cyrillic in ids.
+DETECT_CASES = [
+    ("Сколько стоит съёмка?", "PRICING", "pricing"),
+    ("Где вы находитесь?", "ADDRESS", "address"),
+    ("Какие залы есть?", "ROOMS", "rooms"),
+    ("Привет!", "GREETING", "greeting"),
+    ("Хочу забронировать", "BOOKING", "booking"),
+    ("Можно перенести запись?", "RESCHEDULE", "reschedule"),
+    ("Мне нужна скидку", "ESCALATE", "escalate_discount"),
+    ("Расскажите о чём-нибудь", "SAFE_FAQ", "fallback"),
+    ("Срочно нужен адрес", "ESCALATE", "priority_escalate_over_address"),
+]
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [(text, expected) for text, expected, _ in DETECT_CASES],
+    ids=[case_id for _, _, case_id in DETECT_CASES],
+)
+def test_detect(jone_router: IntentRouter, text: str, expected: str):
+    assert jone_router.detect(text) == expected
+
+
+def test_get_intent_config_pricing_has_contract(jone_router: IntentRouter):
+    intent = jone_router.get_intent_config("PRICING")
     assert intent is not None
     assert intent.contract is not None
 
 
-def test_get_intent_config_nonexistent_returns_none():
-    assert _router().get_intent_config("NONEXISTENT") is None
-
+def test_get_intent_config_nonexistent_returns_none(jone_router: IntentRouter):
+    assert jone_router.get_intent_config("NONEXISTENT") is None
+
+
+def test_markers_are_literal_substrings():
+    router = IntentRouter(
+        [
+            IntentConfig(id="PRICE", markers=["цена?", "Стоим"], priority=20),
+            IntentConfig(id="EMPTY", markers=[], priority=10),
+        ]
+    )
+    assert router.detect("Какая ЦЕНА?") == "PRICE"
+    assert router.detect("стоимость") == "PRICE"
+    assert router.detect("цена") == "SAFE_FAQ"
+
+
+def test_earlier_low_priority_marker_does_not_shadow_higher_priority():
+    router = IntentRouter(
+        [
+            IntentConfig(id="ADDRESS", markers=["адрес"], priority=30),
+            IntentConfig(id="ESCALATE", markers=["менеджер"], priority=5),
+        ]
+    )
+    assert router.detect("Адрес скиньте и позовите менеджера") == "ESCALATE"
+    assert router.detect("Какой адрес?") == "ADDRESS"
+    assert router.detect("Здравствуйте") == "SAFE_FAQ"
+    assert IntentRouter([]).detect("адрес") == "SAFE_FAQ"
@@ -1,32 +1,27 @@
 from __future__ import annotations
 
-from src.core.config_loader import load_tenant_config
 from src.core.prompt_builder import PromptBuilder
+from src.core.schemas import TenantFullConfig
 
 
-def test_load_jone_config_does_not_crash():
-    cfg = load_tenant_config("tenants/j-one-studio")
-    assert cfg.agent.id
+def test_load_jone_config_does_not_crash(jone_cfg: TenantFullConfig):
+    assert jone_cfg.agent.id
 
 
-def test_jone_agent_rules_count():
-    cfg = load_tenant_config("tenants/j-one-studio")
-    assert len(cfg.agent.rules) == 5
+def test_jone_agent_rules_count(jone_cfg: TenantFullConfig):
+    assert len(jone_cfg.agent.rules) == 5
 
 
-def test_jone_intents_count():
-    cfg = load_tenant_config("tenants/j-one-studio")
-    assert len(cfg.dialogue_policy.intents) == 7
+def test_jone_intents_count(jone_cfg: TenantFullConfig):
+    assert len(jone_cfg.dialogue_policy.intents) == 7
 
 
-def test_jone_knowledge_files_count():
-    cfg = load_tenant_config("tenants/j-one-studio")
-    assert len(cfg.knowledge) == 7
+def test_jone_knowledge_files_count(jone_cfg: TenantFullConfig):
+    assert len(jone_cfg.knowledge) == 7
 
 
-def test_prompt_builder_contains_jone_and_prices():
-    cfg = load_tenant_config("tenants/j-one-studio")
-    prompt = PromptBuilder.build(cfg.agent, cfg.knowledge)
+def test_prompt_builder_contains_jone_and_prices(jone_cfg: TenantFullConfig):
+    prompt = PromptBuilder.build(jone_cfg.agent, jone_cfg.knowledge)
     assert "J-One" in prompt
     assert "4990" in prompt
 
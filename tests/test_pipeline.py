@@ -1,13 +1,27 @@
 from __future__ import annotations
 
-from datetime import datetime
-from unittest.mock import AsyncMock
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock, patch
 
 import pytest
 
 from src.core.brain import BrainResponse
-from src.core.pipeline import IncomingMessage, MessagePipeline, PipelineContext
-from src.core.schemas import AgentConfig, AgentIdentity, DialoguePolicyConfig, LLMConfig
+from src.core.pipeline import (
+    IncomingMessage,
+    MessagePipeline,
+    OutgoingMessage,
+    PipelineContext,
+    _compile_text_matches,
+    _parse_booking_dt,
+    _resolve_relative_date,
+)
+from src.core.schemas import (
+    AgentConfig,
+    AgentIdentity,
+    DialoguePolicyConfig,
+    IntentConfig,
+    LLMConfig,
+)
 
 
 def _make_agent_config() -> AgentConfig:
@@ -135,3 +149,305 @@ async def test_outgoing_contains_text_from_brain():
     assert out.outgoing is not None
     assert out.outgoing.text == "answer"
 
+
+
+@pytest.mark.parametrize(
+    ("booking_result", "stage", "booking_status", "manager_notified"),
+    [
+        ({"success": True, "event_id": "evt-1"}, "finalize", "created", True),
+        (
+            {"success": False, "reason": "slot_busy", "conflicting_rooms": ["Агат"]},
+            "offer",
+            "busy",
+            False,
+        ),
+    ],
+    ids=["created", "slot-busy"],
+)
+@pytest.mark.asyncio
+async def test_post_action_creates_booking_once_per_turn(
+    booking_result, stage, booking_status, manager_notified
+):
+    brain = AsyncMock()
+    brain.think = AsyncMock(
+        return_value=BrainResponse(
+            content="Записала! [BOOKING:24.02.2026|14:00|2|Агат|Иван|+79161234567]",
+            model="m",
+            usage={},
+            raw={},
+        )
+    )
+    pipeline = MessagePipeline(brain=brain)
+    pipeline._handle_create_booking = AsyncMock(  # type: ignore[method-assign]
+        return_value=booking_result
+    )
+    pipeline._handle_escalation = AsyncMock(return_value={"success": True})  # type: ignore[method-assign]
+
+    incoming = IncomingMessage(
+        channel_type="telegram",
+        channel_conversation_id="c1",
+        channel_message_id="m1",
+        text="24.02 в 14:00 на 2 часа, Агат, меня зовут Иван, +79161234567",
+        metadata={"conversation_state": {"flow": {"stage": "close", "booking_data": {}}}},
+    )
+    ctx = PipelineContext(
+        incoming=incoming,
+        agent_config=_make_agent_config(),
+        knowledge={},
+        dialogue_policy=DialoguePolicyConfig(),
+    )
+
+    out = await pipeline.process(ctx)
+    pipeline._handle_create_booking.assert_awaited_once()
+    flow = out.incoming.metadata["conversation_state"]["flow"]
+    assert flow["stage"] == stage
+    assert flow["booking_status"] == booking_status
+    assert flow.get("booking_event_id") == booking_result.get("event_id")
+    assert bool(flow.get("manager_notified")) is manager_notified
+    assert pipeline._handle_escalation.await_count == int(manager_notified)
+
+
+def test_parse_booking_dt_matches_strptime():
+    assert _parse_booking_dt("24.02.2026", "14:00") == datetime.strptime(
+        "24.02.2026 14:00", "%d.%m.%Y %H:%M"
+    )
+    assert _parse_booking_dt("1.3.2026", "9:05") == datetime(2026, 3, 1, 9, 5)
+
+
+@pytest.mark.parametrize(
+    ("date_str", "time_str"),
+    [("24.02", "14:00"), ("31.02.2026", "14:00"), ("24.02.2026", "25:00"), ("", "")],
+)
+def test_parse_booking_dt_rejects_invalid(date_str: str, time_str: str):
+    with pytest.raises(ValueError):
+        _parse_booking_dt(date_str, time_str)
+
+
+def _photo_ctx(text: str, *, greeting: str = "", state: dict | None = None) -> PipelineContext:
+    agent_config = _make_agent_config()
+    agent_config.style.greeting = greeting
+    return PipelineContext(
+        incoming=IncomingMessage(
+            channel_type="telegram",
+            channel_conversation_id="conv-1",
+            channel_message_id="msg-1",
+            text=text,
+            metadata={"conversation_state": state if state is not None else {}},
+        ),
+        agent_config=agent_config,
+        knowledge={},
+        dialogue_policy=DialoguePolicyConfig(
+            intents=[
+                IntentConfig(id="GREETING", markers=["привет"], priority=40),
+                IntentConfig(id="PRICING", markers=["сколько стоит"], priority=50),
+            ]
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_photo_fastpath_skips_calendar_and_llm():
+    brain = AsyncMock()
+    pipeline = MessagePipeline(brain=brain)
+    ctx = _photo_ctx("Есть фото залов?")
+
+    with patch.object(MessagePipeline, "_pre_action", new=AsyncMock()) as pre_action:
+        result = await pipeline.process(ctx)
+
+    pre_action.assert_not_awaited()
+    brain.think.assert_not_awaited()
+    assert result.error is None
+    assert result.skip_to is None
+    assert result.outgoing is not None
+    assert result.outgoing.metadata["model"] == "photo_rooms_template"
+    assert result.outgoing.metadata["intent"] == "SAFE_FAQ"
+    assert "j-one.studio/agat" in result.outgoing.text
+
+
+@pytest.mark.asyncio
+async def test_photo_fastpath_yields_to_configured_greeting():
+    brain = AsyncMock()
+    ctx = _photo_ctx("Привет! Есть фото залов?", greeting="Здравствуйте!")
+
+    result = await MessagePipeline(brain=brain).process(ctx)
+
+    brain.think.assert_not_awaited()
+    assert result.outgoing is not None
+    assert result.outgoing.metadata["model"] == "greeting_template"
+    assert result.outgoing.text == "Здравствуйте!"
+
+
+@pytest.mark.asyncio
+async def test_photo_fastpath_applies_active_intent_lock():
+    state = {"locked_intent": "PRICING", "intent_lock_turns_left": 2}
+    ctx = _photo_ctx("Есть фото залов?", state=state)
+
+    result = await MessagePipeline(brain=AsyncMock()).process(ctx)
+
+    assert result.outgoing is not None
+    assert result.outgoing.metadata["model"] == "photo_rooms_template"
+    assert result.outgoing.metadata["intent"] == "PRICING"
+    assert state["intent_lock_turns_left"] == 1
+
+
+def test_pipeline_context_precomputes_text_lower():
+    ctx = PipelineContext(
+        incoming=IncomingMessage(
+            channel_type="telegram",
+            channel_conversation_id="c1",
+            channel_message_id="m1",
+            text="Хочу ЗАБРОНИРОВАТЬ Лофт",
+        ),
+        agent_config=_make_agent_config(),
+        knowledge={},
+        dialogue_policy=DialoguePolicyConfig(),
+    )
+    assert ctx.text_lower == "хочу забронировать лофт"
+
+
+def test_update_flow_stage_extracts_booking_fields():
+    ctx = PipelineContext(
+        incoming=IncomingMessage(
+            channel_type="telegram",
+            channel_conversation_id="c1",
+            channel_message_id="m1",
+            text=(
+                "Меня зовут Иван, +7 999 123-45-67. "
+                "Лофт 15.03.2026 в 14:00 на два часа, 4 человека"
+            ),
+        ),
+        agent_config=_make_agent_config(),
+        knowledge={},
+        dialogue_policy=DialoguePolicyConfig(),
+    )
+    flow_state = {"stage": "qualify", "booking_data": {}}
+
+    MessagePipeline(brain=AsyncMock())._update_flow_stage(ctx, flow_state)
+
+    assert flow_state["booking_data"] == {
+        "phone": "+7 999 123-45-67",
+        "name": "Иван",
+        "room": "Лофт",
+        "date": "15.03.2026",
+        "time": "14:00",
+        "duration": 2,
+        "participants": 4,
+    }
+    assert flow_state["stage"] == "finalize"
+
+
+@pytest.mark.parametrize(
+    ("text", "days", "room"),
+    [
+        ("Уют на завтра", 1, "Уют"),
+        ("давайте послезавтра, лучше Грань вместо Агат", 2, "Агат"),
+        ("вместо Грань Лофт, сегодня", 0, "Лофт"),
+    ],
+)
+def test_update_flow_stage_single_scan_room_and_relative_date(text, days, room):
+    ctx = PipelineContext(
+        incoming=IncomingMessage(
+            channel_type="telegram",
+            channel_conversation_id="c1",
+            channel_message_id="m1",
+            text=text,
+        ),
+        agent_config=_make_agent_config(),
+        knowledge={},
+        dialogue_policy=DialoguePolicyConfig(),
+    )
+    flow_state = {"stage": "qualify", "booking_data": {}}
+
+    MessagePipeline(brain=AsyncMock())._update_flow_stage(ctx, flow_state)
+
+    expected = (datetime.now() + timedelta(days=days)).strftime("%d.%m.%Y")
+    assert flow_state["booking_data"]["date"] == expected
+    assert flow_state["booking_data"]["room"] == room
+
+
+@pytest.mark.parametrize(
+    ("rel_days", "weekday", "expected"),
+    [
+        (0, None, "14.10.2026"),
+        (2, None, "16.10.2026"),
+        (None, 4, "16.10.2026"),
+        (None, 2, "21.10.2026"),
+        (None, 0, "19.10.2026"),
+    ],
+)
+def test_resolve_relative_date(rel_days, weekday, expected):
+    # 14.10.2026 is a Wednesday (weekday 2).
+    assert _resolve_relative_date(date(2026, 10, 14), rel_days, weekday) == expected
+
+
+def test_automation_text_matches_uses_cached_pattern():
+    ctx = PipelineContext(
+        incoming=IncomingMessage(
+            channel_type="telegram",
+            channel_conversation_id="c1",
+            channel_message_id="m1",
+            text="Нужен СЧЁТ для юрлица",
+        ),
+        agent_config=_make_agent_config(),
+        knowledge={},
+        dialogue_policy=DialoguePolicyConfig(),
+    )
+    pipeline = MessagePipeline(brain=AsyncMock())
+    _compile_text_matches.cache_clear()
+
+    assert pipeline._automation_matches(ctx, {}, {"text_matches": "счёт|счет"}) == (True, "matched")
+    assert pipeline._automation_matches(ctx, {}, {"text_matches": "счёт|счет"}) == (True, "matched")
+    assert _compile_text_matches.cache_info().hits == 1
+    matches = pipeline._automation_matches
+    assert matches(ctx, {}, {"text_matches": "договор"}) == (False, "text_no_match")
+    assert matches(ctx, {}, {"text_matches": "(broken"}) == (False, "invalid_regex")
+
+
+@pytest.mark.asyncio
+async def test_config_automations_parsed_and_executed():
+    agent_config = AgentConfig.model_validate({
+        "id": "a1",
+        "name": "Agent",
+        "identity": {"role": "Support", "persona": "Helpful"},
+        "automations": {
+            "enabled": True,
+            "rules": [
+                {"id": "off", "enabled": False, "do": ["set_state:skipped=yes"]},
+                {
+                    "id": "invoice",
+                    "when": {"text_matches": "счёт"},
+                    "do": ["set_state:lead=invoice"],
+                },
+            ],
+        },
+    })
+    ctx = PipelineContext(
+        incoming=IncomingMessage(
+            channel_type="telegram",
+            channel_conversation_id="c1",
+            channel_message_id="m1",
+            text="Нужен счёт",
+        ),
+        agent_config=agent_config,
+        knowledge={},
+        dialogue_policy=DialoguePolicyConfig(),
+    )
+    ctx.outgoing = OutgoingMessage(
+        text="ok", conversation_id="conv-1", channel_conversation_id="c1"
+    )
+    pipeline = MessagePipeline(brain=AsyncMock())
+    flow_state: dict = {}
+
+    await pipeline._run_config_automations(ctx, flow_state)
+    await pipeline._run_config_automations(ctx, flow_state)
+
+    assert flow_state["automations"] == {"invoice": True}
+    assert flow_state["lead"] == "invoice"
+    assert "skipped" not in flow_state
+    reasons = [(t["rule_id"], t["reason"]) for t in ctx.outgoing.metadata["automation_trace"]]
+    assert reasons == [
+        ("off", "disabled"),
+        ("invoice", "executed"),
+        ("off", "disabled"),
+        ("invoice", "already_executed"),
+    ]
@@ -1,16 +1,16 @@
 from __future__ import annotations
 
+from collections.abc import Callable
 from unittest.mock import AsyncMock
 
 import pytest
 
 from src.core.brain import BrainResponse
-from src.core.config_loader import load_tenant_config
 from src.core.pipeline import IncomingMessage, MessagePipeline, PipelineContext
+from src.core.schemas import TenantFullConfig
 
 
-def _ctx(message_text: str) -> PipelineContext:
-    cfg = load_tenant_config("tenants/j-one-studio")
+def _ctx(cfg: TenantFullConfig, message_text: str) -> PipelineContext:
     incoming = IncomingMessage(
         channel_type="umnico",
         channel_conversation_id="conv-1",
@@ -26,91 +26,83 @@ def _ctx(message_text: str) -> PipelineContext:
     )
 
 
+@pytest.fixture
+def make_pipeline() -> Callable[..., MessagePipeline]:
+    """Build a MessagePipeline whose brain returns `content` (or raises `exc`)."""
+
+    def _make(content: str | None = None, exc: Exception | None = None) -> MessagePipeline:
+        brain = AsyncMock()
+        if exc is not None:
+            brain.think = AsyncMock(side_effect=exc)
+        else:
+            brain.think = AsyncMock(
+                return_value=BrainResponse(content=content or "", model="gpt-4o", usage={}, raw={})
+            )
+        return MessagePipeline(brain=brain)
+
+    return _make
+
+
 @pytest.mark.asyncio
-async def test_pricing_detected_and_markdown_removed():
-    brain = AsyncMock()
-    brain.think = AsyncMock(
-        return_value=BrainResponse(content="**Стоимость 4990₽**", model="gpt-4o", usage={}, raw={})
-    )
-    pipeline = MessagePipeline(brain=brain)
+async def test_pricing_detected_and_markdown_removed(jone_cfg: TenantFullConfig, make_pipeline):
+    pipeline = make_pipeline("**Стоимость 4990₽**")
 
-    out = await pipeline.process(_ctx("Сколько стоит?"))
+    out = await pipeline.process(_ctx(jone_cfg, "Сколько стоит?"))
     assert out.detected_intent == "PRICING"
     assert out.outgoing is not None
     assert out.outgoing.text == "Стоимость 4990₽"
 
 
 @pytest.mark.asyncio
-async def test_address_detected():
-    brain = AsyncMock()
-    brain.think = AsyncMock(
-        return_value=BrainResponse(
-            content="Адрес: Нижняя Сыромятническая 11кБ, 9 этаж.",
-            model="gpt-4o",
-            usage={},
-            raw={},
-        )
-    )
-    pipeline = MessagePipeline(brain=brain)
+async def test_address_detected(jone_cfg: TenantFullConfig, make_pipeline):
+    pipeline = make_pipeline("Адрес: Нижняя Сыромятническая 11кБ, 9 этаж.")
 
-    out = await pipeline.process(_ctx("Где вы?"))
+    out = await pipeline.process(_ctx(jone_cfg, "Где вы?"))
     assert out.detected_intent == "ADDRESS"
 
 
 @pytest.mark.asyncio
-async def test_greeting_detected():
-    brain = AsyncMock()
-    brain.think = AsyncMock(return_value=BrainResponse(content="Здравствуйте!)", model="gpt-4o", usage={}, raw={}))
-    pipeline = MessagePipeline(brain=brain)
+async def test_greeting_detected(jone_cfg: TenantFullConfig, make_pipeline):
+    pipeline = make_pipeline("Здравствуйте!)")
 
-    out = await pipeline.process(_ctx("Привет!"))
+    out = await pipeline.process(_ctx(jone_cfg, "Привет!"))
     assert out.detected_intent == "GREETING"
 
 
 @pytest.mark.asyncio
-async def test_brain_markdown_removed():
-    brain = AsyncMock()
-    brain.think = AsyncMock(return_value=BrainResponse(content="**жирный**", model="gpt-4o", usage={}, raw={}))
-    pipeline = MessagePipeline(brain=brain)
+async def test_brain_markdown_removed(jone_cfg: TenantFullConfig, make_pipeline):
+    pipeline = make_pipeline("**жирный**")
 
-    out = await pipeline.process(_ctx("Привет!"))
+    out = await pipeline.process(_ctx(jone_cfg, "Привет!"))
     assert out.outgoing is not None
     assert out.outgoing.text == "жирный"
 
 
 @pytest.mark.asyncio
-async def test_filler_removed():
-    brain = AsyncMock()
-    brain.think = AsyncMock(
-        return_value=BrainResponse(content="Понял. Стоимость 4990₽", model="gpt-4o", usage={}, raw={})
-    )
-    pipeline = MessagePipeline(brain=brain)
+async def test_filler_removed(jone_cfg: TenantFullConfig, make_pipeline):
+    pipeline = make_pipeline("Понял. Стоимость 4990₽")
 
-    out = await pipeline.process(_ctx("Сколько стоит?"))
+    out = await pipeline.process(_ctx(jone_cfg, "Сколько стоит?"))
     assert out.outgoing is not None
     assert out.outgoing.text == "Стоимость 4990₽"
 
 
 @pytest.mark.asyncio
-async def test_sentence_limit_enforced():
-    brain = AsyncMock()
-    brain.think = AsyncMock(
-        return_value=BrainResponse(content="One. Two. Three. Four. Five.", model="gpt-4o", usage={}, raw={})
-    )
-    pipeline = MessagePipeline(brain=brain)
+async def test_sentence_limit_enforced(jone_cfg: TenantFullConfig, make_pipeline):
+    pipeline = make_pipeline("One. Two. Three. Four. Five.")
 
-    out = await pipeline.process(_ctx("Привет!"))
+    out = await pipeline.process(_ctx(jone_cfg, "Привет!"))
     assert out.outgoing is not None
     assert out.outgoing.text == "One. Two. Three."
 
 
 @pytest.mark.asyncio
-async def test_brain_error_sets_ctx_error_and_outgoing_none():
-    brain = AsyncMock()
-    brain.think = AsyncMock(side_effect=RuntimeError("LLM error"))
-    pipeline = MessagePipeline(brain=brain)
+async def test_brain_error_sets_ctx_error_and_outgoing_none(
+    jone_cfg: TenantFullConfig, make_pipeline
+):
+    pipeline = make_pipeline(exc=RuntimeError("LLM error"))
 
-    out = await pipeline.process(_ctx("Сколько стоит?"))
+    out = await pipeline.process(_ctx(jone_cfg, "Сколько стоит?"))
     assert out.error is not None
     assert out.outgoing is None
 
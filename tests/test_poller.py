@@ -1,7 +1,13 @@
 from __future__ import annotations
 
+import asyncio
+import threading
+from types import SimpleNamespace
 from unittest.mock import patch
 
+import pytest
+
+from src.workers import poller
 from src.workers.poller import poll_channels_task
 
 
@@ -31,3 +37,327 @@ def test_poll_channels_task_runs_without_errors_with_empty_db():
     with patch("src.db.async_session", new=_fake_async_session):
         poll_channels_task()
 
+
+def test_poll_channels_task_reuses_background_loop(monkeypatch):
+    seen: list[tuple[int, int]] = []
+
+    async def fake_poll_channels():
+        seen.append((id(asyncio.get_running_loop()), threading.get_ident()))
+
+    monkeypatch.setattr(poller, "_poll_channels", fake_poll_channels)
+    poll_channels_task()
+    poll_channels_task()
+
+    assert len(set(seen)) == 1
+    assert seen[0][1] != threading.get_ident()
+
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.keys: dict[str, object] = {}
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.keys:
+            return None
+        self.keys[key] = value
+        return True
+
+
+@pytest.mark.asyncio
+async def test_first_seen_uses_redis_set_nx(monkeypatch):
+    fake = _FakeRedis()
+    monkeypatch.setattr(poller, "_get_dedup_redis", lambda: fake)
+
+    assert await poller._first_seen("a1", "lead-1", "m1") is True
+    assert await poller._first_seen("a1", "lead-1", "m1") is False
+    assert await poller._first_seen("a1", "lead-1", "m2") is True
+    assert set(fake.keys) == {"poll:seen:a1:lead-1:m1", "poll:seen:a1:lead-1:m2"}
+
+
+@pytest.mark.asyncio
+async def test_first_seen_defers_to_db_when_redis_fails(monkeypatch):
+    class _BrokenRedis:
+        async def set(self, *_args, **_kwargs):
+            raise ConnectionError("redis down")
+
+    monkeypatch.setattr(poller, "_get_dedup_redis", lambda: _BrokenRedis())
+
+    assert await poller._first_seen("a1", "lead-1", "m1") is True
+    assert await poller._first_seen("a1", "lead-1", "m1") is True
+
+
+@pytest.mark.asyncio
+async def test_poll_channels_polls_agents_concurrently_and_isolates_failures(monkeypatch):
+    rows = [SimpleNamespace(id=f"a{i}", tenant_slug=f"t{i}") for i in range(3)]
+
+    class _Result:
+        def all(self):
+            return rows
+
+    class _Session(_FakeSession):
+        async def execute(self, *_args, **_kwargs):
+            return _Result()
+
+    running = 0
+    peak = 0
+    polled: list[str] = []
+
+    async def fake_poll_agent(agent):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0)
+        running -= 1
+        if agent.id == "a0":
+            raise RuntimeError("boom")
+        polled.append(agent.id)
+
+    monkeypatch.setattr(poller, "_poll_agent", fake_poll_agent)
+    with patch("src.db.async_session", new=lambda: _Session()):
+        await poller._poll_channels()
+
+    assert sorted(polled) == ["a1", "a2"]
+    assert peak == 3
+
+
+def test_poll_channels_derived_once_per_agent_version(monkeypatch):
+    monkeypatch.setattr(poller, "_agent_poll_channels_cache", {})
+    config = {"channels": [{"type": "umnico", "config": {}}, {"type": "telegram"}]}
+    agent = SimpleNamespace(id="a1", config=config, updated_at=1)
+
+    first = poller._get_poll_channels(agent)
+    assert [ch["type"] for ch in first] == ["umnico"]
+    assert poller._get_poll_channels(agent) is first
+
+    changed = SimpleNamespace(id="a1", config={"channels": []}, updated_at=2)
+    assert poller._get_poll_channels(changed) == []
+
+
+@pytest.mark.asyncio
+async def test_write_messages_uses_copy_for_large_batches(monkeypatch):
+    from src.models import Message
+
+    copied: list[tuple[str, list, list]] = []
+
+    class _Driver:
+        async def copy_records_to_table(self, table, columns, records):
+            copied.append((table, columns, records))
+
+    class _Conn:
+        async def get_raw_connection(self):
+            return SimpleNamespace(driver_connection=_Driver())
+
+    class _Db:
+        def __init__(self):
+            self.added: list = []
+
+        def add_all(self, rows):
+            self.added.extend(rows)
+
+        async def connection(self):
+            return _Conn()
+
+    monkeypatch.setattr(poller, "_COPY_THRESHOLD", 3)
+    rows = [
+        Message(conversation_id="c1", role="user", content="Привет", metadata_={"k": "в"}),
+        Message(conversation_id="c1", role="assistant", content="Здравствуйте", metadata_=None),
+    ]
+
+    db = _Db()
+    await poller._write_messages(db, rows)
+    assert db.added == rows and copied == []
+
+    db = _Db()
+    await poller._write_messages(db, rows * 2)
+    assert db.added == []
+    table, columns, records = copied[0]
+    assert table == "messages"
+    assert columns == ["id", "conversation_id", "role", "content", "metadata"]
+    assert len(records) == 4
+    assert records[0][1:] == ("c1", "user", "Привет", '{"k": "в"}')
+    assert records[1][4] is None
+
+
+@pytest.mark.asyncio
+async def test_apply_conversation_updates_one_row_per_conversation():
+    from sqlalchemy.dialects import postgresql
+
+    calls: list[tuple[object, list[dict]]] = []
+
+    class _Db:
+        async def execute(self, stmt, params=None):
+            calls.append((stmt, params))
+
+    await poller._apply_conversation_updates(_Db(), {})
+    assert calls == []
+
+    await poller._apply_conversation_updates(
+        _Db(),
+        {"c1": {"state": {"step": 2}, "lead_name": "Анна"}, "c2": {"state": {}}},
+    )
+    stmt, params = calls[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE conversations SET")
+    assert "lead_name=coalesce(conversations.lead_name, %(p_lead_name)s" in sql
+    assert "WHERE conversations.id = %(p_id)s" in sql
+    assert params == [
+        {"p_id": "c1", "p_state": {"step": 2}, "p_lead_name": "Анна", "p_lead_phone": None},
+        {"p_id": "c2", "p_state": {}, "p_lead_name": None, "p_lead_phone": None},
+    ]
+
+
+def test_missing_umnico_token_is_cached_and_logged_once(monkeypatch, caplog):
+    from src.core import secrets
+
+    calls: list[str] = []
+
+    def fake_resolve_secret(tenant_slug, secret_name):
+        calls.append(secret_name)
+        return None
+
+    clock = [1000.0]
+    monkeypatch.setattr(secrets, "resolve_secret", fake_resolve_secret)
+    monkeypatch.setattr(poller.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(poller, "_no_token_until", {})
+
+    with caplog.at_level("WARNING", logger=poller.logger.name):
+        assert poller._resolve_umnico_token("t1") is None
+        assert poller._resolve_umnico_token("t1") is None
+        assert calls == ["umnico_api_token", "umnico_token"]
+
+        clock[0] += poller._NO_TOKEN_TTL_S + 1
+        assert poller._resolve_umnico_token("t1") is None
+        assert len(calls) == 4
+
+    assert sum("Umnico token missing" in r.message for r in caplog.records) == 1
+
+
+@pytest.mark.asyncio
+async def test_poll_agent_loads_history_once_per_conversation(monkeypatch):
+    from uuid import uuid4
+
+    from src.core.config_loader import load_tenant_config
+    from src.core.pipeline import IncomingMessage, MessagePipeline, OutgoingMessage
+    from src.core.schemas import ActionConfig, TenantFullConfig
+
+    conv = SimpleNamespace(id=uuid4(), state={}, lead_name=None, lead_phone=None)
+    incoming = [
+        IncomingMessage("umnico", "lead-1", "m0", "Уже отвечено"),
+        IncomingMessage("umnico", "lead-1", "m1", "Здравствуйте", sender_name="Анна"),
+        IncomingMessage("umnico", "lead-1", "m2", "Сколько стоит?"),
+    ]
+    history_calls: list[int] = []
+    seen_histories: list[list[dict]] = []
+    applied: list[dict] = []
+
+    class _Adapter:
+        async def receive(self):
+            return incoming
+
+        async def send(self, channel_conversation_id, text):
+            return True
+
+    async def fake_history(db, conversation_id, limit=20):
+        history_calls.append(limit)
+        return [{"role": "user", "content": "старое"}]
+
+    async def fake_get_or_create(db, agent_id, keys):
+        return {key: conv for key in keys}
+
+    async def fake_process(self, ctx):
+        seen_histories.append(list(ctx.history))
+        ctx.outgoing = OutgoingMessage(
+            text=f"Ответ на {ctx.incoming.channel_message_id}",
+            conversation_id=str(conv.id),
+            channel_conversation_id=ctx.incoming.channel_conversation_id,
+        )
+        return ctx
+
+    async def fake_first_seen(*_args):
+        return True
+
+    async def fake_answered(db, conversation_ids, channel_message_ids):
+        assert list(conversation_ids) == [conv.id]
+        assert list(channel_message_ids) == ["m0", "m1", "m2"]
+        return {(conv.id, "m0")}
+
+    async def fake_apply(db, conv_updates):
+        applied.append(conv_updates)
+
+    class _Db(_FakeSession):
+        def add_all(self, rows):
+            self.rows = list(rows)
+
+    leads: list[dict] = []
+
+    async def fake_sheets_execute(self, action, params):
+        leads.append(params)
+        return {"success": True}
+
+    template = load_tenant_config("tenants/_template")
+    tenant_cfg = TenantFullConfig(
+        agent=template.agent,
+        actions=[
+            ActionConfig(
+                id="leads", type="google_sheets", trigger="lead", config={"spreadsheet_id": "s"}
+            )
+        ],
+    )
+    monkeypatch.setattr(poller.GoogleSheetsAdapter, "execute", fake_sheets_execute)
+    monkeypatch.setattr("src.channels.get_channel_adapter", lambda *_a: _Adapter())
+    monkeypatch.setattr("src.core.config_loader.load_tenant_config_cached", lambda _d: tenant_cfg)
+    monkeypatch.setattr("src.core.secrets.resolve_secret", lambda *_a: "secret")
+    monkeypatch.setattr("src.core.crud.get_conversation_history", fake_history)
+    monkeypatch.setattr("src.core.crud.get_or_create_conversations", fake_get_or_create)
+    monkeypatch.setattr("src.core.crud.get_answered_channel_message_ids", fake_answered)
+    monkeypatch.setattr(MessagePipeline, "process", fake_process)
+    monkeypatch.setattr(poller, "_first_seen", fake_first_seen)
+    monkeypatch.setattr(poller, "_apply_conversation_updates", fake_apply)
+    monkeypatch.setattr(poller, "_no_token_until", {})
+    monkeypatch.setattr(poller, "_agent_poll_channels_cache", {})
+
+    agent = SimpleNamespace(
+        id=uuid4(),
+        slug="agent",
+        tenant_slug="t1",
+        updated_at=1,
+        config={"channels": [{"type": "umnico", "config": {}}]},
+    )
+    db = _Db()
+    with patch("src.db.async_session", new=lambda: db):
+        await poller._poll_agent(agent)
+
+    assert len(seen_histories) == 2
+    assert [row.metadata_ for row in db.rows if row.role == "user"] == [
+        {"channel_message_id": "m1"},
+        {"channel_message_id": "m2"},
+    ]
+    assert history_calls == [20]
+    assert seen_histories[0] == [{"role": "user", "content": "старое"}]
+    assert seen_histories[1][-2:] == [
+        {"role": "user", "content": "Здравствуйте"},
+        {"role": "assistant", "content": "Ответ на m1"},
+    ]
+    assert applied[0][conv.id]["lead_name"] == "Анна"
+    assert [lead["message"] for lead in leads] == ["Здравствуйте", "Сколько стоит?"]
+
+
+def test_poll_errors_logged_once_per_window(monkeypatch, caplog):
+    clock = [0.0]
+    monkeypatch.setattr(poller.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(poller, "_poll_errors", {})
+
+    with caplog.at_level("ERROR", logger=poller.logger.name):
+        for _ in range(5):
+            poller._log_poll_error("a1", "umnico", RuntimeError("down"))
+        poller._log_poll_error("a2", "umnico", RuntimeError("down"))
+        clock[0] += poller._ERROR_LOG_WINDOW_S
+        poller._log_poll_error("a1", "umnico", RuntimeError("down"))
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert len(messages) == 3
+    assert messages[0].endswith("(0 similar errors suppressed)")
+    assert messages[2].startswith("Polling error for agent a1")
+    assert messages[2].endswith("(4 similar errors suppressed)")
+    assert caplog.records[0].exc_info is not None
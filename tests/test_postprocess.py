@@ -21,6 +21,11 @@ def test_remove_markdown_link():
     assert Postprocessor._remove_markdown("[ссылка](http://url)") == "ссылка"
 
 
+def test_remove_markdown_nested_markers_single_pass():
+    text = "**## Залы**\nСм. [**Лофт**](https://j-one.studio/loft) и `Агат`\n## __Цены__"
+    assert Postprocessor._remove_markdown(text) == "Залы\nСм. Лофт и Агат\nЦены"
+
+
 def test_remove_fillers_basic():
     pp = _pp()
     assert pp._remove_fillers("Понял. Стоимость 4990₽") == "Стоимость 4990₽"
@@ -31,6 +36,12 @@ def test_remove_fillers_multiple():
     assert pp._remove_fillers("Отлично! Давайте посчитаем. Итого 5000₽") == "Итого 5000₽"
 
 
+def test_remove_fillers_all_three_groups():
+    pp = _pp()
+    text = "Хорошо! Давайте разберём. Есть несколько залов. Агат — 4990₽"
+    assert pp._remove_fillers(text) == "Агат — 4990₽"
+
+
 def test_enforce_sentence_limit():
     text = "One. Two. Three. Four. Five."
     assert Postprocessor._enforce_sentence_limit(text, max_sentences=3) == "One. Two. Three."
@@ -41,6 +52,16 @@ def test_enforce_question_limit():
     assert Postprocessor._enforce_question_limit(text, max_questions=1) == "Вопрос?"
 
 
+def test_enforce_question_limit_edges():
+    text = "Вопрос? Ещё? Третий?"
+    assert Postprocessor._enforce_question_limit(text, max_questions=2) == "Вопрос? Ещё?"
+    assert Postprocessor._enforce_question_limit(text, max_questions=5) == text
+    no_questions = "Без вопросов."
+    assert Postprocessor._enforce_question_limit(no_questions, max_questions=1) == no_questions
+    # Zero behaves like one: keep up to the first question mark.
+    assert Postprocessor._enforce_question_limit(text, max_questions=0) == "Вопрос?"
+
+
 def test_remove_forbidden_lines():
     text = "Первая строка\nАдрес: Нижняя Сыромятническая\nТретья строка"
     out = Postprocessor._remove_forbidden_lines(text, forbidden=["Адрес"], intent_id=None)
@@ -96,3 +117,14 @@ def test_allow_prepayment_keeps_text():
 def test_prepayment_removed_avans():
     pp = _pp()
     assert pp.process("Необходимо оплатить аванс.") == ""
+
+
+def test_contract_forbidden_re_is_compiled_at_validation_and_case_insensitive():
+    contract = IntentContract.model_validate({"forbidden": ["адрес", "цена (руб)"]})
+    pattern = contract._forbidden_re
+    assert pattern is not None
+    assert contract.forbidden_re is pattern
+    assert IntentContract().forbidden_re is None
+    assert pattern.search("АДРЕС: ...")
+    assert pattern.search("Цена (руб): 100")
+    assert "_forbidden_re" not in contract.model_dump()
@@ -1,4 +1,4 @@
-from src.core.runtime_config import build_runtime_config
+from src.core.runtime_config import build_runtime_config, config_version
 from src.core.schemas import ActionConfig, AgentConfig, DialoguePolicyConfig, TenantFullConfig
 
 
@@ -21,3 +21,36 @@ def test_build_runtime_config_contains_required_fields() -> None:
     assert out["tenant_slug"] == "demo"
     assert out["agent"]["id"] == "a1"
     assert out["knowledge_keys"] == ["faq", "pricing"]
+
+
+def test_build_runtime_config_sections_match_per_model_dumps() -> None:
+    cfg = TenantFullConfig(
+        agent=AgentConfig.model_validate(
+            {
+                "id": "a1",
+                "name": "Agent",
+                "identity": {"role": "r", "persona": "p"},
+            }
+        ),
+        actions=[ActionConfig.model_validate({"id": "x", "type": "tool", "trigger": "t"})],
+    )
+    out = build_runtime_config(cfg, tenant_slug="demo")
+
+    assert out["agent"] == cfg.agent.model_dump()
+    assert out["dialogue_policy"] == cfg.dialogue_policy.model_dump()
+    assert out["actions"] == [a.model_dump() for a in cfg.actions]
+    assert "knowledge" not in out
+
+
+def test_config_version_is_stable_and_tracks_changes() -> None:
+    agent = AgentConfig.model_validate(
+        {"id": "a1", "name": "Agent", "identity": {"role": "r", "persona": "p"}}
+    )
+    policy = DialoguePolicyConfig.model_validate({})
+
+    version = config_version(agent, policy)
+    assert len(version) == 12
+    assert config_version(agent.model_copy(deep=True), policy) == version
+
+    changed = agent.model_copy(update={"name": "Other"})
+    assert config_version(changed, policy) != version
@@ -1,27 +1,54 @@
 from __future__ import annotations
 
-from src.core.secrets import _slugify, resolve_secret
+from unittest.mock import patch
+
+import pytest
 
+from src.core.secrets import _slugify, resolve_secret
 
-def test_resolve_secret_from_env(monkeypatch):
-    monkeypatch.setenv("AGENTBOX_SECRET_J_ONE_STUDIO_UMNICO_TOKEN", "env-value")
-    assert resolve_secret("j-one-studio", "umnico_token") == "env-value"
+_ENV_NAME = "AGENTBOX_SECRET_J_ONE_STUDIO_UMNICO_TOKEN"
 
 
-def test_resolve_secret_from_file(tmp_path, monkeypatch):
+@pytest.fixture
+def secret_source(request, tmp_path, monkeypatch):
+    """Provide the j-one-studio umnico_token from the source named by the param."""
     monkeypatch.chdir(tmp_path)
-    secret_path = tmp_path / "secrets" / "j-one-studio" / "umnico_token"
-    secret_path.parent.mkdir(parents=True, exist_ok=True)
-    secret_path.write_text("file-value\n", encoding="utf-8")
+    monkeypatch.delenv(_ENV_NAME, raising=False)
+    if request.param == "env":
+        monkeypatch.setenv(_ENV_NAME, "env-value")
+    elif request.param == "file":
+        secret_path = tmp_path / "secrets" / "j-one-studio" / "umnico_token"
+        secret_path.parent.mkdir(parents=True, exist_ok=True)
+        secret_path.write_text("file-value\n", encoding="utf-8")
+    return request.param
+
+
+@pytest.mark.parametrize(
+    ("secret_source", "expected"),
+    [("env", "env-value"), ("file", "file-value"), ("missing", None)],
+    ids=["env", "file", "missing"],
+    indirect=["secret_source"],
+)
+def test_resolve_secret(secret_source, expected):
+    assert resolve_secret("j-one-studio", "umnico_token") == expected
+
 
-    assert resolve_secret("j-one-studio", "umnico_token") == "file-value"
+def test_slugify_converts_to_env_safe_format():
+    assert _slugify("j-one-studio") == "J_ONE_STUDIO"
 
 
-def test_resolve_secret_not_found_returns_none(tmp_path, monkeypatch):
+def test_resolve_secret_file_cached_until_changed(tmp_path, monkeypatch):
     monkeypatch.chdir(tmp_path)
-    assert resolve_secret("j-one-studio", "missing") is None
+    secret_path = tmp_path / "secrets" / "j-one-studio" / "umnico_token"
+    secret_path.parent.mkdir(parents=True, exist_ok=True)
+    secret_path.write_text("v1", encoding="utf-8")
 
+    assert resolve_secret("j-one-studio", "umnico_token") == "v1"
+    with patch("pathlib.Path.read_text", side_effect=AssertionError("re-read")):
+        assert resolve_secret("j-one-studio", "umnico_token") == "v1"
 
-def test_slugify_converts_to_env_safe_format():
-    assert _slugify("j-one-studio") == "J_ONE_STUDIO"
+    secret_path.write_text("value-2", encoding="utf-8")
+    assert resolve_secret("j-one-studio", "umnico_token") == "value-2"
 
+    secret_path.unlink()
+    assert resolve_secret("j-one-studio", "umnico_token") is None
@@ -1,48 +1,69 @@
-from src.core.state_contract import normalize_flow_state, validate_flow_state
+import pytest
 
+from src.core.state_contract import normalize_flow_state, validate_flow_state
 
-def test_validate_happy_path_created() -> None:
-    flow = {
-        "stage": "finalize",
-        "booking_status": "created",
-        "booking_event_id": "evt_123",
-        "booking_data": {"date": "20.02.2026", "time": "18:00", "room": "Лофт"},
-    }
-    assert validate_flow_state(flow) == []
+# (flow, errors that must be reported; [] means the flow must validate cleanly).
+VALIDATE_CASES = [
+    pytest.param(
+        {
+            "stage": "finalize",
+            "booking_status": "created",
+            "booking_event_id": "evt_123",
+            "booking_data": {"date": "20.02.2026", "time": "18:00", "room": "Лофт"},
+        },
+        [],
+        id="happy-created",
+    ),
+    pytest.param(
+        {"stage": "offer", "booking_status": "weird"},
+        ["invalid_booking_status:weird"],
+        id="invalid-status",
+    ),
+    pytest.param(
+        {
+            "stage": "finalize",
+            "booking_status": "busy",
+            "booking_event_id": "evt_1",
+            "booking_data": {"date": "20.02.2026", "time": "18:00", "room": "Лофт"},
+            "booking_conflict": {"reason": "slot_busy"},
+        },
+        ["event_id_requires_created_status"],
+        id="event-id-non-created",
+    ),
+]
 
 
-def test_validate_rejects_invalid_status() -> None:
-    flow = {"stage": "offer", "booking_status": "weird"}
+@pytest.mark.parametrize(("flow", "expected_errors"), VALIDATE_CASES)
+def test_validate(flow: dict, expected_errors: list[str]) -> None:
     errs = validate_flow_state(flow)
-    assert "invalid_booking_status:weird" in errs
+    if not expected_errors:
+        assert errs == []
+    for error in expected_errors:
+        assert error in errs
 
 
-def test_validate_rejects_event_id_non_created() -> None:
-    flow = {
-        "stage": "finalize",
-        "booking_status": "busy",
-        "booking_event_id": "evt_1",
-        "booking_data": {"date": "20.02.2026", "time": "18:00", "room": "Лофт"},
-        "booking_conflict": {"reason": "slot_busy"},
-    }
-    errs = validate_flow_state(flow)
-    assert "event_id_requires_created_status" in errs
+# (raw flow, fields the normalized flow must have).
+NORMALIZE_CASES = [
+    pytest.param(
+        {
+            "stage": "offer",
+            "booking_status": "busy",
+            "booking_event_id": "evt_1",
+            "booking_data": {"room": "Лофт"},
+        },
+        {"booking_status": "created", "stage": "finalize"},
+        id="event-present-sets-created",
+    ),
+    pytest.param(
+        None,
+        {"stage": "qualify", "booking_status": "", "booking_data": {}},
+        id="initial-defaults",
+    ),
+]
 
 
-def test_normalize_sets_created_when_event_present() -> None:
-    flow = {
-        "stage": "offer",
-        "booking_status": "busy",
-        "booking_event_id": "evt_1",
-        "booking_data": {"room": "Лофт"},
-    }
+@pytest.mark.parametrize(("flow", "expected"), NORMALIZE_CASES)
+def test_normalize(flow: dict | None, expected: dict) -> None:
     norm = normalize_flow_state(flow)
-    assert norm["booking_status"] == "created"
-    assert norm["stage"] == "finalize"
-
-
-def test_normalize_initial_defaults() -> None:
-    norm = normalize_flow_state(None)
-    assert norm["stage"] == "qualify"
-    assert norm["booking_status"] == ""
-    assert norm["booking_data"] == {}
+    for key, value in expected.items():
+        assert norm[key] == value, key
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+
+from src.integrations import http_client, telegram_notify
+from src.integrations.http_client import close_http_client
+from src.integrations.telegram_notify import TelegramNotifier, get_notifier
+
+
+@pytest.mark.asyncio
+async def test_send_escalation_reuses_shared_client(monkeypatch):
+    seen_clients: list[int] = []
+
+    async def fake_post(self, url, json=None):
+        seen_clients.append(id(self))
+        return httpx.Response(200, json={"ok": True, "result": {"message_id": 7}})
+
+    monkeypatch.setattr(httpx.AsyncClient, "post", fake_post)
+    notifier = TelegramNotifier(bot_token="t", chat_id="1")
+
+    first = await notifier.send_escalation("Анна", "telegram", "Хочу забронировать")
+    second = await notifier.send_escalation("Анна", "telegram", "Ещё вопрос")
+
+    assert first == {"success": True, "message_id": 7}
+    assert second["success"] is True
+    assert len(set(seen_clients)) == 1
+
+    await close_http_client()
+    assert http_client._http_client is None
+
+
+def test_get_notifier_reuses_instance_until_settings_change(monkeypatch):
+    monkeypatch.setattr(telegram_notify, "resolve_secret", lambda tenant, name: None)
+    monkeypatch.delenv("TELEGRAM_BOT_TOKEN", raising=False)
+    monkeypatch.setenv("TELEGRAM_ESCALATION_CHAT_ID", "1")
+
+    assert get_notifier("j-one-studio") is None
+
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "t1")
+    first = get_notifier("j-one-studio")
+    assert first is not None and first.bot_token == "t1"
+    assert get_notifier("j-one-studio") is first
+
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "t2")
+    assert get_notifier("j-one-studio").bot_token == "t2"
+
+
+@pytest.mark.asyncio
+async def test_send_escalation_payload_from_precomputed_fields(monkeypatch):
+    sent: list[tuple[str, dict]] = []
+
+    async def fake_post(self, url, json=None):
+        sent.append((url, json))
+        return httpx.Response(200, json={"ok": True, "result": {"message_id": 1}})
+
+    monkeypatch.setattr(httpx.AsyncClient, "post", fake_post)
+    monkeypatch.setenv("AGENTBOX_DASHBOARD_URL", "https://box.example/")
+    notifier = TelegramNotifier(bot_token="t", chat_id="-100", thread_id=5)
+
+    await notifier.send_escalation("Анна", "telegram", "Привет", conversation_link="/c/1")
+    await close_http_client()
+
+    url, payload = sent[0]
+    assert url == "https://api.telegram.org/bott/sendMessage"
+    assert payload["chat_id"] == "-100"
+    assert payload["message_thread_id"] == 5
+    assert payload["disable_web_page_preview"] is True
+    assert payload["text"].endswith("Диалог: https://box.example/c/1")
+    assert "text" not in notifier._base_payload
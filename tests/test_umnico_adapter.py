@@ -1,109 +1,118 @@
 from __future__ import annotations
 
-from unittest.mock import AsyncMock
+import json
+from types import SimpleNamespace
 
+import httpx
 import pytest
 
 from src.channels.umnico import UmnicoAdapter
+from src.integrations.http_client import close_http_client
+
+
+@pytest.fixture
+def make_umnico():
+    """Fresh adapter per call."""
+    return lambda: UmnicoAdapter({"token": "t"})
+
+
+async def test_receive_returns_nothing_for_webhook_channel(make_umnico):
+    assert await make_umnico().receive() == []
+
+
+@pytest.fixture
+async def umnico_api(monkeypatch):
+    """Serve the adapter's HTTP calls from `routes` {(method, path): (status, json)}."""
+    routes: dict[tuple[str, str], tuple[int, object]] = {}
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        status, body = routes.get((request.method, request.url.path), (404, {}))
+        return httpx.Response(status, json=body)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr("src.channels.umnico.get_http_client", lambda: client)
+    yield SimpleNamespace(routes=routes, requests=requests)
+    await client.aclose()
+
+
+@pytest.mark.parametrize(
+    ("sources", "send_status", "expected"),
+    [
+        ((200, [{"id": "s1", "realId": 255, "saId": 88, "type": "message"}]), 200, True),
+        ((500, {}), 200, False),
+        ((200, []), 200, False),
+        ((200, [{"id": "s1", "realId": 255, "type": "message"}]), 400, False),
+    ],
+    ids=["ok", "sources-error", "no-sources", "send-error"],
+)
+async def test_send(umnico_api, sources, send_status, expected):
+    umnico_api.routes[("GET", "/v1.3/messaging/lead1/sources")] = sources
+    umnico_api.routes[("POST", "/v1.3/messaging/lead1/send")] = (send_status, {})
+    adapter = UmnicoAdapter({"api_token": "t", "user_id": 7})
+
+    assert await adapter.send("lead1", "hello") is expected
+
+    posts = [r for r in umnico_api.requests if r.method == "POST"]
+    if sources[0] == 200 and sources[1]:
+        assert len(posts) == 1
+        payload = json.loads(posts[0].content)
+        assert payload["message"] == {"text": "hello"}
+        assert payload["source"] == "255"
+        assert payload["userId"] == 7
+        assert posts[0].headers["Authorization"] == "bearer t"
+    else:
+        assert posts == []
+
+
+async def test_send_resolves_owner_user_id(umnico_api):
+    umnico_api.routes[("GET", "/v1.3/managers")] = (
+        200,
+        [{"id": 3, "role": "manager"}, {"id": 9, "role": "owner"}],
+    )
+    umnico_api.routes[("GET", "/v1.3/messaging/lead1/sources")] = (200, [{"realId": 255}])
+    umnico_api.routes[("POST", "/v1.3/messaging/lead1/send")] = (200, {})
+    adapter = UmnicoAdapter({"api_token": "t"})
 
+    assert await adapter.send("lead1", "hello") is True
 
-@pytest.mark.asyncio
-async def test_receive_returns_incoming_message():
-    adapter = UmnicoAdapter({"token": "t"})
-    adapter._api_get = AsyncMock(  # type: ignore[method-assign]
-        side_effect=[
-            # inbox leads
-            [
-                {"id": 1, "message": {"incoming": True}},
-            ],
-            # sources for lead 1
-            [{"id": "s1", "realId": "rs1", "type": "message"}],
-        ]
-    )
-    adapter._api_post = AsyncMock(  # type: ignore[method-assign]
-        return_value={
-            "messages": [
-                {"incoming": True, "datetime": 1, "message": {"text": "hi"}, "sender": {"name": "A"}},
-                {
-                    "incoming": True,
-                    "datetime": 2,
-                    "message": {"text": "Сколько стоит?"},
-                    "sender": {"name": "Ivan"},
-                    "messageId": "m2",
-                },
-            ]
-        }
-    )
+    post = umnico_api.requests[-1]
+    assert json.loads(post.content)["userId"] == 9
+    assert adapter.user_id == 9
 
-    msgs = await adapter.receive()
-    assert len(msgs) == 1
-    m = msgs[0]
-    assert m.channel_type == "umnico"
-    assert m.channel_conversation_id == "1:rs1"
-    assert m.channel_message_id == "m2"
-    assert m.text == "Сколько стоит?"
-    assert m.sender_name == "Ivan"
-    assert m.metadata["lead_id"] == "1"
-    assert m.metadata["source_id"] == "rs1"
-
-
-@pytest.mark.asyncio
-async def test_receive_skips_non_incoming_leads():
-    adapter = UmnicoAdapter({"token": "t"})
-    adapter._api_get = AsyncMock(return_value=[{"id": 1, "message": {"incoming": False}}])  # type: ignore[method-assign]
-    msgs = await adapter.receive()
-    assert msgs == []
-
-
-@pytest.mark.asyncio
-async def test_receive_empty_inbox_returns_empty_list():
-    adapter = UmnicoAdapter({"token": "t"})
-    adapter._api_get = AsyncMock(return_value=[])  # type: ignore[method-assign]
-    msgs = await adapter.receive()
-    assert msgs == []
-
-
-@pytest.mark.asyncio
-async def test_send_parses_conversation_id_and_calls_api():
-    adapter = UmnicoAdapter({"token": "t"})
-    adapter._ensure_user_id = AsyncMock(return_value="u1")  # type: ignore[method-assign]
-    adapter._api_post = AsyncMock(return_value={"ok": True})  # type: ignore[method-assign]
-
-    ok = await adapter.send("lead1:source1", "hello")
-    assert ok is True
-    assert adapter._api_post.await_count == 1
-    _client, path = adapter._api_post.await_args.args[:2]
-    assert "/messaging/lead1/send" in path
-
-
-@pytest.mark.asyncio
-async def test_send_invalid_conversation_id_returns_false():
-    adapter = UmnicoAdapter({"token": "t"})
-    ok = await adapter.send("bad", "hello")
-    assert ok is False
-
-
-@pytest.mark.asyncio
-async def test_get_lead_info_returns_customer_fields():
-    adapter = UmnicoAdapter({"token": "t"})
-    adapter._api_get = AsyncMock(  # type: ignore[method-assign]
-        return_value={"customer": {"name": "Ivan", "phone": "+7999", "email": "a@b.com"}}
+
+async def test_get_lead_info_returns_customer_fields(umnico_api):
+    umnico_api.routes[("GET", "/v1.3/leads/1")] = (
+        200,
+        {
+            "id": 1,
+            "customerId": 5,
+            "customer": {"name": "Ivan", "phone": "+7999", "email": "a@b.com"},
+        },
     )
-    info = await adapter.get_lead_info("1:s1")
+    info = await UmnicoAdapter({"api_token": "t"}).get_lead_info("1")
     assert info["name"] == "Ivan"
     assert info["phone"] == "+7999"
     assert info["email"] == "a@b.com"
+    assert info["umnico_customer_id"] == 5
+
+
+async def test_api_calls_reuse_shared_http_client(monkeypatch):
+    seen_clients: list[int] = []
 
+    async def fake_get(self, url, headers=None, timeout=None):
+        seen_clients.append(id(self))
+        return httpx.Response(200, json={"id": 5, "customer": {"name": "Анна", "phone": "+7900"}})
 
-@pytest.mark.asyncio
-async def test_api_error_handling_does_not_crash():
-    adapter = UmnicoAdapter({"token": "t"})
-    adapter._api_get = AsyncMock(return_value=None)  # type: ignore[method-assign]
-    msgs = await adapter.receive()
-    assert msgs == []
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+    first = UmnicoAdapter({"api_token": "t"})
+    second = UmnicoAdapter({"api_token": "t"})
 
-    adapter._ensure_user_id = AsyncMock(return_value="u1")  # type: ignore[method-assign]
-    adapter._api_post = AsyncMock(return_value=None)  # type: ignore[method-assign]
-    ok = await adapter.send("1:s1", "hello")
-    assert ok is False
+    info = await first.get_lead_info("5")
+    await second.get_lead_info("6")
+    await close_http_client()
 
+    assert info["name"] == "Анна"
+    assert len(seen_clients) == 2
+    assert len(set(seen_clients)) == 1